@@ -28,7 +28,34 @@ API_SERVICE_OPTS = [
     cfg.IntOpt('max_limit',
                default=1000,
                help='The maximum number of items returned in a single '
-                    'response from a collection resource.')
+                    'response from a collection resource.'),
+    cfg.IntOpt('workers',
+               default=None,
+               help='Number of worker processes for the magnum API server. '
+                    'The default is the number of CPUs available.'),
+    cfg.IntOpt('wsgi_pool_size',
+               default=100,
+               help='Size of the pool of greenthreads used by each API '
+                    'worker to serve requests.'),
+    cfg.BoolOpt('wsgi_keep_alive',
+                default=True,
+                help='If False, closes the client socket connection '
+                     'explicitly after each response.'),
+    cfg.IntOpt('client_socket_timeout',
+               default=900,
+               help='Timeout in seconds for client connections\' socket '
+                    'operations. An idle keep-alive connection is closed '
+                    'once it expires. A value of 0 means wait forever.'),
+    cfg.IntOpt('backlog',
+               default=128,
+               help='Number of backlog requests to configure the API '
+                    'listening socket with.'),
+    cfg.IntOpt('stream_quiet_timeout',
+               default=600,
+               help='Seconds without any output after which a streamed '
+                    'response, such as followed container logs, ends. A '
+                    'client that went away is only noticed once output is '
+                    'written to it. A value of 0 means no limit.'),
 ]
 
 CONF = cfg.CONF
@@ -14,9 +14,11 @@
 #    under the License.
 
 import datetime
+import json
 
 import pecan
 from pecan import rest
+import six
 import wsme
 from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
@@ -24,9 +26,15 @@ import wsmeext.pecan as wsme_pecan
 from magnum.api.controllers import base
 from magnum.api.controllers import link
 from magnum.api.controllers.v1 import collection
+from magnum.api.controllers.v1 import pod as api_pod
+from magnum.api.controllers.v1 import replicationcontroller as api_rc
+from magnum.api.controllers.v1 import service as api_service
 from magnum.api.controllers.v1 import types
 from magnum.api.controllers.v1 import utils as api_utils
 from magnum.common import exception
+from magnum.common import k8s_manifest
+from magnum.common import urlfetch
+from magnum.i18n import _
 from magnum import objects
 
 
@@ -171,11 +179,150 @@ class BayCollection(collection.Collection):
         return sample
 
 
+def _format_prewarm_chunk(chunk):
+    return chunk['output'].encode('utf-8')
+
+
+class PrewarmImagesController(object):
+    """Pulls images onto every node of a bay.
+
+    The bay must be a swarm bay. The request body may list the images to
+    pull, as {"images": [...]}, which otherwise are the prewarm_images of
+    the baymodel of the bay.
+    The response is a chunked stream of JSON documents, one per line, each
+    reporting the node, image, error if any, and progress of a pull that
+    finished.
+    """
+
+    @pecan.expose()
+    def _default(self, bay_ident):
+        if pecan.request.method != 'PUT':
+            pecan.abort(405, ('HTTP method %s is not allowed'
+                              % pecan.request.method))
+        images = None
+        if pecan.request.body:
+            try:
+                images = pecan.request.json_body.get('images')
+            except (ValueError, AttributeError):
+                images = ()
+            if (images is not None and
+                    (not isinstance(images, list) or
+                     not all(isinstance(image, six.string_types)
+                             for image in images))):
+                pecan.abort(400, _("images must be a list of image names."))
+        try:
+            bay = api_utils.get_rpc_resource('Bay', bay_ident)
+            baymodel = objects.BayModel.get_by_uuid(pecan.request.context,
+                                                    bay.baymodel_id)
+            if baymodel.coe != 'swarm':
+                raise exception.PrewarmImagesNotSupported(bay=bay.uuid,
+                                                          coe=baymodel.coe)
+        except exception.MagnumException as e:
+            pecan.abort(e.code, six.text_type(e))
+        rpcapi = pecan.request.rpcapi
+        stream = rpcapi.bay_prewarm_images(bay.uuid, images)
+        pecan.response.content_type = 'application/x-json-stream'
+        pecan.response.app_iter = api_utils.relay_stream(rpcapi, stream,
+                                                         _format_prewarm_chunk)
+        return pecan.response
+
+
+class BayManifest(wtypes.Base):
+    """API representation of a manifest to apply to a bay.
+
+    The manifest may hold several k8s resources, as a YAML stream of
+    documents or as a manifest of kind List.
+    """
+
+    manifest_url = wtypes.text
+    """URL for the manifest file of the k8s resources"""
+
+    manifest = wtypes.text
+    """Data for the manifest of the k8s resources"""
+
+    def get_manifest(self):
+        if self.manifest:
+            return self.manifest
+        if self.manifest_url:
+            return urlfetch.get(self.manifest_url)
+        return None
+
+
+class BayManifestResources(wtypes.Base):
+    """API representation of the k8s resources created from a manifest."""
+
+    services = [api_service.Service]
+    """The services created"""
+
+    pods = [api_pod.Pod]
+    """The pods created"""
+
+    rcs = [api_rc.ReplicationController]
+    """The replication controllers created"""
+
+
+_MANIFEST_KINDS = {
+    'Service': ('services', api_service.Service, objects.Service),
+    'Pod': ('pods', api_pod.Pod, objects.Pod),
+    'ReplicationController': ('rcs', api_rc.ReplicationController,
+                              objects.ReplicationController),
+}
+
+
+class ApplyManifestController(object):
+    """Creates the k8s resources of a manifest on a bay in one request."""
+
+    @wsme_pecan.wsexpose(BayManifestResources, types.uuid_or_name,
+                         body=BayManifest)
+    def _default(self, bay_ident, bay_manifest):
+        if pecan.request.method != 'PUT':
+            pecan.abort(405, ('HTTP method %s is not allowed'
+                              % pecan.request.method))
+        bay = api_utils.get_rpc_resource('Bay', bay_ident)
+        try:
+            manifests = k8s_manifest.parse_all(bay_manifest.get_manifest())
+        except ValueError as e:
+            raise exception.InvalidParameterValue(message=str(e))
+
+        context = pecan.request.context
+        auth_token = context.auth_token_info['token']
+        resources = {'services': [], 'pods': [], 'rcs': []}
+        for manifest in manifests:
+            try:
+                key, api_cls, obj_cls = _MANIFEST_KINDS[manifest.get('kind')]
+            except KeyError:
+                raise exception.InvalidParameterValue(
+                    _("Field kind must be one of %(kinds)s in manifest, "
+                      "not %(kind)s.") %
+                    {'kinds': ', '.join(sorted(_MANIFEST_KINDS)),
+                     'kind': manifest.get('kind')})
+            resource = api_cls(manifest=json.dumps(manifest))
+            resource.parse_manifest()
+            resource_dict = resource.as_dict()
+            resource_dict['bay_uuid'] = bay.uuid
+            resource_dict['project_id'] = auth_token['project']['id']
+            resource_dict['user_id'] = auth_token['user']['id']
+            resources[key].append(obj_cls(context, **resource_dict))
+
+        created = pecan.request.rpcapi.bay_apply_manifest(bay.uuid,
+                                                          **resources)
+        return BayManifestResources(
+            services=[api_service.Service.convert_with_links(obj)
+                      for obj in created['services']],
+            pods=[api_pod.Pod.convert_with_links(obj)
+                  for obj in created['pods']],
+            rcs=[api_rc.ReplicationController.convert_with_links(obj)
+                 for obj in created['rcs']])
+
+
 class BaysController(rest.RestController):
     """REST controller for Bays."""
     def __init__(self):
         super(BaysController, self).__init__()
 
+    prewarm_images = PrewarmImagesController()
+    apply_manifest = ApplyManifestController()
+
     from_bays = False
     """A flag to indicate if the requests to this controller are coming
     from the top-level resource Bays."""
@@ -97,6 +97,9 @@ class BayModel(base.APIBase):
     cluster_distro = wtypes.StringType(min_length=1, max_length=255)
     """The Cluster distro for the bay, ex - coreos, fedora-atomic."""
 
+    prewarm_images = [wtypes.text]
+    """The images to pull onto the nodes of a bay when prewarming it"""
+
     links = wsme.wsattr([link.Link], readonly=True)
     """A list containing a self link and associated baymodel links"""
 
@@ -143,6 +146,7 @@ class BayModel(base.APIBase):
             fixed_network='private',
             apiserver_port=8080,
             docker_volume_size=25,
+            prewarm_images=['ubuntu:14.04'],
             cluster_distro='fedora-atomic',
             ssh_authorized_key='ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAAB',
             coe='kubernetes',
@@ -14,10 +14,14 @@
 #    under the License.
 
 import datetime
+import json
 
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import strutils
 import pecan
 from pecan import rest
+import six
 import wsme
 from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
@@ -27,11 +31,17 @@ from magnum.api.controllers import link
 from magnum.api.controllers.v1 import collection
 from magnum.api.controllers.v1 import types
 from magnum.api.controllers.v1 import utils as api_utils
+from magnum.common import docker_utils
 from magnum.common import exception
+from magnum.i18n import _
 from magnum import objects
 
 LOG = logging.getLogger(__name__)
 
+cfg.CONF.import_opt('docker_remote_api_version',
+                    'magnum.conductor.handlers.docker_conductor',
+                    group='docker')
+
 
 class ContainerPatchType(types.JsonPatchType):
 
@@ -156,6 +166,41 @@ class ContainerCollection(collection.Collection):
         return sample
 
 
+class ContainerAction(wtypes.Base):
+    """API representation of an action to run on many containers."""
+
+    action = wsme.wsattr(wtypes.Enum(str, 'start', 'stop', 'reboot',
+                                     'pause', 'unpause', 'delete'),
+                         mandatory=True)
+    """The action to run on the containers"""
+
+    containers = wsme.wsattr([types.uuid_or_name], mandatory=True)
+    """UUIDs or names of the containers to run the action on"""
+
+
+class ContainerActionResult(wtypes.Base):
+    """API representation of the result of an action on a container."""
+
+    container = types.uuid_or_name
+    """The UUID or name of the container, as given in the request"""
+
+    uuid = types.uuid
+    """Unique UUID of the container"""
+
+    status = wtypes.text
+    """The status of the container after the action"""
+
+    error = wtypes.text
+    """Why the action failed, if it did"""
+
+
+class ContainerActionResultCollection(wtypes.Base):
+    """API representation of the results of an action on containers."""
+
+    results = [ContainerActionResult]
+    """The results, in the order the containers were given in"""
+
+
 class StartController(object):
     @wsme_pecan.wsexpose(types.uuid_or_name, wtypes.text)
     def _default(self, container_ident):
@@ -235,6 +280,71 @@ class LogsController(object):
         return pecan.request.rpcapi.container_logs(container_uuid)
 
 
+def _format_logs_chunk(chunk):
+    return chunk['output'].encode('utf-8')
+
+
+def _format_exec_chunk(chunk):
+    lines = []
+    if chunk['output']:
+        lines.append(json.dumps({'output': chunk['output']}))
+    if chunk['eof']:
+        lines.append(json.dumps({'exit_code': chunk.get('exit_code')}))
+    return ''.join(line + '\n' for line in lines)
+
+
+def _get_container_uuid(container_ident):
+    try:
+        return api_utils.get_rpc_resource('Container', container_ident).uuid
+    except exception.MagnumException as e:
+        pecan.abort(e.code, six.text_type(e))
+
+
+class StreamLogsController(object):
+    """Streams the logs of a container as a chunked text/plain response.
+
+    Query parameters: tail, the number of lines to return from the end of
+    the logs or 'all'; since, a UNIX timestamp to return the lines logged
+    after, which needs Docker remote API version 1.19; and follow, to keep
+    returning lines as they are logged.
+    """
+
+    @pecan.expose()
+    def _default(self, container_ident, tail='all', since=None,
+                 follow='false'):
+        if pecan.request.method != 'GET':
+            pecan.abort(405, ('HTTP method %s is not allowed'
+                              % pecan.request.method))
+        try:
+            if tail != 'all':
+                tail = int(tail)
+                if tail < 0:
+                    raise ValueError(tail)
+            if since is not None:
+                since = int(since)
+            follow = strutils.bool_from_string(follow, strict=True)
+        except ValueError:
+            pecan.abort(400, _("tail must be 'all' or a non-negative "
+                               "integer, since a UNIX timestamp and follow "
+                               "a boolean."))
+        api_version = cfg.CONF.docker.docker_remote_api_version
+        if (since is not None and
+                not docker_utils.is_docker_api_version_atleast(api_version,
+                                                               '1.19')):
+            pecan.abort(400, _("since needs Docker remote API version 1.19 "
+                               "or newer, %s is configured.") % api_version)
+        container_uuid = _get_container_uuid(container_ident)
+        LOG.debug('Calling conductor.container_logs_stream with %s' %
+                  container_uuid)
+        rpcapi = pecan.request.rpcapi
+        stream = rpcapi.container_logs_stream(container_uuid, tail, since,
+                                              follow)
+        pecan.response.content_type = 'text/plain'
+        pecan.response.app_iter = api_utils.relay_stream(rpcapi, stream,
+                                                         _format_logs_chunk)
+        return pecan.response
+
+
 class ExecuteController(object):
     @wsme_pecan.wsexpose(types.uuid_or_name, wtypes.text, wtypes.text)
     def _default(self, container_ident, command):
@@ -248,6 +358,32 @@ class ExecuteController(object):
         return pecan.request.rpcapi.container_execute(container_uuid, command)
 
 
+class StreamExecuteController(object):
+    """Streams the output of a command run in a container.
+
+    The response is a chunked stream of JSON documents, one per line: an
+    {"output": ...} document for every chunk of output of the command,
+    then an {"exit_code": ...} document once it has exited.
+    """
+
+    @pecan.expose()
+    def _default(self, container_ident, command=None):
+        if pecan.request.method != 'PUT':
+            pecan.abort(405, ('HTTP method %s is not allowed'
+                              % pecan.request.method))
+        if not command:
+            pecan.abort(400, _("A command is required."))
+        container_uuid = _get_container_uuid(container_ident)
+        LOG.debug('Calling conductor.container_execute_stream with %s '
+                  'command %s' % (container_uuid, command))
+        rpcapi = pecan.request.rpcapi
+        stream = rpcapi.container_execute_stream(container_uuid, command)
+        pecan.response.content_type = 'application/x-json-stream'
+        pecan.response.app_iter = api_utils.relay_stream(rpcapi, stream,
+                                                         _format_exec_chunk)
+        return pecan.response
+
+
 class ContainersController(rest.RestController):
     """REST controller for Containers."""
 
@@ -260,7 +396,9 @@ class ContainersController(rest.RestController):
     pause = PauseController()
     unpause = UnpauseController()
     logs = LogsController()
+    stream_logs = StreamLogsController()
     execute = ExecuteController()
+    stream_execute = StreamExecuteController()
 
     from_containers = False
     """A flag to indicate if the requests to this controller are coming
@@ -268,6 +406,8 @@ class ContainersController(rest.RestController):
 
     _custom_actions = {
         'detail': ['GET'],
+        'run': ['POST'],
+        'action': ['POST'],
     }
 
     def _get_containers_collection(self, marker, limit,
@@ -285,8 +425,8 @@ class ContainersController(rest.RestController):
         containers = objects.Container.list(pecan.request.context, limit,
                                             marker_obj, sort_key=sort_key,
                                             sort_dir=sort_dir)
-        containers = [pecan.request.rpcapi.container_show(c.uuid)
-                      for c in containers]
+        if containers:
+            containers = pecan.request.rpcapi.container_show_many(containers)
 
         return ContainerCollection.convert_with_links(containers, limit,
                                                       url=resource_url,
@@ -345,12 +485,7 @@ class ContainersController(rest.RestController):
         res_container = pecan.request.rpcapi.container_show(rpc_container.uuid)
         return Container.convert_with_links(res_container)
 
-    @wsme_pecan.wsexpose(Container, body=Container, status_code=201)
-    def post(self, container):
-        """Create a new container.
-
-        :param container: a container within the request body.
-        """
+    def _create(self, container, start):
         if self.from_containers:
             raise exception.OperationNotPermitted
 
@@ -361,15 +496,77 @@ class ContainersController(rest.RestController):
         container_dict['user_id'] = auth_token['user']['id']
         new_container = objects.Container(context, **container_dict)
         new_container.create()
-        res_container = pecan.request.rpcapi.container_create(
-            new_container.name, new_container.uuid,
-            new_container)
+        if start:
+            create = pecan.request.rpcapi.container_run
+        else:
+            create = pecan.request.rpcapi.container_create
+        res_container = create(new_container.name, new_container.uuid,
+                               new_container)
 
         # Set the HTTP Location Header
         pecan.response.location = link.build_url('containers',
                                                  res_container.uuid)
         return Container.convert_with_links(res_container)
 
+    @wsme_pecan.wsexpose(Container, body=Container, status_code=201)
+    def post(self, container):
+        """Create a new container.
+
+        :param container: a container within the request body.
+        """
+        return self._create(container, start=False)
+
+    @wsme_pecan.wsexpose(Container, body=Container, status_code=201)
+    def run(self, container):
+        """Create a new container and start it.
+
+        :param container: a container within the request body.
+        """
+        return self._create(container, start=True)
+
+    @wsme_pecan.wsexpose(ContainerActionResultCollection,
+                         body=ContainerAction)
+    def action(self, container_action):
+        """Run an action on many containers.
+
+        :param container_action: the action and the containers to run it
+                                 on, within the request body.
+        """
+        if self.from_containers:
+            raise exception.OperationNotPermitted
+
+        idents = container_action.containers
+        rpc_containers = {}
+        results = {}
+        for container_ident in idents:
+            try:
+                rpc_containers[container_ident] = api_utils.get_rpc_resource(
+                    'Container', container_ident)
+            except exception.ContainerNotFound as e:
+                results[container_ident] = ContainerActionResult(
+                    container=container_ident, error=six.text_type(e))
+
+        if rpc_containers:
+            # A container given by both its name and its UUID is only
+            # acted on once.
+            by_uuid = dict((rpc_container.uuid, rpc_container)
+                           for rpc_container in rpc_containers.values())
+            rpc_results = pecan.request.rpcapi.container_action_many(
+                list(by_uuid), container_action.action)
+            results_by_uuid = {}
+            for result in rpc_results:
+                if (container_action.action == 'delete' and
+                        result['error'] is None):
+                    by_uuid[result['uuid']].destroy()
+                results_by_uuid[result['uuid']] = result
+            for container_ident, rpc_container in rpc_containers.items():
+                results[container_ident] = ContainerActionResult(
+                    container=container_ident,
+                    **results_by_uuid[rpc_container.uuid])
+
+        return ContainerActionResultCollection(
+            results=[results[container_ident] for container_ident in idents])
+
     @wsme.validate(types.uuid, [ContainerPatchType])
     @wsme_pecan.wsexpose(Container, types.uuid_or_name,
                          body=[ContainerPatchType])
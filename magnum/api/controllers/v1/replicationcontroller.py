@@ -192,9 +192,38 @@ class ReplicationControllerCollection(collection.Collection):
         return sample
 
 
+class ReplicationControllerScale(wtypes.Base):
+    """API representation of a request to scale a ReplicationController."""
+
+    replicas = wsme.wsattr(wtypes.IntegerType(minimum=0), mandatory=True)
+    """The number of replicas to scale the rc to"""
+
+
+class ScaleController(object):
+    @wsme_pecan.wsexpose(ReplicationController, types.uuid_or_name,
+                         body=ReplicationControllerScale)
+    def _default(self, rc_ident, scale):
+        """Set the number of replicas of a ReplicationController.
+
+        Only the replicas are changed; the manifest of the rc is neither
+        fetched nor parsed.
+
+        :param rc_ident: UUID or logical name of a ReplicationController.
+        :param scale: the number of replicas, within the request body.
+        """
+        if pecan.request.method != 'PUT':
+            pecan.abort(405, ('HTTP method %s is not allowed'
+                              % pecan.request.method))
+        rpc_rc = api_utils.get_rpc_resource('ReplicationController', rc_ident)
+        rc = pecan.request.rpcapi.rc_scale(rpc_rc.uuid, scale.replicas)
+        return ReplicationController.convert_with_links(rc)
+
+
 class ReplicationControllersController(rest.RestController):
     """REST controller for ReplicationControllers."""
 
+    scale = ScaleController()
+
     def __init__(self):
         super(ReplicationControllersController, self).__init__()
 
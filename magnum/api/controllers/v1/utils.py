@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 import jsonpatch
 from oslo_config import cfg
 import pecan
@@ -101,3 +103,33 @@ def get_openstack_resource(manager, resource_ident, resource_type):
             raise exception.Conflict(msg)
         resource_data = matches[0]
     return resource_data
+
+
+def relay_stream(rpcapi, stream, format_chunk):
+    """Yield the chunks of output of a conductor stream as they are read.
+
+    The relay ends once the stream has had no output for
+    stream_quiet_timeout seconds, since a client that went away is only
+    noticed when output is written to it.
+
+    :param format_chunk: callable returning the bytes of the response body
+                         for a chunk read from the conductor.
+    """
+    eof = False
+    quiet_timeout = CONF.api.stream_quiet_timeout
+    last_output = time.time()
+    try:
+        while not eof:
+            chunk = rpcapi.container_stream_read(stream)
+            eof = chunk['eof']
+            body = format_chunk(chunk)
+            if body:
+                last_output = time.time()
+                yield body
+            elif quiet_timeout and (time.time() - last_output >=
+                                    quiet_timeout):
+                break
+    finally:
+        # The client went away before the end of the stream.
+        if not eof:
+            rpcapi.container_stream_close(stream)
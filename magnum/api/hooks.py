@@ -92,12 +92,13 @@ class NoExceptionTracebackHook(hooks.PecanHook):
     # catches and handles all the errors, so 'on_error' dedicated for unhandled
     # exceptions never fired.
     def after(self, state):
-        # Omit empty body. Some errors may not have body at this level yet.
-        if not state.response.body:
+        # Do nothing if there is no error. This is checked first so the
+        # body of streamed responses is not read here.
+        if 200 <= state.response.status_int < 400:
             return
 
-        # Do nothing if there is no error.
-        if 200 <= state.response.status_int < 400:
+        # Omit empty body. Some errors may not have body at this level yet.
+        if not state.response.body:
             return
 
         json_body = state.response.json
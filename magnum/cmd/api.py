@@ -17,7 +17,6 @@
 import logging as std_logging
 import os
 import sys
-from wsgiref import simple_server
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -25,6 +24,7 @@ from oslo_log import log as logging
 from magnum.api import app as api_app
 from magnum.common import service
 from magnum.i18n import _LI
+from magnum.openstack.common import service as os_service
 
 
 LOG = logging.getLogger(__name__)
@@ -38,7 +38,7 @@ def main():
 
     # Create the WSGI server and start it
     host, port = cfg.CONF.api.host, cfg.CONF.api.port
-    srv = simple_server.make_server(host, port, app)
+    server = service.WSGIService('magnum_api', app, host, port)
 
     LOG.info(_LI('Starting server in PID %s') % os.getpid())
     LOG.debug("Configuration:")
@@ -52,4 +52,6 @@ def main():
         LOG.info(_LI('serving on http://%(host)s:%(port)s') %
                  dict(host=host, port=port))
 
-    srv.serve_forever()
+    LOG.info(_LI('Starting %d API workers'), server.workers)
+    launcher = os_service.launch(server, workers=server.workers)
+    launcher.wait()
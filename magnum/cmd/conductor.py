@@ -16,6 +16,7 @@
 
 import logging as std_logging
 import os
+import socket
 import sys
 
 from oslo_config import cfg
@@ -45,11 +46,25 @@ def main():
     cfg.CONF.import_opt('topic', 'magnum.conductor.config', group='conductor')
 
     conductor_id = short_id.generate_id()
+    limiter = service.ConcurrencyLimiter(
+        cfg.CONF.conductor.method_concurrency)
+    event_watcher = None
+    if cfg.CONF.docker.watch_events:
+        event_watcher = docker_conductor.ContainerEventWatcher()
+    resource_watcher = None
+    if cfg.CONF.kubernetes.watch_resources:
+        resource_watcher = k8s_conductor.K8sResourceWatcher()
+    resource_sync = None
+    if cfg.CONF.kubernetes.sync_interval > 0:
+        resource_sync = k8s_conductor.K8sResourceSync()
     endpoints = [
-        docker_conductor.Handler(),
-        k8s_conductor.Handler(),
-        bay_conductor.Handler(),
-        conductor_listener.Handler(),
+        docker_conductor.Handler(event_watcher, conductor_id),
+        k8s_conductor.Handler(resource_watcher, resource_sync),
+        conductor_listener.Handler(limiter),
+    ]
+    stack_poller = bay_conductor.StackPoller()
+    bay_endpoints = [
+        bay_conductor.Handler(stack_poller),
     ]
 
     if (not os.path.isfile(cfg.CONF.bay.k8s_atomic_template_path)
@@ -61,6 +76,28 @@ def main():
                   {'atomic_template': cfg.CONF.bay.k8s_atomic_template_path,
                    'coreos_template': cfg.CONF.bay.k8s_coreos_template_path})
 
-    server = service.Service(cfg.CONF.conductor.topic,
-                             conductor_id, endpoints)
-    server.serve()
+    # Long running bay operations get their own topic, and so their own
+    # executor pool, to keep them from starving the interactive calls.
+    servers = [
+        service.Service(cfg.CONF.conductor.topic,
+                        conductor_id, endpoints,
+                        executor=cfg.CONF.conductor.executor,
+                        limiter=limiter),
+        service.Service(cfg.CONF.conductor.bay_topic,
+                        conductor_id, bay_endpoints,
+                        executor=cfg.CONF.conductor.executor,
+                        limiter=limiter),
+    ]
+    if cfg.CONF.bay_heat.enable_notifications:
+        # Every conductor host gets its own copy of the Heat notifications
+        # and picks out those about the stacks it polls.
+        servers.append(service.NotificationListener(
+            cfg.CONF.bay_heat.notification_topics,
+            cfg.CONF.bay_heat.notification_exchange,
+            [bay_conductor.HeatNotificationEndpoint(stack_poller)],
+            pool='magnum-conductor-%s' % socket.gethostname(),
+            executor=cfg.CONF.conductor.executor))
+    for server in servers:
+        server.start()
+    for server in servers:
+        server.wait()
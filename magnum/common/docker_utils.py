@@ -31,3 +31,9 @@ def is_docker_library_version_atleast(version):
     if utils.compare_version(docker.version, version) <= 0:
         return True
     return False
+
+
+def is_docker_api_version_atleast(api_version, version):
+    if utils.compare_version(api_version, version) <= 0:
+        return True
+    return False
@@ -316,6 +316,11 @@ class InvalidParameterValue(Invalid):
     message = _("%(err)s")
 
 
+class PrewarmImagesNotSupported(Invalid):
+    message = _("Images can only be prewarmed on swarm bays, "
+                "bay %(bay)s is a %(coe)s bay.")
+
+
 class InstanceAssociated(Conflict):
     message = _("Instance %(instance_uuid)s is already associated with a node,"
                 " it cannot be associated with this other node %(node)s")
@@ -58,3 +58,87 @@ def parse(manifest_str):
                            'or YAML mapping.'))
     # TODO(yuanying): check manifest version
     return manifest
+
+
+def parse_all(manifest_str):
+    '''Takes a string and returns a list of the manifests it holds.
+
+    The string may be a YAML stream of several documents, and a manifest
+    of kind List stands for the manifests of its items.
+    '''
+    if not manifest_str:
+        msg = _("'manifest' can't be empty")
+        raise ValueError(msg)
+    documents = None
+    if manifest_str.startswith('{'):
+        try:
+            documents = [json.loads(manifest_str)]
+        except ValueError:
+            # It may be a YAML stream of several JSON documents.
+            pass
+    if documents is None:
+        try:
+            documents = [document for document
+                         in yaml.safe_load_all(manifest_str)
+                         if document is not None]
+        except yaml.YAMLError as yea:
+            yea = six.text_type(yea)
+            msg = _('Error parsing manifest: %s') % yea
+            raise ValueError(msg)
+
+    manifests = []
+    for document in documents:
+        if not isinstance(document, dict):
+            raise ValueError(_('The manifest is not a JSON object '
+                               'or YAML mapping.'))
+        if document.get('kind') != 'List':
+            manifests.append(document)
+            continue
+        items = document.get('items')
+        if (not isinstance(items, list) or
+                not all(isinstance(item, dict) for item in items)):
+            raise ValueError(_('The items of a manifest of kind List must '
+                               'be JSON objects or YAML mappings.'))
+        manifests.extend(items)
+    if not manifests:
+        msg = _("'manifest' can't be empty")
+        raise ValueError(msg)
+    return manifests
+
+
+def merge_patch(original, manifest):
+    '''Returns the JSON merge patch (RFC 7386) from one manifest to another.
+
+    The patch is empty when the manifests are the same, and None when it
+    can not express the change, which is when the new manifest holds null
+    values, as a merge patch deletes the fields it sets to null.
+    '''
+    patch = {}
+    for key, value in manifest.items():
+        if value is None:
+            return None
+        old_value = original.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            value = merge_patch(old_value, value)
+            if value is None:
+                return None
+            if value:
+                patch[key] = value
+        elif value != old_value or key not in original:
+            if _has_null(value):
+                return None
+            patch[key] = value
+    for key in original:
+        if key not in manifest:
+            patch[key] = None
+    return patch
+
+
+def _has_null(value):
+    if value is None:
+        return True
+    if isinstance(value, dict):
+        return any(_has_null(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_null(v) for v in value)
+    return False
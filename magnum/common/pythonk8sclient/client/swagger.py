@@ -19,7 +19,6 @@ server communication, and is invariant across implementations. Specifics of
 the methods and models for each application are generated from the Swagger
 templates."""
 
-import ast
 import sys
 import os
 import re
@@ -31,11 +30,25 @@ import datetime
 import mimetypes
 import random
 import string
+import StringIO
+import time
+
+import requests
 
 from magnum.common import utils
 from models import *
 
 
+NATIVE_TYPES = {'int': int, 'float': float, 'long': long, 'dict': dict,
+                'list': list, 'str': str, 'bool': bool}
+SCALAR_TYPES = frozenset(['str', 'int', 'long', 'float', 'bool'])
+
+# Deserialization plans, resolved from the type names and model classes
+# the first time each is deserialized.
+_typePlans = {}
+_modelPlans = {}
+
+
 class ApiClient(object):
   """Generic API client for Swagger client library builds
 
@@ -43,12 +56,20 @@ class ApiClient(object):
     host: The base path for the server to call
     headerName: a header to pass when making calls to the API
     headerValue: a header value to pass when making calls to the API
+    transport: the SessionTransport to send the calls through, a new one
+      by default
+    rawResponses: when True, responses are returned as decoded from JSON
+      instead of being deserialized into models, for callers that only
+      read a few fields of them
   """
-  def __init__(self, host=None, headerName=None, headerValue=None):
+  def __init__(self, host=None, headerName=None, headerValue=None,
+               transport=None, rawResponses=False):
     self.defaultHeaders = {}
     if (headerName is not None):
       self.defaultHeaders[headerName] = headerValue
     self.host = host
+    self.transport = transport or SessionTransport()
+    self.rawResponses = rawResponses
     self.cookie = None
     self.boundary = ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(30))
     # Set default User-Agent.
@@ -94,12 +115,19 @@ class ApiClient(object):
       #Options to add statements later on and for compatibility
       pass
 
-    elif method in ['POST', 'PUT', 'DELETE']:
+    elif method in ['POST', 'PUT', 'DELETE', 'PATCH']:
+      if method == 'PATCH':
+        # The patch calls list every type of patch the server accepts,
+        # patches are sent as JSON merge patches.
+        headers.pop('Content-Type', None)
+        headers['Content-type'] = 'application/merge-patch+json'
       if postData:
         postData = ApiClient.sanitizeForSerialization(postData)
         if 'Content-type' not in headers:
           headers['Content-type'] = 'application/json'
           data = json.dumps(postData)
+        elif headers['Content-type'] == 'application/merge-patch+json':
+          data = json.dumps(postData)
         elif headers['Content-type'] == 'multipart/form-data':
           data = self.buildMultipartFormData(postData, files)
           headers['Content-type'] = 'multipart/form-data; boundary={0}'.format(self.boundary)
@@ -112,19 +140,16 @@ class ApiClient(object):
 
     utils.raise_exception_invalid_scheme(url)
 
-    request = MethodRequest(method=method, url=url, headers=headers,
-                            data=data)
+    # Watch calls return a stream of events, one JSON document per line,
+    # which is read as it comes in.
+    if queryParams and str(queryParams.get('watch')).lower() == 'true':
+      return self.transport.stream(method, url, headers, data)
 
     # Make the request
-    response = urllib2.urlopen(request) #nosec
-    if 'Set-Cookie' in response.headers:
-      self.cookie = response.headers['Set-Cookie']
-    string = response.read()
-
-    try:
-      data = json.loads(string)
-    except ValueError:  # PUT requests don't return anything
-      data = None
+    responseHeaders, data = self.transport.request(method, url, headers,
+                                                   data)
+    if 'Set-Cookie' in responseHeaders:
+      self.cookie = responseHeaders['Set-Cookie']
 
     return data
 
@@ -213,54 +238,105 @@ class ApiClient(object):
         objClass -- class literal for deserialzied object, or string
             of class name
     Returns:
-        object -- deserialized object"""
+        object -- deserialized object, or obj itself if the client
+            returns raw responses"""
+
+    if self.rawResponses:
+      return obj
 
     # Have to accept objClass as string or actual type. Type could be a
     # native Python type, or one of the model classes.
     if type(objClass) == str:
-      if 'list[' in objClass:
-        match = re.match('list\[(.*)\]', objClass)
-        subClass = match.group(1)
-        return [self.deserialize(subObj, subClass) for subObj in obj]
-
-      if (objClass in ['int', 'float', 'long', 'dict', 'list', 'str', 'bool', 'datetime']):
-        objClass = ast.literal_eval(objClass)
-      else:  # not a native type, must be model class
-        objClass = ast.literal_eval(objClass + '.' + objClass)
-
-    if objClass in [int, long, float, dict, list, str, bool]:
-      return objClass(obj)
+      typePlan = ApiClient.getTypePlan(objClass)
     elif objClass == datetime:
+      typePlan = ('datetime', None)
+    elif objClass in NATIVE_TYPES.values():
+      typePlan = ('native', objClass)
+    else:
+      typePlan = ('model', objClass)
+    return self.deserializeType(obj, typePlan)
+
+  @staticmethod
+  def getTypePlan(typeName):
+    """Resolve a swagger type name into a (kind, target) tuple.
+
+    kind is 'list' with the plan of the element type as target, 'native'
+    or 'scalar' with a Python type as target, 'datetime', 'any' for values
+    kept as they are, or 'model' with a model class as target. Plans are
+    resolved once per type name.
+    """
+    typePlan = _typePlans.get(typeName)
+    if typePlan is None:
+      match = re.match('list\[(.*)\]', typeName)
+      if match:
+        typePlan = ('list', ApiClient.getTypePlan(match.group(1)))
+      elif typeName in ('datetime', 'any'):
+        typePlan = (typeName, None)
+      elif typeName in NATIVE_TYPES:
+        typePlan = ('native', NATIVE_TYPES[typeName])
+      else:
+        # not a native type, must be model class
+        module = globals().get(typeName)
+        objClass = getattr(module, typeName, None)
+        if objClass is None:
+          raise ValueError('Unknown model class %s' % typeName)
+        typePlan = ('model', objClass)
+      _typePlans[typeName] = typePlan
+    return typePlan
+
+  @staticmethod
+  def getModelPlan(objClass):
+    """Compile the deserialization plan of a model class.
+
+    The plan is a list of (attribute, JSON key, type plan) tuples, one for
+    each attribute of the model, compiled once per model class.
+    """
+    modelPlan = _modelPlans.get(objClass)
+    if modelPlan is None:
+      instance = objClass()
+      modelPlan = []
+      for attr, attrType in instance.swaggerTypes.iteritems():
+        if attrType in SCALAR_TYPES:
+          typePlan = ('scalar', NATIVE_TYPES[attrType])
+        else:
+          typePlan = ApiClient.getTypePlan(attrType)
+        modelPlan.append((attr, instance.attributeMap[attr], typePlan))
+      _modelPlans[objClass] = modelPlan
+    return modelPlan
+
+  def deserializeType(self, obj, typePlan):
+    kind, target = typePlan
+    if kind == 'list':
+      return [self.deserializeType(subObj, target) for subObj in obj]
+    elif kind in ('native', 'scalar'):
+      return target(obj)
+    elif kind == 'datetime':
       return self.__parse_string_to_datetime(obj)
+    elif kind == 'any':
+      return obj
 
-    instance = objClass()
-
-    for attr, attrType in instance.swaggerTypes.iteritems():
-        if obj is not None and instance.attributeMap[attr] in obj and type(obj) in [list, dict]:
-          value = obj[instance.attributeMap[attr]]
-          if attrType in ['str', 'int', 'long', 'float', 'bool']:
-            attrType = ast.literal_eval(attrType)
-            try:
-              value = attrType(value)
-            except UnicodeEncodeError:
-              value = unicode(value)
-            except TypeError:
-              value = value
-            setattr(instance, attr, value)
-          elif (attrType == 'datetime'):
-            setattr(instance, attr, self.__parse_string_to_datetime(value))
-          elif 'list[' in attrType:
-            match = re.match('list\[(.*)\]', attrType)
-            subClass = match.group(1)
-            subValues = []
-            if not value:
-              setattr(instance, attr, None)
-            else:
-              for subValue in value:
-                subValues.append(self.deserialize(subValue, subClass))
-            setattr(instance, attr, subValues)
-          else:
-            setattr(instance, attr, self.deserialize(value, attrType))
+    instance = target()
+    if obj is None or type(obj) not in [list, dict]:
+      return instance
+
+    for attr, key, attrPlan in ApiClient.getModelPlan(target):
+      if key not in obj:
+        continue
+      value = obj[key]
+      attrKind, attrTarget = attrPlan
+      if attrKind == 'scalar':
+        try:
+          value = attrTarget(value)
+        except UnicodeEncodeError:
+          value = unicode(value)
+        except TypeError:
+          pass
+      elif attrKind == 'list':
+        value = [self.deserializeType(subValue, attrTarget)
+                 for subValue in value or []]
+      else:
+        value = self.deserializeType(value, attrPlan)
+      setattr(instance, attr, value)
 
     return instance
 
@@ -276,16 +352,90 @@ class ApiClient(object):
     except ImportError:
         return string
 
-class MethodRequest(urllib2.Request):
-  def __init__(self, *args, **kwargs):
-    """Construct a MethodRequest. Usage is the same as for
-    `urllib2.Request` except it also takes an optional `method`
-    keyword argument. If supplied, `method` will be used instead of
-    the default."""
+class SessionTransport(object):
+  """Sends API calls through a requests.Session.
+
+  Connections are pooled by the session and kept alive between calls.
+  Responses are read whole and decoded from JSON, except for the streams
+  of events of watch calls, which are decoded line by line as they come
+  in. Calls with an idempotent method are retried, with exponential
+  backoff, when they fail to connect, time out or get a 502, 503 or 504
+  response.
+
+  Attributes:
+    session: the requests.Session to send calls through
+    timeout: timeout in seconds of each call, or a (connect, read) tuple
+    retries: number of times an idempotent call is retried
+    backoff: seconds to wait before the first retry, doubled on each
+      further retry
+  """
+
+  IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE'])
+  RETRY_STATUS_CODES = frozenset([502, 503, 504])
+
+  def __init__(self, session=None, timeout=None, retries=0, backoff=0.5):
+    self.session = session or requests.Session()
+    self.timeout = timeout
+    self.retries = retries
+    self.backoff = backoff
 
-    if 'method' in kwargs:
-      self.method = kwargs.pop('method')
-    return urllib2.Request.__init__(self, *args, **kwargs)
+  def close(self):
+    self.session.close()
 
-  def get_method(self):
-    return getattr(self, 'method', urllib2.Request.get_method(self))
+  def request(self, method, url, headers, data):
+    """Make a call and return the response headers and decoded body.
+
+    Error responses are raised as urllib2.HTTPError, the same as for calls
+    made with urllib2.
+    """
+    response = self._send(method, url, headers, data)
+    try:
+      data = json.load(response.raw)
+    except ValueError:  # PUT requests don't return anything
+      data = None
+    return response.headers, data
+
+  def stream(self, method, url, headers, data):
+    """Make a call and return a generator of the documents it streams.
+
+    The call is made before the generator is returned, so error responses
+    are raised as urllib2.HTTPError right away. The response is closed
+    once the generator is read to the end or closed.
+    """
+    response = self._send(method, url, headers, data)
+
+    def documents():
+      try:
+        for line in response.iter_lines():
+          if line:
+            yield json.loads(line)
+      finally:
+        response.close()
+    return documents()
+
+  def _send(self, method, url, headers, data):
+    retries = self.retries if method in self.IDEMPOTENT_METHODS else 0
+    attempt = 0
+    while True:
+      try:
+        response = self.session.request(method, url, headers=headers,
+                                        data=data, timeout=self.timeout,
+                                        stream=True)
+      except (requests.ConnectionError, requests.Timeout):
+        if attempt >= retries:
+          raise
+      else:
+        if (response.status_code not in self.RETRY_STATUS_CODES or
+            attempt >= retries):
+          break
+        # Read the response out so its connection goes back to the pool.
+        response.raw.read()
+      time.sleep(self.backoff * (2 ** attempt))
+      attempt += 1
+
+    response.raw.decode_content = True
+    if response.status_code >= 400:
+      raise urllib2.HTTPError(url, response.status_code, response.reason,
+                              response.headers,
+                              StringIO.StringIO(response.raw.read()))
+    return response
@@ -14,7 +14,10 @@
 
 """Common RPC service and API tools for Magnum."""
 
+import functools
+
 import eventlet
+from eventlet import semaphore
 from oslo_config import cfg
 import oslo_messaging as messaging
 
@@ -39,23 +42,117 @@ TRANSPORT_ALIASES = {
 }
 
 
+class ConcurrencyLimiter(object):
+    """Caps the number of concurrent calls of RPC methods.
+
+    Calls of a method with a limit in method_limits wait for a free slot
+    before being dispatched to the handler. The limiter also keeps count
+    of the calls being handled and of the calls waiting for a slot.
+    """
+
+    def __init__(self, method_limits=None):
+        self._semaphores = {}
+        for method, limit in (method_limits or {}).items():
+            self._semaphores[method] = semaphore.Semaphore(int(limit))
+        self.in_flight = 0
+        self.queued = 0
+
+    def wrap(self, handler):
+        return _LimitedHandler(handler, self)
+
+    def call(self, method, func, *args, **kwargs):
+        sem = self._semaphores.get(method)
+        if sem is not None:
+            self.queued += 1
+            try:
+                sem.acquire()
+            finally:
+                self.queued -= 1
+        self.in_flight += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+            if sem is not None:
+                sem.release()
+
+    def stats(self):
+        return {'in_flight': self.in_flight, 'queued': self.queued}
+
+
+class _LimitedHandler(object):
+    """Proxies an RPC handler, dispatching its methods via a limiter."""
+
+    def __init__(self, handler, limiter):
+        self._handler = handler
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._handler, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def limited(*args, **kwargs):
+            return self._limiter.call(name, attr, *args, **kwargs)
+        return limited
+
+
 class Service(object):
     _server = None
 
-    def __init__(self, topic, server, handlers):
+    def __init__(self, topic, server, handlers, executor='blocking',
+                 limiter=None):
         serializer = rpc.RequestContextSerializer(
             objects_base.MagnumObjectSerializer())
         transport = messaging.get_transport(cfg.CONF,
                                             aliases=TRANSPORT_ALIASES)
+        if limiter is not None:
+            handlers = [limiter.wrap(handler) for handler in handlers]
+        self.limiter = limiter
         # TODO(asalkeld) add support for version='x.y'
         target = messaging.Target(topic=topic, server=server)
         self._server = messaging.get_rpc_server(transport, target, handlers,
+                                                executor=executor,
                                                 serializer=serializer)
 
-    def serve(self):
+    def start(self):
         self._server.start()
+
+    def wait(self):
         self._server.wait()
 
+    def serve(self):
+        self.start()
+        self.wait()
+
+
+class NotificationListener(object):
+    """Dispatches notifications sent on topics of an exchange to handlers.
+
+    Listeners sharing a pool share the notifications between them, while
+    each pool gets its own copy of every notification.
+    """
+
+    def __init__(self, topics, exchange, handlers, pool=None,
+                 executor='blocking', transport=None):
+        if transport is None:
+            transport = messaging.get_transport(cfg.CONF,
+                                                aliases=TRANSPORT_ALIASES)
+        targets = [messaging.Target(topic=topic, exchange=exchange)
+                   for topic in topics]
+        self._listener = messaging.get_notification_listener(
+            transport, targets, handlers, executor=executor, pool=pool)
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+    def wait(self):
+        self._listener.wait()
+
 
 class API(object):
     def __init__(self, transport=None, context=None, topic=None, server=None,
@@ -78,8 +175,20 @@ class API(object):
     def _call(self, method, *args, **kwargs):
         return self._client.call(self._context, method, *args, **kwargs)
 
+    def _call_topic(self, topic, method, *args, **kwargs):
+        client = self._client.prepare(topic=topic)
+        return client.call(self._context, method, *args, **kwargs)
+
+    def _call_server(self, server, method, *args, **kwargs):
+        client = self._client.prepare(server=server)
+        return client.call(self._context, method, *args, **kwargs)
+
     def _cast(self, method, *args, **kwargs):
         self._client.cast(self._context, method, *args, **kwargs)
 
+    def _cast_server(self, server, method, *args, **kwargs):
+        client = self._client.prepare(server=server)
+        client.cast(self._context, method, *args, **kwargs)
+
     def echo(self, message):
         self._cast('echo', message=message)
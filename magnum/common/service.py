@@ -12,10 +12,74 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import eventlet
+from eventlet import wsgi
+import greenlet
+from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_log import loggers
+
+from magnum.i18n import _LI
+from magnum.openstack.common import service
+
+
+CONF = cfg.CONF
+CONF.import_group('api', 'magnum.api.app')
+
+LOG = logging.getLogger(__name__)
 
 
 def prepare_service(argv=[]):
     cfg.CONF(argv[1:], project='magnum')
     logging.setup(cfg.CONF, 'magnum')
+
+
+class WSGIService(service.Service):
+    """Serves a WSGI application from a pool of green threads.
+
+    The listening socket is bound on construction so that it is shared by
+    every worker process forked by the ProcessLauncher. Each worker then
+    accepts connections on it and serves them, with HTTP/1.1 keep-alive,
+    from its own green thread pool.
+    """
+
+    def __init__(self, name, app, host, port):
+        super(WSGIService, self).__init__()
+        self.name = name
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = CONF.api.workers or processutils.get_worker_count()
+        self._logger = logging.getLogger('%s.wsgi.server' % name)
+        self._pool = eventlet.GreenPool(CONF.api.wsgi_pool_size)
+        self._socket = eventlet.listen((host, port),
+                                       backlog=CONF.api.backlog)
+        self._server = None
+
+    def start(self):
+        self._server = eventlet.spawn(
+            wsgi.server, self._socket, self.app,
+            custom_pool=self._pool,
+            log=loggers.WritableLogger(self._logger),
+            keepalive=CONF.api.wsgi_keep_alive,
+            socket_timeout=CONF.api.client_socket_timeout or None)
+
+    def stop(self):
+        """Stop accepting connections.
+
+        Requests already being served are left to finish in wait().
+        """
+        LOG.info(_LI('Stopping WSGI server %s'), self.name)
+        if self._server is not None:
+            self._pool.resize(0)
+            self._server.kill()
+
+    def wait(self):
+        """Block until all in-flight requests have been served."""
+        try:
+            if self._server is not None:
+                self._pool.waitall()
+                self._server.wait()
+        except greenlet.GreenletExit:
+            LOG.info(_LI('WSGI server %s has stopped'), self.name)
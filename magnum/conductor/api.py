@@ -29,6 +29,12 @@ class API(rpc_service.API):
         super(API, self).__init__(transport, context,
                                   topic=cfg.CONF.conductor.topic)
 
+    def _call_bay(self, method, *args, **kwargs):
+        # Bay operations poll Heat for minutes, so they go to their own
+        # topic and do not queue up in front of container and k8s calls.
+        return self._call_topic(cfg.CONF.conductor.bay_topic, method,
+                                *args, **kwargs)
+
     # Bay Model Operations
 
     def baymodel_create(self, context, baymodel):
@@ -48,20 +54,20 @@ class API(rpc_service.API):
     # Bay Operations
 
     def bay_create(self, bay, bay_create_timeout):
-        return self._call('bay_create', bay=bay,
-                          bay_create_timeout=bay_create_timeout)
+        return self._call_bay('bay_create', bay=bay,
+                              bay_create_timeout=bay_create_timeout)
 
     def bay_list(self, context, limit, marker, sort_key, sort_dir):
         return objects.Bay.list(context, limit, marker, sort_key, sort_dir)
 
     def bay_delete(self, uuid):
-        return self._call('bay_delete', uuid=uuid)
+        return self._call_bay('bay_delete', uuid=uuid)
 
     def bay_show(self, context, uuid):
         return objects.Bay.get_by_uuid(context, uuid)
 
     def bay_update(self, bay):
-        return self._call('bay_update', bay=bay)
+        return self._call_bay('bay_update', bay=bay)
 
     # Service Operations
 
@@ -105,6 +111,9 @@ class API(rpc_service.API):
     def rc_update(self, rc):
         return self._call('rc_update', rc=rc)
 
+    def rc_scale(self, uuid, replicas):
+        return self._call('rc_scale', uuid=uuid, replicas=replicas)
+
     def rc_list(self, context, limit, marker, sort_key, sort_dir):
         return objects.ReplicationController.list(context, limit, marker,
                                                   sort_key, sort_dir)
@@ -115,6 +124,14 @@ class API(rpc_service.API):
     def rc_show(self, context, uuid):
         return objects.ReplicationController.get_by_uuid(context, uuid)
 
+    def bay_apply_manifest(self, bay_uuid, services, pods, rcs):
+        return self._call('bay_apply_manifest', bay_uuid=bay_uuid,
+                          services=services, pods=pods, rcs=rcs)
+
+    def bay_prewarm_images(self, bay_uuid, images):
+        return self._call('bay_prewarm_images', bay_uuid=bay_uuid,
+                          images=images)
+
     # Container operations
 
     def container_create(self, name, container_uuid, container):
@@ -122,6 +139,11 @@ class API(rpc_service.API):
                           container_uuid=container_uuid,
                           container=container)
 
+    def container_run(self, name, container_uuid, container):
+        return self._call('container_run', name=name,
+                          container_uuid=container_uuid,
+                          container=container)
+
     def container_list(self, context, limit, marker, sort_key, sort_dir):
         return objects.Container.list(context, limit, marker, sort_key,
                                       sort_dir)
@@ -132,6 +154,9 @@ class API(rpc_service.API):
     def container_show(self, container_uuid):
         return self._call('container_show', container_uuid=container_uuid)
 
+    def container_show_many(self, containers):
+        return self._call('container_show_many', containers=containers)
+
     def container_reboot(self, container_uuid):
         return self._call('container_reboot', container_uuid=container_uuid)
 
@@ -147,9 +172,31 @@ class API(rpc_service.API):
     def container_unpause(self, container_uuid):
         return self._call('container_unpause', container_uuid=container_uuid)
 
+    def container_action_many(self, container_uuids, action):
+        return self._call('container_action_many',
+                          container_uuids=container_uuids, action=action)
+
     def container_logs(self, container_uuid):
         return self._call('container_logs', container_uuid=container_uuid)
 
+    def container_logs_stream(self, container_uuid, tail, since, follow):
+        return self._call('container_logs_stream',
+                          container_uuid=container_uuid, tail=tail,
+                          since=since, follow=follow)
+
+    def container_execute_stream(self, container_uuid, command):
+        return self._call('container_execute_stream',
+                          container_uuid=container_uuid, command=command)
+
+    def container_stream_read(self, stream):
+        return self._call_server(stream['conductor'],
+                                 'container_stream_read',
+                                 stream_id=stream['stream_id'])
+
+    def container_stream_close(self, stream):
+        self._cast_server(stream['conductor'], 'container_stream_close',
+                          stream_id=stream['stream_id'])
+
     def container_execute(self, container_uuid, command):
         return self._call('container_execute', container_uuid=container_uuid,
                           command=command)
@@ -162,3 +209,6 @@ class ListenerAPI(rpc_service.API):
 
     def ping_conductor(self):
         return self._call('ping_conductor')
+
+    def conductor_stats(self):
+        return self._call('conductor_stats')
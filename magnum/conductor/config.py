@@ -21,10 +21,28 @@ SERVICE_OPTS = [
     cfg.StrOpt('topic',
                default='magnum-conductor',
                help='The queue to add conductor tasks to'),
+    cfg.StrOpt('bay_topic',
+               default='magnum-conductor-bay',
+               help=('The queue to add long running bay tasks to. They are '
+                     'handled by their own pool of workers so they do not '
+                     'hold up the container and Kubernetes tasks sent to '
+                     'the conductor topic.')),
     cfg.IntOpt('conductor_life_check_timeout',
                default=4,
                help=('RPC timeout for the conductor liveness check that is '
                      'used for bay locking.')),
+    cfg.StrOpt('executor',
+               default='eventlet',
+               help=('The oslo.messaging executor used to dispatch RPC '
+                     'calls. "eventlet" handles calls concurrently from a '
+                     'green thread pool sized by rpc_thread_pool_size, '
+                     '"blocking" handles one call at a time.')),
+    cfg.DictOpt('method_concurrency',
+                default={},
+                help=('Maximum number of concurrent calls of individual RPC '
+                      'methods, e.g. "bay_create:4,bay_delete:4". Calls over '
+                      'the limit wait for a free slot. Methods that are not '
+                      'listed are only bounded by the executor pool.')),
 ]
 
 opt_group = cfg.OptGroup(
@@ -12,7 +12,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from heatclient.common import template_utils
+import random
+import time
+
 from heatclient import exc
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -34,18 +36,68 @@ bay_heat_opts = [
                default=2000,
                help=('Number of attempts to query the Heat stack for '
                      'finding out the status of the created stack and '
-                     'getting template outputs.  This value is ignored '
+                     'getting template outputs.  As the interval between '
+                     'attempts grows, the stack is polled for at most '
+                     'max_attempts * wait_interval seconds rather than a '
+                     'number of attempts.  This value is ignored '
                      'during bay creation if timeout is set as the poll '
                      'will continue until bay creation either ends '
                      'or times out.')),
     cfg.IntOpt('wait_interval',
                default=1,
                help=('Sleep time interval between two attempts of querying '
-                     'the Heat stack.  This interval is in seconds.')),
+                     'the Heat stack.  This interval is in seconds.  It is '
+                     'the initial interval, which grows between attempts '
+                     'that see no change of the stack status.')),
+    cfg.FloatOpt('wait_interval_backoff',
+                 default=1.5,
+                 help=('Factor by which the interval between two attempts '
+                       'of querying the Heat stack grows while the stack '
+                       'status does not change.')),
+    cfg.FloatOpt('wait_interval_jitter',
+                 default=0.1,
+                 help=('Fraction of the interval between two attempts of '
+                       'querying the Heat stack by which it is randomly '
+                       'shortened or lengthened, so that stacks polled '
+                       'together spread out over time.')),
+    cfg.IntOpt('create_max_wait_interval',
+               default=20,
+               help=('Maximum interval in seconds between two attempts of '
+                     'querying the Heat stack of a bay being created.')),
+    cfg.IntOpt('update_max_wait_interval',
+               default=20,
+               help=('Maximum interval in seconds between two attempts of '
+                     'querying the Heat stack of a bay being updated.')),
+    cfg.IntOpt('delete_max_wait_interval',
+               default=10,
+               help=('Maximum interval in seconds between two attempts of '
+                     'querying the Heat stack of a bay being deleted.')),
     cfg.IntOpt('bay_create_timeout',
                default=None,
                help=('The length of time to let bay creation continue.  This '
-                     'interval is in minutes.  The default is no timeout.'))
+                     'interval is in minutes.  The default is no timeout.')),
+    cfg.BoolOpt('enable_notifications',
+                default=False,
+                help=('Update bays from the orchestration.stack '
+                      'notifications Heat sends to the message bus, polling '
+                      'Heat only every notification_max_wait_interval as a '
+                      'fallback.  Heat must be configured to send '
+                      'notifications.')),
+    cfg.ListOpt('notification_topics',
+                default=['notifications'],
+                help='Topics on which Heat sends notifications.'),
+    cfg.StrOpt('notification_exchange',
+               default='heat',
+               help='Exchange on which Heat sends notifications.'),
+    cfg.IntOpt('notification_max_wait_interval',
+               default=120,
+               help=('Maximum interval in seconds between two attempts of '
+                     'querying the Heat stack of a bay when its status is '
+                     'updated from notifications.')),
+    cfg.IntOpt('poll_batch_size',
+               default=50,
+               help=('Maximum number of stacks whose status is refreshed '
+                     'with a single Heat stack-list request.'))
 ]
 
 cfg.CONF.register_opts(bay_heat_opts, group='bay_heat')
@@ -53,6 +105,10 @@ cfg.CONF.register_opts(bay_heat_opts, group='bay_heat')
 
 LOG = logging.getLogger(__name__)
 
+# NOTE: Declared to avoid mocking collisions with time.time() called in the
+# standard logging module during unittests.
+_ts = lambda: time.time()
+
 
 def _get_baymodel(context, bay):
     baymodel = objects.BayModel.get_by_uuid(context, bay.baymodel_id)
@@ -71,7 +127,7 @@ def _extract_template_definition(context, bay):
 def _create_stack(context, osc, bay, bay_create_timeout):
     template_path, heat_params = _extract_template_definition(context, bay)
 
-    tpl_files, template = template_utils.get_template_contents(template_path)
+    tpl_files, template = TDef.get_template_contents(template_path)
     # Make sure no duplicate stack name
     stack_name = '%s-%s' % (bay.name, short_id.generate_id())
     if bay_create_timeout:
@@ -97,7 +153,7 @@ def _create_stack(context, osc, bay, bay_create_timeout):
 def _update_stack(context, osc, bay):
     template_path, heat_params = _extract_template_definition(context, bay)
 
-    tpl_files, template = template_utils.get_template_contents(template_path)
+    tpl_files, template = TDef.get_template_contents(template_path)
     fields = {
         'parameters': heat_params,
         'template': template,
@@ -117,8 +173,11 @@ def _update_stack_outputs(context, stack, bay):
 
 
 class Handler(object):
-    def __init__(self):
+    def __init__(self, stack_poller=None):
         super(Handler, self).__init__()
+        if stack_poller is None:
+            stack_poller = StackPoller()
+        self._stack_poller = stack_poller
 
     # Bay Operations
 
@@ -138,7 +197,7 @@ class Handler(object):
         bay.stack_id = created_stack['stack']['id']
         bay.create()
 
-        self._poll_and_check(osc, bay)
+        self._poll_and_check(osc, bay, 'create')
 
         return bay
 
@@ -158,7 +217,7 @@ class Handler(object):
             delta.remove('node_count')
 
             _update_stack(context, osc, bay)
-            self._poll_and_check(osc, bay)
+            self._poll_and_check(osc, bay, 'update')
 
         if delta:
             raise exception.InvalidParameterValue(err=(
@@ -190,29 +249,255 @@ class Handler(object):
             else:
                 raise
 
-        self._poll_and_check(osc, bay)
+        self._poll_and_check(osc, bay, 'delete')
 
         return None
 
-    def _poll_and_check(self, osc, bay):
-        poller = HeatPoller(osc, bay)
-        lc = loopingcall.FixedIntervalLoopingCall(f=poller.poll_and_check)
-        lc.start(cfg.CONF.bay_heat.wait_interval, True)
+    def _poll_and_check(self, osc, bay, operation):
+        poller = HeatPoller(osc, bay, PollSchedule.for_operation(operation))
+        self._stack_poller.add(poller)
+
+
+class PollSchedule(object):
+    """Exponential backoff schedule for polling a stack.
+
+    Intervals start at interval and grow by backoff on every poll up to
+    max_interval, each one randomly shortened or lengthened by up to
+    jitter of itself. reset() starts over from the initial interval.
+    """
+
+    def __init__(self, interval, max_interval, backoff=1.0, jitter=0.0):
+        self.initial_interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = interval
+
+    @classmethod
+    def for_operation(cls, operation):
+        """Return the configured schedule for a bay operation.
+
+        :param operation: one of 'create', 'update' or 'delete'.
+        """
+        conf = cfg.CONF.bay_heat
+        if conf.enable_notifications:
+            max_interval = conf.notification_max_wait_interval
+        else:
+            max_interval = getattr(conf, '%s_max_wait_interval' % operation)
+        return cls(conf.wait_interval,
+                   max(max_interval, conf.wait_interval),
+                   backoff=conf.wait_interval_backoff,
+                   jitter=conf.wait_interval_jitter)
+
+    def reset(self):
+        self.interval = self.initial_interval
+
+    def next_interval(self):
+        interval = self.interval
+        self.interval = min(self.interval * self.backoff, self.max_interval)
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return interval
+
+
+class StackPoller(object):
+    """Polls the stacks of all the bays being changed by the conductor.
+
+    A dynamic looping call wakes up at least every wait_interval and polls
+    the HeatPollers that are due according to their schedule. Their stacks
+    are refreshed with stacks.list requests filtered by stack id, one per
+    project and poll_batch_size stacks, and the results are handed to
+    their pollers. The number of Heat requests thus grows with the number
+    of poll ticks rather than with the number of bays being polled.
+    """
+
+    def __init__(self):
+        self._pollers = {}
+        self._timer = None
+
+    def add(self, poller):
+        self._pollers[poller.bay.stack_id] = poller
+        if self._timer is None:
+            self._timer = loopingcall.DynamicLoopingCall(f=self.poll)
+            self._timer.start(
+                initial_delay=cfg.CONF.bay_heat.wait_interval,
+                periodic_interval_max=cfg.CONF.bay_heat.wait_interval)
+
+    def poll(self):
+        # An error escaping the looping call would stop it for good, while
+        # _timer is still set, so add() would never start it again.
+        try:
+            return self._poll()
+        except loopingcall.LoopingCallDone:
+            raise
+        except Exception:
+            LOG.exception(_LE('Error while polling stacks'))
+            return cfg.CONF.bay_heat.wait_interval
+
+    def _poll(self):
+        projects = {}
+        now = _ts()
+        for poller in list(self._pollers.values()):
+            if poller.next_poll > now:
+                continue
+            if poller.attempts == 0:
+                # The first check fetches the whole stack, which also tells
+                # the poller the stack timeout.
+                self._check(poller)
+            else:
+                projects.setdefault(poller.context.project_id,
+                                    []).append(poller)
+
+        batch_size = cfg.CONF.bay_heat.poll_batch_size
+        for pollers in projects.values():
+            for i in range(0, len(pollers), batch_size):
+                self._poll_batch(pollers[i:i + batch_size])
+
+        if not self._pollers:
+            self._timer = None
+            raise loopingcall.LoopingCallDone()
+
+        next_poll = min(poller.next_poll for poller in self._pollers.values())
+        return max(next_poll - _ts(), 0)
+
+    def update(self, stack):
+        """Check the poller of a stack with its notified status.
+
+        :param stack: the stack as reported by a Heat notification.
+        :returns: whether the stack is polled by this StackPoller.
+        """
+        poller = self._pollers.get(stack.id)
+        if poller is None:
+            return False
+        if poller.attempts == 0:
+            self._check(poller)
+        else:
+            self._check(poller, stack)
+        return True
+
+    def _poll_batch(self, pollers):
+        stack_ids = [poller.bay.stack_id for poller in pollers]
+        try:
+            heat = pollers[0].openstack_client.heat()
+            stacks = dict((stack.id, stack) for stack in
+                          heat.stacks.list(filters={'id': stack_ids},
+                                           show_deleted=True))
+        except Exception:
+            LOG.exception(_LE('Failed to list stacks %s'), stack_ids)
+            return
+
+        for poller in pollers:
+            # A stack missing from the list is looked up on its own, so
+            # the poller sees the error Heat returns for it.
+            self._check(poller, stacks.get(poller.bay.stack_id))
+
+    def _check(self, poller, stack=None):
+        # A notification may have finished the poller, or a new one may
+        # have replaced it, while its stack was being listed.
+        if self._pollers.get(poller.bay.stack_id) is not poller:
+            return
+        try:
+            poller.poll_and_check(stack)
+            poller.next_poll = _ts() + poller.schedule.next_interval()
+        except loopingcall.LoopingCallDone:
+            self._remove(poller)
+        except Exception:
+            LOG.exception(_LE('Error while polling stack %s'),
+                          poller.bay.stack_id)
+            self._remove(poller)
+
+    def _remove(self, poller):
+        if self._pollers.get(poller.bay.stack_id) is poller:
+            del self._pollers[poller.bay.stack_id]
+
+
+class NotifiedStack(object):
+    """The status of a stack as reported by a Heat notification."""
+
+    def __init__(self, payload):
+        # stack_identity is an ARN ending with stacks/<name>/<id>
+        self.id = payload['stack_identity'].rsplit('/', 1)[-1]
+        self.stack_status = payload['state']
+        self.stack_status_reason = payload.get('state_reason')
+
+
+class HeatNotificationEndpoint(object):
+    """Receives orchestration.stack notifications sent by Heat.
+
+    Notifications about stacks polled by the conductor's StackPoller are
+    handed to their HeatPoller, which updates the bay right away instead
+    of when the stack is next polled.
+    """
+
+    def __init__(self, stack_poller):
+        self.stack_poller = stack_poller
+
+    def _process(self, event_type, payload):
+        if not event_type.startswith('orchestration.stack.'):
+            return
+        try:
+            stack = NotifiedStack(payload)
+        except (KeyError, AttributeError):
+            LOG.debug('Ignoring %(event_type)s notification with payload '
+                      '%(payload)s', {'event_type': event_type,
+                                      'payload': payload})
+            return
+        if self.stack_poller.update(stack):
+            LOG.debug('Stack %(stack_id)s is %(status)s',
+                      {'stack_id': stack.id, 'status': stack.stack_status})
+
+    def info(self, ctxt, publisher_id, event_type, payload, metadata):
+        self._process(event_type, payload)
+
+    def error(self, ctxt, publisher_id, event_type, payload, metadata):
+        self._process(event_type, payload)
 
 
 class HeatPoller(object):
 
-    def __init__(self, openstack_client, bay):
+    def __init__(self, openstack_client, bay, schedule=None):
         self.openstack_client = openstack_client
         self.context = self.openstack_client.context
         self.bay = bay
         self.attempts = 0
-
-    def poll_and_check(self):
+        self.started_at = time.time()
+        self.timeout_mins = None
+        if schedule is None:
+            schedule = PollSchedule(cfg.CONF.bay_heat.wait_interval,
+                                    cfg.CONF.bay_heat.wait_interval)
+        self.schedule = schedule
+        self.next_poll = 0
+        self.last_status = None
+
+    def _get_stack(self):
+        stack = self.openstack_client.heat().stacks.get(self.bay.stack_id)
+        self.timeout_mins = stack.timeout_mins
+        return stack
+
+    def _max_wait_passed(self):
+        # The limit was a number of polls at a fixed wait_interval; it is
+        # kept as the same length of time now that the intervals grow.
+        max_wait = (cfg.CONF.bay_heat.max_attempts *
+                    cfg.CONF.bay_heat.wait_interval)
+        return time.time() - self.started_at >= max_wait
+
+    def poll_and_check(self, stack=None):
+        """Update the bay from the status of its stack.
+
+        :param stack: the stack as returned by stacks.list. When it isn't
+                      given, or its outputs are needed, the stack is
+                      fetched from Heat.
+        """
         # TODO(yuanying): temporary implementation to update api_address,
         # node_addresses and bay status
-        stack = self.openstack_client.heat().stacks.get(self.bay.stack_id)
+        fetched = stack is None
+        if fetched:
+            stack = self._get_stack()
         self.attempts += 1
+        if stack.stack_status != self.last_status:
+            # Poll quickly again around status transitions.
+            self.last_status = stack.stack_status
+            self.schedule.reset()
         # poll_and_check is detached and polling long time to check status,
         # so another user/client can call delete bay/stack.
         if stack.stack_status == bay_status.DELETE_COMPLETE:
@@ -222,6 +507,9 @@ class HeatPoller(object):
             raise loopingcall.LoopingCallDone()
         if (stack.stack_status in [bay_status.CREATE_COMPLETE,
                                    bay_status.UPDATE_COMPLETE]):
+            if not fetched:
+                # Listed stacks do not include outputs.
+                stack = self._get_stack()
             _update_stack_outputs(self.context, stack, self.bay)
 
             self.bay.status = stack.stack_status
@@ -254,19 +542,18 @@ class HeatPoller(object):
         # the timeout hasn't been set. If the timeout has been set then
         # the loop will end when the stack completes or the timeout occurs
         if stack.stack_status == bay_status.CREATE_IN_PROGRESS:
-            if (stack.timeout_mins is None and
-               self.attempts > cfg.CONF.bay_heat.max_attempts):
+            if self.timeout_mins is None and self._max_wait_passed():
                 LOG.error(_LE('Bay check exit after %(attempts)s attempts,'
                               'stack_id: %(id)s, stack_status: %(status)s') %
-                          {'attempts': cfg.CONF.bay_heat.max_attempts,
+                          {'attempts': self.attempts,
                            'id': self.bay.stack_id,
                            'status': stack.stack_status})
                 raise loopingcall.LoopingCallDone()
         else:
-            if self.attempts > cfg.CONF.bay_heat.max_attempts:
+            if self._max_wait_passed():
                 LOG.error(_LE('Bay check exit after %(attempts)s attempts,'
                               'stack_id: %(id)s, stack_status: %(status)s') %
-                          {'attempts': cfg.CONF.bay_heat.max_attempts,
+                          {'attempts': self.attempts,
                            'id': self.bay.stack_id,
                            'status': stack.stack_status})
                 raise loopingcall.LoopingCallDone()
@@ -78,3 +78,42 @@ class DockerHTTPClient(client.Client):
 
     def get_container_logs(self, docker_id):
         return self.attach(docker_id, 1, 1, 0, 1)
+
+    def logs_stream(self, container, tail='all', since=None, follow=False):
+        """Return a generator of the frames of the logs of a container.
+
+        :param tail: number of lines to return from the end of the logs,
+                     or 'all'.
+        :param since: only return the lines logged since this UNIX
+                      timestamp. Supported from Docker API version 1.19.
+        :param follow: keep returning lines as they are logged.
+        """
+        if isinstance(container, dict):
+            container = container.get('Id')
+        params = {'stdout': 1,
+                  'stderr': 1,
+                  'follow': follow and 1 or 0,
+                  'tail': tail}
+        if since is not None:
+            params['since'] = since
+        url = self._url('/containers/{0}/logs'.format(container))
+        res = self._get(url, params=params, stream=True)
+        self._raise_for_status(res)
+        return self._stream_frames(res)
+
+    def exec_start_stream(self, exec_id):
+        """Start an exec and return a generator of its output frames."""
+        if isinstance(exec_id, dict):
+            exec_id = exec_id.get('Id')
+        url = self._url('/exec/{0}/start'.format(exec_id))
+        res = self._post_json(url, data={'Tty': False, 'Detach': False},
+                              stream=True)
+        self._raise_for_status(res)
+        return self._stream_frames(res)
+
+    def _stream_frames(self, response):
+        try:
+            for frame in self._multiplexed_response_stream_helper(response):
+                yield frame
+        finally:
+            response.close()
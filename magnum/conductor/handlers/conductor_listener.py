@@ -15,8 +15,20 @@ class Handler(object):
     '''Listen on an AMQP queue named for the conductor.  Allows individual
     conductors to communicate with each other for multi-conductor support.
     '''
+    def __init__(self, limiter=None):
+        super(Handler, self).__init__()
+        self._limiter = limiter
+
     def ping_conductor(self, context):
         '''Respond affirmatively to confirm that the conductor performing the
         action is still alive.
         '''
         return True
+
+    def conductor_stats(self, context):
+        '''Report the number of RPC calls being handled by the conductor and
+        the number of calls waiting for a free slot.
+        '''
+        if self._limiter is None:
+            return {}
+        return self._limiter.stats()
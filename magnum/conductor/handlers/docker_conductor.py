@@ -12,16 +12,25 @@
 
 """Magnum Docker RPC handler."""
 
-from docker import errors
+import codecs
+import collections
 import functools
+import json
+import time
+
+from docker import errors
+import eventlet
+from eventlet import queue
 from oslo_config import cfg
 from oslo_log import log as logging
+import six
 
 from magnum.common import docker_utils
 from magnum.common import exception
 from magnum.common import utils
 from magnum.conductor.handlers.common import docker_client
 from magnum.i18n import _LE
+from magnum.i18n import _LW
 from magnum import objects
 from magnum.objects import container as obj_container
 
@@ -49,6 +58,85 @@ docker_opts = [
     cfg.StrOpt('key_file',
                help='Location of TLS private key file for '
                     'securing docker api requests (tlskey).'),
+    cfg.IntOpt('client_pool_size',
+               default=64,
+               help='Maximum number of docker endpoints a conductor keeps '
+                    'clients, and their open connections, for.'),
+    cfg.IntOpt('client_idle_timeout',
+               default=600,
+               help='Seconds after which the client of a docker endpoint '
+                    'that has not been used is closed.'),
+    cfg.IntOpt('client_check_interval',
+               default=60,
+               help='Seconds a docker client can stay unused before it is '
+                    'checked with a ping on its next use. Clients failing '
+                    'the check are replaced.'),
+    cfg.IntOpt('image_cache_ttl',
+               default=300,
+               help='Seconds the list of images present on a bay is cached '
+                    'for. Images known to be present are not pulled again '
+                    'when creating containers.'),
+    cfg.BoolOpt('async_image_pull',
+                default=False,
+                help='If set, creating a container whose image is not on '
+                     'its bay returns at once with the container in the '
+                     'Pulling status, and the container is created once '
+                     'its image is pulled.'),
+    cfg.IntOpt('bulk_action_pool_size',
+               default=10,
+               help='Maximum number of actions run at once on the '
+                    'containers of a bay when running an action on many '
+                    'containers.'),
+    cfg.IntOpt('prewarm_pool_size',
+               default=10,
+               help='Maximum number of images pulled at once when '
+                    'prewarming the nodes of a bay.'),
+    cfg.IntOpt('prewarm_pull_timeout',
+               default=600,
+               help='Timeout in seconds for pulling an image onto a bay '
+                    'node when prewarming it.'),
+    cfg.BoolOpt('watch_events',
+                default=False,
+                help='Keep the status of containers up to date from the '
+                     'event streams of the docker endpoints of their bays, '
+                     'and serve the status of containers of the bays being '
+                     'watched from the database.'),
+    cfg.IntOpt('max_event_streams',
+               default=100,
+               help='Maximum number of docker event streams a conductor '
+                    'follows at once.'),
+    cfg.IntOpt('event_stream_timeout',
+               default=300,
+               help='Seconds without any event after which a docker event '
+                    'stream is reopened.'),
+    cfg.IntOpt('event_reconnect_max_interval',
+               default=60,
+               help='Maximum number of seconds to wait before reconnecting '
+                    'to a docker event stream that could not be opened. '
+                    'The wait doubles on each failed attempt, up to this '
+                    'value.'),
+    cfg.IntOpt('stream_chunk_size',
+               default=65536,
+               help='Maximum number of bytes of streamed container output, '
+                    'such as logs, relayed to the API in one RPC reply.'),
+    cfg.IntOpt('stream_queue_size',
+               default=64,
+               help='Maximum number of frames of streamed container output, '
+                    'of at most stream_chunk_size bytes each, a conductor '
+                    'reads ahead of the API. Reading from docker stops '
+                    'while the queue is full.'),
+    cfg.IntOpt('stream_read_timeout',
+               default=10,
+               help='Seconds a read of streamed container output waits for '
+                    'new output before returning an empty chunk.'),
+    cfg.IntOpt('stream_idle_timeout',
+               default=60,
+               help='Seconds after which a container output stream that '
+                    'has not been read from is closed.'),
+    cfg.IntOpt('exec_buffer_size',
+               default=1048576,
+               help='Maximum number of bytes of the output of a streamed '
+                    'exec a conductor reads ahead of the API.'),
 ]
 
 CONF.register_opts(docker_opts, 'docker')
@@ -70,61 +158,591 @@ def wrap_container_exception(f):
     return functools.wraps(f)(wrapped)
 
 
-class Handler(object):
+def _status_from_summary(summary):
+    # The Status of a listed container reads like 'Up 2 minutes',
+    # 'Up 2 minutes (Paused)', 'Exited (0) 3 seconds ago' or 'Dead'.
+    status = summary.get('Status') or ''
+    if status.startswith('Up'):
+        if '(Paused)' in status:
+            return obj_container.PAUSED
+        return obj_container.RUNNING
+    elif status.startswith('Dead'):
+        return obj_container.ERROR
+    return obj_container.STOPPED
+
+
+def _summaries_by_name(summaries):
+    """Map listed containers by name.
+
+    Docker lists a container named 'name' as '/name', Swarm as
+    '/node/name'. Names of the first form win over those of the second,
+    which are also how Docker lists link aliases.
+    """
+    by_name = {}
+    nested = []
+    for summary in summaries:
+        for name in summary.get('Names') or []:
+            parts = name.strip('/').split('/')
+            if len(parts) == 1:
+                by_name[parts[0]] = summary
+            else:
+                nested.append((parts[-1], summary))
+    for name, summary in nested:
+        by_name.setdefault(name, summary)
+    return by_name
+
+
+class DockerClientPool(object):
+    """LRU pool of Docker clients keyed by endpoint URL and API version.
+
+    Clients are reused across calls so their connections, and the TLS
+    sessions of these, are kept alive. Clients that have not been used for
+    client_idle_timeout seconds are evicted, as is the least recently used
+    one once client_pool_size endpoints are pooled. Clients are checked
+    out by get and checked in by release; an evicted client is closed once
+    no call uses it any more.
+    """
 
     def __init__(self):
-        super(Handler, self).__init__()
+        self._clients = collections.OrderedDict()
+        # Number of the calls using each checked out client.
+        self._users = {}
+        # Clients evicted while checked out, closed once released.
+        self._evicted = set()
+
+    def get(self, url, version, timeout):
+        """Check out the client of an endpoint, to be released after use."""
+        now = time.time()
+        self._evict_idle(now)
+        key = (url, version)
+        entry = self._clients.pop(key, None)
+        if entry is None:
+            docker = self._create(url, version, timeout)
+        else:
+            docker, last_used = entry
+            if now - last_used > CONF.docker.client_check_interval:
+                docker = self._check(key, docker, timeout)
+        self._clients[key] = (docker, now)
+        self._users[docker] = self._users.get(docker, 0) + 1
+
+        while len(self._clients) > CONF.docker.client_pool_size:
+            key, (evicted, last_used) = self._clients.popitem(last=False)
+            self._close(key, evicted)
+        return docker
+
+    def release(self, docker):
+        """Check in a client got from the pool."""
+        users = self._users.pop(docker, 0) - 1
+        if users > 0:
+            self._users[docker] = users
+        elif docker in self._evicted:
+            self._evicted.remove(docker)
+            LOG.debug("Closing released docker client")
+            docker.close()
+
+    def clear(self):
+        while self._clients:
+            key, (docker, last_used) = self._clients.popitem()
+            docker.close()
+        self._users.clear()
+        self._evicted.clear()
+
+    def _evict_idle(self, now):
+        idle_before = now - CONF.docker.client_idle_timeout
+        # Entries are ordered from the least to the most recently used.
+        for key, (docker, last_used) in list(self._clients.items()):
+            if last_used > idle_before:
+                break
+            del self._clients[key]
+            self._close(key, docker)
+
+    def _create(self, url, version, timeout):
+        LOG.debug("Creating docker client for %s", url)
+        return docker_client.DockerHTTPClient(url, version, timeout)
+
+    def _check(self, key, docker, timeout):
+        try:
+            docker.ping()
+            return docker
+        except Exception as e:
+            LOG.debug("Replacing docker client for %(url)s: %(error)s",
+                      {'url': key[0], 'error': e})
+            self._close(key, docker)
+            return self._create(key[0], key[1], timeout)
+
+    def _close(self, key, docker):
+        if docker in self._users:
+            # Closing the client would break the calls still using it.
+            LOG.debug("Evicting docker client for %s, closed once released",
+                      key[0])
+            self._evicted.add(docker)
+            return
+        LOG.debug("Closing docker client for %s", key[0])
+        docker.close()
+
+
+class ContainerEventWatcher(object):
+    """Keeps the status of containers up to date from Docker events.
+
+    Each bay that containers are handled on is watched by a green thread
+    following the /events stream of its Docker endpoint, and the status of
+    its containers is saved as they start, stop, pause or die. A stream
+    that ends or times out is reopened from the time of the last event it
+    got, so no event is missed. Each time a stream opens, the containers
+    of the bay are listed once to catch up on what changed while no stream
+    was open. Bays stop being watched once deleted.
+    """
+
+    EVENT_STATUSES = {
+        'start': obj_container.RUNNING,
+        'restart': obj_container.RUNNING,
+        'unpause': obj_container.RUNNING,
+        'pause': obj_container.PAUSED,
+        'stop': obj_container.STOPPED,
+        'die': obj_container.STOPPED,
+    }
+
+    def __init__(self):
+        # Whether the event stream of each watched bay is open, keyed by
+        # bay uuid.
+        self._watched = {}
+        # magnum container uuids keyed by Docker ID, None for containers
+        # not created by magnum.
+        self._uuids = {}
+
+    def watch(self, context, bay):
+        if bay.uuid in self._watched:
+            return
+        if len(self._watched) >= CONF.docker.max_event_streams:
+            LOG.debug("Not watching docker events of bay %s, already "
+                      "watching %d bays", bay.uuid, len(self._watched))
+            return
+        self._watched[bay.uuid] = False
+        eventlet.spawn_n(self._watch, context, bay)
+
+    def is_watching(self, bay_uuid):
+        """Whether the status of the containers of a bay is up to date."""
+        return self._watched.get(bay_uuid, False)
+
+    def _watch(self, context, bay):
+        tcp_url = 'tcp://%s:2376' % bay.api_address
+        since = int(time.time())
+        failures = 0
+        try:
+            while True:
+                docker = None
+                try:
+                    docker = docker_client.DockerHTTPClient(
+                        tcp_url,
+                        CONF.docker.docker_remote_api_version,
+                        CONF.docker.event_stream_timeout)
+                    events = docker.events(since=since)
+                    # Containers may have changed while the stream was
+                    # closed; what changes from now on is in the stream.
+                    self._reconcile(context, bay, docker)
+                    self._watched[bay.uuid] = True
+                    failures = 0
+                    for event in events:
+                        if isinstance(event, six.string_types):
+                            event = json.loads(event)
+                        since = event.get('time', since)
+                        self._handle_event(context, docker, event)
+                except Exception as e:
+                    LOG.debug("Docker event stream of bay %(bay)s ended: "
+                              "%(error)s", {'bay': bay.uuid, 'error': e})
+                    failures += 1
+                finally:
+                    if docker is not None:
+                        docker.close()
+                self._watched[bay.uuid] = False
+
+                try:
+                    objects.Bay.get_by_uuid(context, bay.uuid)
+                except exception.BayNotFound:
+                    return
+                if failures:
+                    time.sleep(min(2 ** (failures - 1),
+                                   CONF.docker.event_reconnect_max_interval))
+        finally:
+            del self._watched[bay.uuid]
+
+    def _reconcile(self, context, bay, docker):
+        """Save the status of the containers of a bay that changed."""
+        by_name = _summaries_by_name(docker.containers(all=True))
+        statuses = {}
+        for container in objects.Container.list_by_bay_uuid(context,
+                                                            bay.uuid):
+            # Containers not created in Docker yet have no status to sync.
+            if container.status in (None, obj_container.PULLING):
+                continue
+            summary = by_name.get(container.name)
+            if summary is None:
+                status = obj_container.ERROR
+            else:
+                self._uuids[summary['Id']] = container.uuid
+                status = _status_from_summary(summary)
+            if status != container.status:
+                statuses[container.uuid] = status
+        if statuses:
+            objects.Container.update_status(context, statuses)
+
+    def _handle_event(self, context, docker, event):
+        docker_id = event.get('id')
+        if event.get('status') == 'destroy':
+            self._uuids.pop(docker_id, None)
+            return
+        status = self.EVENT_STATUSES.get(event.get('status'))
+        if status is None:
+            return
+        if docker_id not in self._uuids:
+            try:
+                info = docker.inspect_container(docker_id)
+                hostname = info['Config'].get('Hostname')
+            except errors.APIError:
+                hostname = None
+            self._uuids[docker_id] = (hostname if utils.is_uuid_like(hostname)
+                                      else None)
+        container_uuid = self._uuids[docker_id]
+        if container_uuid is not None:
+            LOG.debug("Container %(container)s is %(status)s",
+                      {'container': container_uuid, 'status': status})
+            objects.Container.update_status(context,
+                                            {container_uuid: status})
+
+
+class ContainerStreams(object):
+    """Relays streamed container output to the API in bounded chunks.
+
+    A green thread reads the frames of each stream from Docker, splits
+    them into frames of at most stream_chunk_size bytes, and puts these
+    into a queue of stream_queue_size frames. Every read takes at most
+    stream_chunk_size bytes off the queue. Reading from Docker blocks while
+    the queue is full, so the memory used stays bounded however much
+    output there is. Streams are closed once read to the end, or when they
+    have not been read from for stream_idle_timeout seconds.
+    """
+
+    def __init__(self):
+        self._streams = {}
+
+    def open(self, frames, finish=None, queue_size=None, release=None):
+        """Start reading a stream of output.
+
+        :param frames: generator of the frames of output.
+        :param finish: callable returning a dict of fields, such as an exit
+                       code, to add to the last read of the stream.
+        :param queue_size: number of frames to read ahead, instead of
+                           stream_queue_size.
+        :param release: callable run once the stream is done with, even
+                        when closed, such as to release its Docker client.
+        :returns: the id of the stream.
+        """
+        self._evict_idle()
+        stream_id = utils.generate_uuid()
+        stream = {
+            'queue': queue.LightQueue(queue_size or
+                                      CONF.docker.stream_queue_size),
+            'decoder': codecs.getincrementaldecoder('utf-8')('replace'),
+            'end': {},
+            'used': time.time(),
+        }
+        stream['thread'] = eventlet.spawn(self._pump, frames, stream, finish,
+                                          release)
+        self._streams[stream_id] = stream
+        return stream_id
+
+    def read(self, stream_id):
+        self._evict_idle()
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            LOG.warn(_LW("Container output stream %s is closed"), stream_id)
+            return {'output': u'', 'eof': True}
+        stream['used'] = time.time()
+
+        frames = []
+        size = 0
+        frame = b''
+        try:
+            frame = stream['queue'].get(
+                timeout=CONF.docker.stream_read_timeout)
+            while frame is not None:
+                frames.append(frame)
+                size += len(frame)
+                if size >= CONF.docker.stream_chunk_size:
+                    break
+                frame = stream['queue'].get_nowait()
+        except queue.Empty:
+            pass
+        eof = frame is None
+        # Characters split across reads are decoded by the next read.
+        result = {'output': stream['decoder'].decode(b''.join(frames), eof),
+                  'eof': eof}
+        if eof:
+            del self._streams[stream_id]
+            result.update(stream['end'])
+        return result
+
+    def close(self, stream_id):
+        stream = self._streams.pop(stream_id, None)
+        if stream is not None:
+            stream['thread'].kill()
+
+    def _evict_idle(self):
+        idle_before = time.time() - CONF.docker.stream_idle_timeout
+        for stream_id, stream in list(self._streams.items()):
+            if stream['used'] < idle_before:
+                LOG.debug("Closing idle container output stream %s",
+                          stream_id)
+                self.close(stream_id)
+
+    @classmethod
+    def _pump(cls, frames, stream, finish, release):
+        try:
+            cls._pump_frames(frames, stream, finish)
+        finally:
+            if release is not None:
+                release()
 
     @staticmethod
-    def _find_container_by_name(docker, name):
+    def _pump_frames(frames, stream, finish):
+        size = CONF.docker.stream_chunk_size
         try:
-            for info in docker.list_instances(inspect=True):
+            for frame in frames:
+                for offset in range(0, len(frame), size):
+                    stream['queue'].put(frame[offset:offset + size])
+        except Exception as e:
+            LOG.warn(_LW("Error while reading container output: %s"), e)
+        finally:
+            frames.close()
+        # The end of the stream, which is not reached once it is closed.
+        if finish is not None:
+            try:
+                stream['end'] = finish()
+            except Exception as e:
+                LOG.warn(_LW("Error while finishing container output "
+                             "stream: %s"), e)
+        stream['queue'].put(None)
+
+
+class Handler(object):
+
+    _docker_clients = DockerClientPool()
+
+    def __init__(self, event_watcher=None, conductor_id=None):
+        super(Handler, self).__init__()
+        self._event_watcher = event_watcher
+        # The id of the conductor, which the reads of the output streams
+        # it opens are sent to.
+        self._conductor_id = conductor_id
+        self._streams = ContainerStreams()
+        # Docker IDs of the containers, keyed by the magnum container UUID
+        # that is the hostname of the Docker container.
+        self._docker_ids = {}
+        # Docker names of the containers, keyed by magnum container UUID,
+        # to inspect containers that are not indexed yet.
+        self._docker_names = {}
+        # UUIDs of the containers the last scan of their bay did not find.
+        self._missing = set()
+        # Time the images present on each bay were listed, and the
+        # repo:tag of these images, keyed by bay uuid.
+        self._images = {}
+
+    def _find_container_by_name(self, docker, name):
+        docker_id = self._docker_ids.get(name)
+        if docker_id is not None:
+            return docker_id
+
+        # Containers are created under their Docker name, with their uuid
+        # as hostname.
+        docker_name = self._docker_names.get(name)
+        if docker_name:
+            try:
+                info = docker.inspect_container(docker_name)
+            except errors.APIError as e:
+                if getattr(e.response, 'status_code', None) != 404:
+                    raise
+            else:
                 if info['Config'].get('Hostname') == name:
-                    return info
+                    self._docker_ids[name] = info['Id']
+                    self._missing.discard(name)
+                    return info['Id']
+
+        # A container removed outside of magnum is not looked for again.
+        if name in self._missing:
+            return {}
+
+        # As a last resort, every container of the bay is inspected once
+        # and indexed for the next lookups, since Docker can not filter
+        # containers by hostname.
+        try:
+            for info in docker.list_instances(inspect=True):
+                hostname = info['Config'].get('Hostname')
+                if utils.is_uuid_like(hostname):
+                    self._docker_ids[hostname] = info['Id']
+                    self._missing.discard(hostname)
+                if hostname == name:
+                    docker_id = info['Id']
         except errors.APIError as e:
             if e.response.status_code != 404:
                 raise
-        return {}
+        if docker_id is None:
+            self._missing.add(name)
+        return docker_id or {}
+
+    def _forget_container(self, container_uuid):
+        self._docker_ids.pop(container_uuid, None)
+        self._docker_names.pop(container_uuid, None)
+        self._missing.discard(container_uuid)
+
+    def _call_by_name(self, docker, name, docker_func, *args, **kwargs):
+        """Call a Docker client method on the container with a hostname.
+
+        The indexed Docker ID of the container is stale when the container
+        was deleted, and maybe recreated under the same name, outside of
+        this conductor. When Docker does not know that ID, the entry is
+        dropped and the containers of the bay are scanned again.
+        """
+        indexed = name in self._docker_ids
+        docker_id = self._find_container_by_name(docker, name)
+        try:
+            return getattr(docker, docker_func)(docker_id, *args, **kwargs)
+        except errors.APIError as e:
+            if (not indexed or
+                    getattr(e.response, 'status_code', None) != 404):
+                raise
+        self._docker_ids.pop(name, None)
+        docker_id = self._find_container_by_name(docker, name)
+        return getattr(docker, docker_func)(docker_id, *args, **kwargs)
 
     def _encode_utf8(self, value):
         return unicode(value).encode('utf-8')
 
-    @staticmethod
-    def _docker_for_bay(bay):
+    @classmethod
+    def _docker_for_bay(cls, bay):
+        # The client is checked out of the pool, to be released after use.
         tcp_url = 'tcp://%s:2376' % bay.api_address
-        return docker_client.DockerHTTPClient(
+        return cls._docker_clients.get(
             tcp_url,
             CONF.docker.docker_remote_api_version,
             CONF.docker.default_timeout
         )
 
-    @classmethod
-    def _docker_for_container(cls, context, container):
+    def _watch_bay(self, context, bay):
+        if self._event_watcher is not None:
+            self._event_watcher.watch(context, bay)
+
+    def _is_bay_watched(self, bay_uuid):
+        return (self._event_watcher is not None and
+                self._event_watcher.is_watching(bay_uuid))
+
+    def _docker_for_container(self, context, container):
+        self._docker_names[container.uuid] = container.name
         bay = objects.Bay.get_by_uuid(context, container.bay_uuid)
-        return cls._docker_for_bay(bay)
+        self._watch_bay(context, bay)
+        return self._docker_for_bay(bay)
 
-    @classmethod
-    def get_docker_client(cls, context, container):
+    def get_docker_client(self, context, container):
         if utils.is_uuid_like(container):
             container = objects.Container.get_by_uuid(context, container)
-        return cls._docker_for_container(context, container)
+        return self._docker_for_container(context, container)
+
+    # Bay operations
+
+    def bay_prewarm_images(self, context, bay_uuid, images=None):
+        """Pull images onto every node of a bay.
+
+        The images default to the prewarm_images of the baymodel of the
+        bay. The pulls run in the background, at most prewarm_pool_size at
+        a time, and their progress is read as an output stream of one JSON
+        document per line, each reporting a pull that finished. Only swarm
+        bays serve the Docker API on their nodes.
+        """
+        bay = objects.Bay.get_by_uuid(context, bay_uuid)
+        baymodel = objects.BayModel.get_by_uuid(context, bay.baymodel_id)
+        if baymodel.coe != 'swarm':
+            raise exception.PrewarmImagesNotSupported(bay=bay_uuid,
+                                                      coe=baymodel.coe)
+        if images is None:
+            images = baymodel.prewarm_images or []
+        LOG.debug("bay_prewarm_images %s %s" % (bay_uuid, images))
+        frames = self._prewarm_images(bay, images)
+        return {'conductor': self._conductor_id,
+                'stream_id': self._streams.open(frames)}
+
+    def _prewarm_images(self, bay, images):
+        pulls = [(node, image) for node in bay.node_addresses or []
+                 for image in images]
+        results = queue.LightQueue()
+
+        def pull(node, image):
+            result = {'node': node, 'image': image, 'error': None}
+            docker = None
+            try:
+                # Swarm nodes serve the Docker API on port 2375.
+                docker = self._docker_clients.get(
+                    'tcp://%s:2375' % node,
+                    CONF.docker.docker_remote_api_version,
+                    CONF.docker.prewarm_pull_timeout)
+                image_repo, image_tag = docker_utils.parse_docker_image(image)
+                docker.pull(image_repo, tag=image_tag)
+            except Exception as e:
+                result['error'] = str(e)
+            finally:
+                if docker is not None:
+                    self._docker_clients.release(docker)
+            results.put(result)
+
+        def run():
+            pool = eventlet.GreenPool(CONF.docker.prewarm_pool_size)
+            for node, image in pulls:
+                pool.spawn_n(pull, node, image)
+            pool.waitall()
+            # The images listed by the swarm manager have changed.
+            self._images.pop(bay.uuid, None)
+
+        # The pulls go on even if the progress stops being read.
+        eventlet.spawn_n(run)
+        for done in range(1, len(pulls) + 1):
+            result = results.get()
+            result.update(done=done, total=len(pulls))
+            LOG.debug("Prewarmed %(done)d of %(total)d images on the nodes "
+                      "of bay %(bay)s", dict(result, bay=bay.uuid))
+            yield json.dumps(result) + '\n'
 
     # Container operations
 
     @wrap_container_exception
     def container_create(self, context, name, container_uuid, container):
+        return self._create(context, name, container_uuid, container)
+
+    @wrap_container_exception
+    def container_run(self, context, name, container_uuid, container):
+        """Create a container and start it, with one Docker client."""
+        return self._create(context, name, container_uuid, container,
+                            start=True)
+
+    def _create(self, context, name, container_uuid, container, start=False):
         docker = self.get_docker_client(context, container)
         image_id = container.image_id
         LOG.debug('Creating container with image %s name %s'
                   % (image_id, name))
+        pulling = False
         try:
-            image_repo, image_tag = docker_utils.parse_docker_image(image_id)
-            docker.pull(image_repo, tag=image_tag)
-            docker.inspect_image(self._encode_utf8(container.image_id))
-            docker.create_container(image_id, name=name,
-                                    hostname=container_uuid,
-                                    command=container.command)
+            if not self._image_present(docker, container.bay_uuid, image_id):
+                if CONF.docker.async_image_pull:
+                    container.status = obj_container.PULLING
+                    # The pull releases the client once done.
+                    eventlet.spawn_n(self._pull_and_create, docker, name,
+                                     container_uuid, container, start)
+                    pulling = True
+                    return container
+                self._pull_image(docker, container.bay_uuid, image_id)
+            docker_id = self._create_container(docker, name, container_uuid,
+                                               container)
             container.status = obj_container.STOPPED
+            if start:
+                docker.start(docker_id)
+                container.status = obj_container.RUNNING
             return container
         except errors.APIError as api_error:
             container.status = obj_container.ERROR
@@ -132,28 +750,112 @@ class Handler(object):
                 "Docker API Error : %s" % str(api_error))
         finally:
             container.save()
+            if not pulling:
+                self._docker_clients.release(docker)
+
+    def _image_present(self, docker, bay_uuid, image_id):
+        image_repo, image_tag = docker_utils.parse_docker_image(image_id)
+        image = '%s:%s' % (image_repo, image_tag or 'latest')
+        now = time.time()
+        cached = self._images.get(bay_uuid)
+        if cached is None or now - cached[0] > CONF.docker.image_cache_ttl:
+            images = set()
+            for info in docker.images():
+                images.update(info.get('RepoTags') or [])
+            cached = (now, images)
+            self._images[bay_uuid] = cached
+        return image in cached[1]
+
+    def _pull_image(self, docker, bay_uuid, image_id):
+        image_repo, image_tag = docker_utils.parse_docker_image(image_id)
+        docker.pull(image_repo, tag=image_tag)
+        docker.inspect_image(self._encode_utf8(image_id))
+        if bay_uuid in self._images:
+            self._images[bay_uuid][1].add('%s:%s' % (image_repo,
+                                                     image_tag or 'latest'))
+
+    def _create_container(self, docker, name, container_uuid, container):
+        try:
+            res = docker.create_container(container.image_id, name=name,
+                                          hostname=container_uuid,
+                                          command=container.command)
+        except errors.APIError as e:
+            if e.response.status_code != 404:
+                raise
+            # The image was removed from the bay since it was cached.
+            self._images.pop(container.bay_uuid, None)
+            self._pull_image(docker, container.bay_uuid, container.image_id)
+            res = docker.create_container(container.image_id, name=name,
+                                          hostname=container_uuid,
+                                          command=container.command)
+        self._docker_ids[container_uuid] = res['Id']
+        return res['Id']
+
+    def _pull_and_create(self, docker, name, container_uuid, container,
+                         start=False):
+        try:
+            self._pull_image(docker, container.bay_uuid, container.image_id)
+            docker_id = self._create_container(docker, name, container_uuid,
+                                               container)
+            container.status = obj_container.STOPPED
+            if start:
+                docker.start(docker_id)
+                container.status = obj_container.RUNNING
+        except Exception as e:
+            LOG.exception(_LE("Error while creating container %(uuid)s: "
+                              "%(error)s"),
+                          {'uuid': container_uuid, 'error': str(e)})
+            container.status = obj_container.ERROR
+        try:
+            container.save()
+        except exception.ContainerNotFound:
+            # The container was deleted while its image was being pulled.
+            docker_id = self._docker_ids.get(container_uuid)
+            self._forget_container(container_uuid)
+            if docker_id is not None:
+                docker.remove_container(docker_id, force=True)
+        finally:
+            self._docker_clients.release(docker)
 
     @wrap_container_exception
     def container_delete(self, context, container_uuid):
         LOG.debug("container_delete %s" % container_uuid)
         docker = self.get_docker_client(context, container_uuid)
         try:
+            result = None
             docker_id = self._find_container_by_name(docker, container_uuid)
-            if not docker_id:
-                return None
-            return docker.remove_container(docker_id)
+            if docker_id:
+                try:
+                    result = docker.remove_container(docker_id)
+                except errors.APIError as e:
+                    if getattr(e.response, 'status_code', None) != 404:
+                        raise
+                    # The indexed container is gone; one may have been
+                    # recreated under the same name.
+                    self._docker_ids.pop(container_uuid, None)
+                    docker_id = self._find_container_by_name(docker,
+                                                             container_uuid)
+                    if docker_id:
+                        result = docker.remove_container(docker_id)
+            self._forget_container(container_uuid)
+            return result
         except errors.APIError as api_error:
             raise exception.ContainerException(
                 "Docker API Error : %s" % str(api_error))
+        finally:
+            self._docker_clients.release(docker)
 
     @wrap_container_exception
     def container_show(self, context, container_uuid):
         LOG.debug("container_show %s" % container_uuid)
-        docker = self.get_docker_client(context, container_uuid)
         container = objects.Container.get_by_uuid(context, container_uuid)
+        if (container.status == obj_container.PULLING or
+                self._is_bay_watched(container.bay_uuid)):
+            return container
+        docker = self.get_docker_client(context, container)
         try:
-            docker_id = self._find_container_by_name(docker, container_uuid)
-            result = docker.inspect_container(docker_id)
+            result = self._call_by_name(docker, container_uuid,
+                                        'inspect_container')
             status = result.get('State')
             if status:
                 if status.get('Error') is True:
@@ -174,14 +876,60 @@ class Handler(object):
                 return container
             raise exception.ContainerException(
                 "Docker API Error : %s" % (error_message))
+        finally:
+            self._docker_clients.release(docker)
+
+    @wrap_container_exception
+    def container_show_many(self, context, containers):
+        LOG.debug("container_show_many %s" % [c.uuid for c in containers])
+        containers_by_bay = {}
+        for container in containers:
+            # Containers waiting for their image are not in Docker yet.
+            if container.status != obj_container.PULLING:
+                containers_by_bay.setdefault(container.bay_uuid,
+                                             []).append(container)
+
+        statuses = {}
+        for bay_uuid, bay_containers in containers_by_bay.items():
+            if self._is_bay_watched(bay_uuid):
+                continue
+            bay = objects.Bay.get_by_uuid(context, bay_uuid)
+            self._watch_bay(context, bay)
+            docker = self._docker_for_bay(bay)
+            try:
+                # Containers are created under their name, which the
+                # listing of the containers of the bay has.
+                summaries = _summaries_by_name(docker.containers(all=True))
+            except errors.APIError as api_error:
+                LOG.warn(_LW("Can not refresh the status of the containers "
+                             "of bay %(bay)s: %(error)s"),
+                         {'bay': bay_uuid, 'error': str(api_error)})
+                continue
+            finally:
+                self._docker_clients.release(docker)
+
+            for container in bay_containers:
+                summary = summaries.get(container.name)
+                if summary is not None:
+                    status = _status_from_summary(summary)
+                else:
+                    status = obj_container.ERROR
+                if status != container.status:
+                    container.status = status
+                    statuses[container.uuid] = status
+
+        if statuses:
+            objects.Container.update_status(context, statuses)
+        for container in containers:
+            container.obj_reset_changes()
+        return containers
 
     @wrap_container_exception
     def _container_action(self, context, container_uuid, status, docker_func):
         LOG.debug("container_%s %s" % (status, container_uuid))
         docker = self.get_docker_client(context, container_uuid)
         try:
-            docker_id = self._find_container_by_name(docker, container_uuid)
-            result = getattr(docker, docker_func)(docker_id)
+            result = self._call_by_name(docker, container_uuid, docker_func)
             container = objects.Container.get_by_uuid(context, container_uuid)
             container.status = status
             container.save()
@@ -189,6 +937,8 @@ class Handler(object):
         except errors.APIError as api_error:
             raise exception.ContainerException(
                 "Docker API Error : %s" % str(api_error))
+        finally:
+            self._docker_clients.release(docker)
 
     def container_reboot(self, context, container_uuid):
         return self._container_action(context, container_uuid,
@@ -210,16 +960,152 @@ class Handler(object):
         return self._container_action(context, container_uuid,
                                       obj_container.RUNNING, 'unpause')
 
+    # The status containers are left in by the actions that can be run on
+    # many containers at once, and the Docker client method running them.
+    BULK_ACTIONS = {
+        'start': (obj_container.RUNNING, 'start'),
+        'stop': (obj_container.STOPPED, 'stop'),
+        'reboot': (obj_container.RUNNING, 'restart'),
+        'pause': (obj_container.PAUSED, 'pause'),
+        'unpause': (obj_container.RUNNING, 'unpause'),
+        'delete': (None, 'remove_container'),
+    }
+
+    def container_action_many(self, context, container_uuids, action):
+        """Run an action on many containers.
+
+        The containers are grouped by bay, and the actions on the
+        containers of each bay are run concurrently, at most
+        bulk_action_pool_size at a time, with one Docker client.
+
+        :returns: a list of dicts, in the order of container_uuids, with
+                  the uuid of each container, its status after the action
+                  and the error that made the action fail, if any.
+        """
+        LOG.debug("container_action_many %s %s" % (action, container_uuids))
+        results = {}
+        containers_by_bay = {}
+        for container_uuid in container_uuids:
+            try:
+                container = objects.Container.get_by_uuid(context,
+                                                          container_uuid)
+            except exception.ContainerNotFound as e:
+                results[container_uuid] = self._action_result(
+                    container_uuid, None, e)
+                continue
+            containers_by_bay.setdefault(container.bay_uuid,
+                                         []).append(container)
+
+        threads = [eventlet.spawn(self._bay_action, context, bay_containers,
+                                  action)
+                   for bay_containers in containers_by_bay.values()]
+        for thread in threads:
+            results.update(thread.wait())
+
+        statuses = dict((result['uuid'], result['status'])
+                        for result in results.values()
+                        if result['error'] is None and result['status'])
+        if statuses:
+            objects.Container.update_status(context, statuses)
+        return [results[container_uuid] for container_uuid in container_uuids]
+
+    def _bay_action(self, context, containers, action):
+        try:
+            docker = self._docker_for_container(context, containers[0])
+        except Exception as e:
+            return self._failed_results(containers, e)
+        try:
+            try:
+                # Containers are created under their name, which the
+                # listing of the containers of the bay has.
+                summaries = _summaries_by_name(docker.containers(all=True))
+            except Exception as e:
+                return self._failed_results(containers, e)
+            for container in containers:
+                summary = summaries.get(container.name)
+                if summary is not None:
+                    self._docker_ids[container.uuid] = summary['Id']
+                else:
+                    self._docker_ids.pop(container.uuid, None)
+
+            pool = eventlet.GreenPool(CONF.docker.bulk_action_pool_size)
+            results = pool.imap(functools.partial(self._run_action, docker,
+                                                  action),
+                                containers)
+            return dict((result['uuid'], result) for result in results)
+        finally:
+            self._docker_clients.release(docker)
+
+    def _failed_results(self, containers, error):
+        return dict((container.uuid,
+                     self._action_result(container.uuid, container.status,
+                                         error))
+                    for container in containers)
+
+    def _run_action(self, docker, action, container):
+        status, docker_func = self.BULK_ACTIONS[action]
+        if container.uuid not in self._docker_ids:
+            if action == 'delete':
+                # Like container_delete, there is nothing to remove.
+                self._forget_container(container.uuid)
+                return self._action_result(container.uuid, None)
+            return self._action_result(
+                container.uuid, container.status,
+                "Docker container %s not found" % container.uuid)
+        try:
+            self._call_by_name(docker, container.uuid, docker_func)
+        except Exception as e:
+            # A failure is the result of its own container only.
+            return self._action_result(container.uuid, container.status, e)
+        if action == 'delete':
+            self._forget_container(container.uuid)
+        return self._action_result(container.uuid, status)
+
+    @staticmethod
+    def _action_result(container_uuid, status, error=None):
+        return {'uuid': container_uuid,
+                'status': status,
+                'error': None if error is None else str(error)}
+
     @wrap_container_exception
     def container_logs(self, context, container_uuid):
         LOG.debug("container_logs %s" % container_uuid)
         docker = self.get_docker_client(context, container_uuid)
         try:
-            docker_id = self._find_container_by_name(docker, container_uuid)
-            return {'output': docker.get_container_logs(docker_id)}
+            return {'output': self._call_by_name(docker, container_uuid,
+                                                 'get_container_logs')}
+        except errors.APIError as api_error:
+            raise exception.ContainerException(
+                "Docker API Error : %s" % str(api_error))
+        finally:
+            self._docker_clients.release(docker)
+
+    @wrap_container_exception
+    def container_logs_stream(self, context, container_uuid, tail='all',
+                              since=None, follow=False):
+        LOG.debug("container_logs_stream %s" % container_uuid)
+        docker = self.get_docker_client(context, container_uuid)
+        frames = None
+        try:
+            frames = self._call_by_name(docker, container_uuid,
+                                        'logs_stream', tail=tail,
+                                        since=since, follow=follow)
         except errors.APIError as api_error:
             raise exception.ContainerException(
                 "Docker API Error : %s" % str(api_error))
+        finally:
+            if frames is None:
+                self._docker_clients.release(docker)
+        stream_id = self._streams.open(
+            frames, release=functools.partial(self._docker_clients.release,
+                                              docker))
+        return {'conductor': self._conductor_id, 'stream_id': stream_id}
+
+    def container_stream_read(self, context, stream_id):
+        return self._streams.read(stream_id)
+
+    def container_stream_close(self, context, stream_id):
+        self._streams.close(stream_id)
 
     @wrap_container_exception
     def container_execute(self, context, container_uuid, command):
@@ -227,15 +1113,51 @@ class Handler(object):
                   (container_uuid, command))
         docker = self.get_docker_client(context, container_uuid)
         try:
-            docker_id = self._find_container_by_name(docker, container_uuid)
             if docker_utils.is_docker_library_version_atleast('1.2.0'):
-                create_res = docker.exec_create(docker_id, command, True,
+                create_res = self._call_by_name(docker, container_uuid,
+                                                'exec_create', command, True,
                                                 True, False)
                 exec_output = docker.exec_start(create_res, False, False,
                                                 False)
             else:
-                exec_output = docker.execute(docker_id, command)
+                exec_output = self._call_by_name(docker, container_uuid,
+                                                 'execute', command)
             return {'output': exec_output}
         except errors.APIError as api_error:
             raise exception.ContainerException(
                 "Docker API Error : %s" % str(api_error))
+        finally:
+            self._docker_clients.release(docker)
+
+    @wrap_container_exception
+    def container_execute_stream(self, context, container_uuid, command):
+        LOG.debug("container_execute_stream %s command %s" %
+                  (container_uuid, command))
+        if not docker_utils.is_docker_library_version_atleast('1.2.0'):
+            raise exception.ContainerException(
+                "Streaming exec needs docker-py 1.2.0 or newer")
+        docker = self.get_docker_client(context, container_uuid)
+        frames = None
+        try:
+            create_res = self._call_by_name(docker, container_uuid,
+                                            'exec_create', command, True,
+                                            True, False)
+            frames = docker.exec_start_stream(create_res)
+        except errors.APIError as api_error:
+            raise exception.ContainerException(
+                "Docker API Error : %s" % str(api_error))
+        finally:
+            if frames is None:
+                self._docker_clients.release(docker)
+        queue_size = max(1, (CONF.docker.exec_buffer_size //
+                             CONF.docker.stream_chunk_size))
+        stream_id = self._streams.open(
+            frames, finish=functools.partial(self._exec_result, docker,
+                                             create_res),
+            queue_size=queue_size,
+            release=functools.partial(self._docker_clients.release, docker))
+        return {'conductor': self._conductor_id, 'stream_id': stream_id}
+
+    @staticmethod
+    def _exec_result(docker, exec_id):
+        return {'exit_code': docker.exec_inspect(exec_id).get('ExitCode')}
@@ -12,8 +12,16 @@
 
 """Magnum Kubernetes RPC handler."""
 
+import collections
+import json
+import random
+import time
+
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import excutils
+import requests
 
 from magnum.common import clients
 from magnum.common import exception
@@ -21,7 +29,10 @@ from magnum.common import k8s_manifest
 from magnum.common.pythonk8sclient.client import ApivbetaApi
 from magnum.common.pythonk8sclient.client import swagger
 from magnum.i18n import _
+from magnum.i18n import _LW
 from magnum import objects
+from magnum.openstack.common import loopingcall
+from magnum.openstack.common import periodic_task
 
 import ast
 from six.moves.urllib import error
@@ -37,6 +48,73 @@ kubernetes_opts = [
     cfg.IntOpt('k8s_port',
                default=8080,
                help=_('Default port of the k8s master endpoint.')),
+    cfg.IntOpt('api_cache_size',
+               default=64,
+               help=_('Maximum number of k8s master endpoints a conductor '
+                      'keeps API clients for.')),
+    cfg.IntOpt('api_idle_timeout',
+               default=600,
+               help=_('Seconds after which the API client of a k8s master '
+                      'endpoint that has not been used is closed.')),
+    cfg.IntOpt('api_pool_maxsize',
+               default=10,
+               help=_('Maximum number of connections kept open to each k8s '
+                      'master endpoint.')),
+    cfg.FloatOpt('api_connect_timeout',
+                 default=10,
+                 help=_('Timeout in seconds for connecting to a k8s master '
+                        'endpoint.')),
+    cfg.FloatOpt('api_read_timeout',
+                 default=60,
+                 help=_('Timeout in seconds for reading a response from a '
+                        'k8s master endpoint.')),
+    cfg.IntOpt('api_retries',
+               default=3,
+               help=_('Number of times a GET, PUT or DELETE call to a k8s '
+                      'master endpoint is retried when it fails to connect, '
+                      'times out or the endpoint is unavailable.')),
+    cfg.FloatOpt('api_retry_backoff',
+                 default=0.5,
+                 help=_('Seconds to wait before retrying a call to a k8s '
+                        'master endpoint, doubled on each further retry.')),
+    cfg.BoolOpt('watch_resources',
+                default=False,
+                help=_('Keep the pods, services and replication controllers '
+                       'of bays up to date from the watch streams of their '
+                       'k8s master endpoint.')),
+    cfg.IntOpt('max_watch_streams',
+               default=150,
+               help=_('Maximum number of k8s watch streams a conductor '
+                      'follows at once. Each watched bay takes one stream '
+                      'for each of pods, services and replication '
+                      'controllers.')),
+    cfg.IntOpt('watch_timeout',
+               default=300,
+               help=_('Seconds without any event after which a k8s watch '
+                      'stream is reopened.')),
+    cfg.IntOpt('watch_reconnect_max_interval',
+               default=60,
+               help=_('Maximum number of seconds to wait before reconnecting '
+                      'to a k8s watch stream that could not be opened. The '
+                      'wait doubles on each failed attempt, up to this '
+                      'value.')),
+    cfg.IntOpt('sync_interval',
+               default=0,
+               help=_('Interval in seconds at which the pods, services and '
+                      'replication controllers of bays are reconciled with '
+                      'their k8s master endpoint. 0 disables it.')),
+    cfg.StrOpt('sync_label_selector',
+               help=_('Label selector restricting the resources listed from '
+                      'k8s master endpoints when reconciling bays. Rows of '
+                      'resources missing from the lists are only destroyed '
+                      'when no selector is set.')),
+    cfg.StrOpt('sync_field_selector',
+               help=_('Field selector restricting the resources listed from '
+                      'k8s master endpoints when reconciling bays.')),
+    cfg.IntOpt('apply_pool_size',
+               default=10,
+               help=_('Maximum number of the resources of a manifest that '
+                      'are created at once on a k8s master endpoint.')),
 ]
 
 cfg.CONF.register_opts(kubernetes_opts, group='kubernetes')
@@ -68,6 +146,93 @@ def _retrieve_k8s_master_url(context, obj):
     return "%(k8s_protocol)s://%(api_address)s:%(k8s_port)s" % params
 
 
+def _update_resource(k8s_api, kind, obj, manifest):
+    """Update a k8s resource to a new manifest.
+
+    The resource is sent a JSON merge patch against the manifest it was
+    last applied with. It is replaced only when that manifest is not
+    known, the patch can not express the change, or the k8s master does
+    not accept merge patches.
+
+    :param kind: the kind of the resource, as in the names of the calls
+                 of the k8s API, such as 'Pod'.
+    """
+    patch = None
+    if obj.obj_attr_is_set('applied_manifest') and obj.applied_manifest:
+        patch = k8s_manifest.merge_patch(json.loads(obj.applied_manifest),
+                                         manifest)
+    if patch == {}:
+        LOG.debug("%(kind)s %(name)s is already up to date",
+                  {'kind': kind, 'name': obj.name})
+        return
+    if patch is not None:
+        try:
+            getattr(k8s_api, 'patch' + kind)(name=obj.name, body=patch,
+                                             namespaces='default')
+            return
+        except error.HTTPError as err:
+            if err.code != 415:
+                raise
+            LOG.debug("Replacing %(kind)s %(name)s, the k8s master does not "
+                      "accept merge patches", {'kind': kind,
+                                               'name': obj.name})
+    getattr(k8s_api, 'replace' + kind)(name=obj.name, body=manifest,
+                                       namespaces='default')
+
+
+def _create_resource(k8s_api, kind, obj):
+    """Create a k8s resource from the manifest of its object.
+
+    :param kind: the kind of the resource, as in the names of the calls
+                 of the k8s API, such as 'Pod'.
+    :returns: the error the resource failed to be created with, if any,
+              such as the HTTPError of the k8s master or a connection
+              error.
+    """
+    try:
+        manifest = k8s_manifest.parse(obj.manifest)
+        resp = getattr(k8s_api, 'create' + kind)(body=manifest,
+                                                 namespaces='default')
+        if kind == 'Pod':
+            obj.status = resp['status']['phase']
+    except Exception as err:
+        return err
+    obj.applied_manifest = json.dumps(manifest)
+
+
+def _api_failure(err):
+    """Convert an error of a call to the k8s API to KubernetesAPIFailed."""
+    if isinstance(err, error.HTTPError):
+        try:
+            message = ast.literal_eval(err.read())['message']
+        except Exception:
+            message = str(err)
+        return exception.KubernetesAPIFailed(code=err.code, message=message)
+    return exception.KubernetesAPIFailed(code=500, message=str(err))
+
+
+def _delete_resources(k8s_api, resources):
+    """Delete the k8s resources created from a manifest, in reverse order.
+
+    Failures are logged rather than raised, so that a resource which can
+    not be deleted does not keep the others around.
+
+    :param resources: a dict of the lists of the objects of the resources,
+                      keyed by kind of resource ('pod', 'service' or 'rc').
+    """
+    for key, kind in (('rc', 'ReplicationController'), ('pod', 'Pod'),
+                      ('service', 'Service')):
+        for obj in resources[key]:
+            try:
+                getattr(k8s_api, 'delete' + kind)(name=obj.name,
+                                                  namespaces='default')
+            except error.HTTPError as err:
+                if err.code != 404:
+                    LOG.warn(_LW("Failed to delete %(kind)s %(name)s: "
+                                 "%(error)s"),
+                             {'kind': kind, 'name': obj.name, 'error': err})
+
+
 def _object_has_stack(context, obj):
     osc = clients.OpenStackClients(context)
     if hasattr(obj, 'bay_uuid'):
@@ -81,77 +246,466 @@ def _object_has_stack(context, obj):
         return True
 
 
-class Handler(object):
-    """These are the backend operations.  They are executed by the backend
-         service.  API calls via AMQP (within the ReST API) trigger the
-         handlers to be called.
+class K8sApiCache(object):
+    """LRU cache of Kubernetes API clients keyed by k8s master URL.
+
+    The client of each master sends its calls through its own HTTP session
+    so connections to the master are kept alive and reused. Clients that
+    have not been used for api_idle_timeout seconds are closed, as is the
+    least recently used one once api_cache_size masters are cached.
+    """
+
+    def __init__(self, raw_responses=False):
+        self._apis = collections.OrderedDict()
+        self._raw_responses = raw_responses
+
+    def get(self, k8s_master_url):
+        now = time.time()
+        self._evict_idle(now)
+        entry = self._apis.pop(k8s_master_url, None)
+        if entry is None:
+            k8s_api = self._create(k8s_master_url)
+        else:
+            k8s_api = entry[0]
+        self._apis[k8s_master_url] = (k8s_api, now)
+
+        while len(self._apis) > cfg.CONF.kubernetes.api_cache_size:
+            url, (evicted, last_used) = self._apis.popitem(last=False)
+            self._close(url, evicted)
+        return k8s_api
+
+    def clear(self):
+        while self._apis:
+            url, (k8s_api, last_used) = self._apis.popitem()
+            self._close(url, k8s_api)
+
+    def _evict_idle(self, now):
+        idle_before = now - cfg.CONF.kubernetes.api_idle_timeout
+        # Entries are ordered from the least to the most recently used.
+        for url, (k8s_api, last_used) in list(self._apis.items()):
+            if last_used > idle_before:
+                break
+            del self._apis[url]
+            self._close(url, k8s_api)
+
+    def _create(self, k8s_master_url):
+        LOG.debug("Creating k8s API client for %s", k8s_master_url)
+        session = requests.Session()
+        pool_maxsize = cfg.CONF.kubernetes.api_pool_maxsize
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        transport = swagger.SessionTransport(
+            session,
+            timeout=(cfg.CONF.kubernetes.api_connect_timeout,
+                     cfg.CONF.kubernetes.api_read_timeout),
+            retries=cfg.CONF.kubernetes.api_retries,
+            backoff=cfg.CONF.kubernetes.api_retry_backoff)
+        client = swagger.ApiClient(k8s_master_url, transport=transport,
+                                   rawResponses=self._raw_responses)
+        return ApivbetaApi.ApivbetaApi(client)
+
+    def _close(self, k8s_master_url, k8s_api):
+        LOG.debug("Closing k8s API client for %s", k8s_master_url)
+        k8s_api.apiClient.transport.close()
+
+
+def _pod_values(k8s_pod):
+    spec = k8s_pod.get('spec') or {}
+    return {
+        'labels': k8s_pod['metadata'].get('labels') or {},
+        'images': [c['image'] for c in spec.get('containers') or []],
+        'status': (k8s_pod.get('status') or {}).get('phase'),
+    }
+
+
+def _service_values(k8s_service):
+    spec = k8s_service.get('spec') or {}
+    return {
+        'labels': k8s_service['metadata'].get('labels') or {},
+        'selector': spec.get('selector') or {},
+        'ports': spec.get('ports') or [],
+        'ip': spec.get('portalIP') or spec.get('clusterIP'),
+    }
+
+
+def _rc_values(k8s_rc):
+    spec = k8s_rc.get('spec') or {}
+    template = spec.get('template') or {}
+    return {
+        'labels': (template.get('metadata') or {}).get('labels') or {},
+        'images': [c['image'] for c in
+                   (template.get('spec') or {}).get('containers') or []],
+        'replicas': spec.get('replicas'),
+    }
 
+
+# The list call of each kind of resource, the object its rows are kept in,
+# and the column values of a resource.
+RESOURCE_KINDS = {
+    'pod': ('listPod', objects.Pod, _pod_values),
+    'service': ('listService', objects.Service, _service_values),
+    'rc': ('listReplicationController', objects.ReplicationController,
+           _rc_values),
+}
+
+
+class K8sResourceWatcher(object):
+    """Keeps the k8s resources of bays up to date from watch streams.
+
+    Each watched bay has a green thread per kind of resource, that lists
+    the resources of that kind in all namespaces, of which only those of
+    the default namespace are kept, and then follows the watch stream of their
+    changes from the resourceVersion of the list. The pods, services and
+    replication controllers of the bay in the database are updated as they
+    are modified on the k8s master, and destroyed once deleted there. A
+    stream that ends or times out is reopened from the resourceVersion of
+    the last event it got, so no event is missed; the resources are listed
+    again only once that version has expired. At most max_watch_streams
+    streams are followed at once, and bays stop being watched once
+    deleted.
     """
 
     def __init__(self):
-        super(Handler, self).__init__()
-        self._k8s_api = None
+        # Whether each stream is open, keyed by (bay uuid, kind).
+        self._watched = {}
+
+    def watch(self, context, bay):
+        if (bay.uuid, 'pod') in self._watched:
+            return
+        if (len(self._watched) + len(RESOURCE_KINDS) >
+                cfg.CONF.kubernetes.max_watch_streams):
+            LOG.debug("Not watching k8s resources of bay %s, already "
+                      "following %d streams", bay.uuid, len(self._watched))
+            return
+        k8s_master_url = _retrieve_k8s_master_url(context, bay)
+        for kind in RESOURCE_KINDS:
+            self._watched[(bay.uuid, kind)] = False
+            eventlet.spawn_n(self._watch, context, bay, k8s_master_url, kind)
+
+    def is_watching(self, bay_uuid):
+        """Whether the k8s resources of a bay are up to date."""
+        return all(self._watched.get((bay_uuid, kind), False)
+                   for kind in RESOURCE_KINDS)
+
+    def _create_api(self, k8s_master_url):
+        # Watch calls are not retried, the stream is reopened instead.
+        transport = swagger.SessionTransport(
+            timeout=(cfg.CONF.kubernetes.api_connect_timeout,
+                     cfg.CONF.kubernetes.watch_timeout))
+        client = swagger.ApiClient(k8s_master_url, transport=transport,
+                                   rawResponses=True)
+        return ApivbetaApi.ApivbetaApi(client)
+
+    def _watch(self, context, bay, k8s_master_url, kind):
+        k8s_api = self._create_api(k8s_master_url)
+        list_resources = getattr(k8s_api, RESOURCE_KINDS[kind][0])
+        resource_version = None
+        failures = 0
+        try:
+            while True:
+                try:
+                    if resource_version is None:
+                        resources = list_resources()
+                        resource_version = self._handle_list(
+                            context, bay, kind, resources)
+                    events = list_resources(watch=True,
+                                            resourceVersion=resource_version)
+                    self._watched[(bay.uuid, kind)] = True
+                    failures = 0
+                    for event in events:
+                        resource_version = self._handle_event(
+                            context, bay, kind, event, resource_version)
+                except Exception as e:
+                    LOG.debug("k8s %(kind)s watch stream of bay %(bay)s "
+                              "ended: %(error)s",
+                              {'kind': kind, 'bay': bay.uuid, 'error': e})
+                    failures += 1
+                self._watched[(bay.uuid, kind)] = False
+
+                try:
+                    objects.Bay.get_by_uuid(context, bay.uuid)
+                except exception.BayNotFound:
+                    return
+                if failures:
+                    time.sleep(min(
+                        2 ** (failures - 1),
+                        cfg.CONF.kubernetes.watch_reconnect_max_interval))
+        finally:
+            k8s_api.apiClient.transport.close()
+            del self._watched[(bay.uuid, kind)]
+
+    def _handle_list(self, context, bay, kind, resources):
+        for resource in resources.get('items') or []:
+            if resource['metadata'].get('namespace', 'default') == 'default':
+                self._update(context, bay, kind, resource)
+        return resources['metadata']['resourceVersion']
+
+    def _handle_event(self, context, bay, kind, event, resource_version):
+        """Apply an event, and return the resourceVersion to watch from."""
+        event_type = event.get('type')
+        resource = event.get('object') or {}
+        if event_type == 'ERROR':
+            # The version watched from is too old, the resources are
+            # listed again.
+            LOG.debug("k8s %(kind)s watch stream of bay %(bay)s failed: "
+                      "%(error)s", {'kind': kind, 'bay': bay.uuid,
+                                    'error': resource.get('message')})
+            return None
+        metadata = resource['metadata']
+        # Resources are only created by magnum in the default namespace.
+        if metadata.get('namespace', 'default') == 'default':
+            if event_type == 'DELETED':
+                self._delete(context, bay, kind, resource)
+            elif event_type in ('ADDED', 'MODIFIED'):
+                self._update(context, bay, kind, resource)
+        return metadata['resourceVersion']
+
+    def _find(self, context, bay, kind, resource):
+        obj_class = RESOURCE_KINDS[kind][1]
+        name = resource['metadata']['name']
+        return [obj for obj in obj_class.list_by_bay_uuid(context, bay.uuid)
+                if obj.name == name]
+
+    def _update(self, context, bay, kind, resource):
+        values = RESOURCE_KINDS[kind][2](resource)
+        for obj in self._find(context, bay, kind, resource):
+            changed = False
+            for field, value in values.items():
+                if obj[field] != value:
+                    obj[field] = value
+                    changed = True
+            if changed:
+                LOG.debug("Updating k8s %(kind)s %(uuid)s from its watch "
+                          "stream", {'kind': kind, 'uuid': obj.uuid})
+                obj.save()
+
+    def _delete(self, context, bay, kind, resource):
+        for obj in self._find(context, bay, kind, resource):
+            LOG.debug("Destroying k8s %(kind)s %(uuid)s deleted from the "
+                      "k8s master", {'kind': kind, 'uuid': obj.uuid})
+            try:
+                obj.destroy()
+            except exception.ResourceNotFound:
+                # It was destroyed by a delete call of its own.
+                pass
 
-    @property
-    def k8s_api(self):
-        return self._k8s_api
 
-    @k8s_api.setter
-    def k8s_api(self, k8s_master_url):
-        """Creates connection with Kubernetes master and
-            creates ApivbetaApi instance to call Kubernetes
-            APIs.
+# Seconds between the checks for bays due to be reconciled.
+_SYNC_TICK = 5
 
-            :param k8s_master_url: Kubernetes master URL
-        """
-        if self._k8s_api is None:
-            # build a connection with Kubernetes master
-            client = swagger.ApiClient(k8s_master_url)
 
-            # create the ApivbetaApi class instance
-            self._k8s_api = ApivbetaApi.ApivbetaApi(client)
+class K8sResourceSync(periodic_task.PeriodicTasks):
+    """Periodically reconciles the k8s resources of bays with their master.
+
+    Once every sync_interval seconds, the pods, services and replication
+    controllers of each bay that resources were handled on are listed with
+    one call per kind, filtered by sync_label_selector and
+    sync_field_selector. The lists are diffed against the rows of the bay
+    in memory, and only the changes are saved, in one transaction per bay.
+    Each bay is synced at its own random offset in the interval, so that
+    the calls to the k8s masters and the database are spread over it.
+    """
+
+    def __init__(self):
+        super(K8sResourceSync, self).__init__()
+        self._k8s_apis = K8sApiCache(raw_responses=True)
+        # The context and time of the next sync of each bay, keyed by bay
+        # uuid.
+        self._bays = {}
+        self._timer = None
+
+    def add(self, context, bay_uuid):
+        if bay_uuid in self._bays:
+            return
+        offset = random.uniform(0, cfg.CONF.kubernetes.sync_interval)
+        self._bays[bay_uuid] = (context, time.time() + offset)
+        if self._timer is None:
+            self._timer = loopingcall.DynamicLoopingCall(
+                self.run_periodic_tasks, None)
+            self._timer.start(periodic_interval_max=_SYNC_TICK)
+
+    @periodic_task.periodic_task(spacing=_SYNC_TICK, run_immediately=True)
+    def sync_bays(self, context):
+        now = time.time()
+        interval = cfg.CONF.kubernetes.sync_interval
+        for bay_uuid, (bay_context, next_sync) in list(self._bays.items()):
+            if next_sync > now:
+                continue
+            # Bays keep their offset, unless their syncs fell behind.
+            self._bays[bay_uuid] = (bay_context,
+                                    max(next_sync + interval, now))
+            try:
+                bay = objects.Bay.get_by_uuid(bay_context, bay_uuid)
+                self.sync_bay(bay_context, bay)
+            except exception.BayNotFound:
+                del self._bays[bay_uuid]
+            except Exception as e:
+                LOG.warn(_LW("Failed to sync the k8s resources of bay "
+                             "%(bay)s: %(error)s"),
+                         {'bay': bay_uuid, 'error': e})
+
+    def sync_bay(self, context, bay):
+        k8s_api = self._k8s_apis.get(_retrieve_k8s_master_url(context, bay))
+        selectors = {}
+        if cfg.CONF.kubernetes.sync_label_selector:
+            selectors['labelSelector'] = (
+                cfg.CONF.kubernetes.sync_label_selector)
+        if cfg.CONF.kubernetes.sync_field_selector:
+            selectors['fieldSelector'] = (
+                cfg.CONF.kubernetes.sync_field_selector)
+
+        updates = {}
+        deletes = {}
+        for kind, (list_call, obj_class, values) in RESOURCE_KINDS.items():
+            # The rows are read before the resources are listed, so that
+            # the rows created meanwhile, after their resource, are kept.
+            objs = obj_class.list_by_bay_uuid(context, bay.uuid)
+            resources = getattr(k8s_api, list_call)(**selectors)
+            by_name = dict((r['metadata']['name'], r)
+                           for r in resources.get('items') or []
+                           if r['metadata'].get('namespace',
+                                                'default') == 'default')
+            for obj in objs:
+                resource = by_name.get(obj.name)
+                if resource is None:
+                    # Pods that failed to be created never had a resource.
+                    if (not selectors and
+                            not (kind == 'pod' and obj.status == 'failed')):
+                        deletes.setdefault(kind, []).append(obj.uuid)
+                    continue
+                changes = dict((field, value) for field, value
+                               in values(resource).items()
+                               if obj[field] != value)
+                if changes:
+                    updates.setdefault(kind, {})[obj.uuid] = changes
+
+        if updates or deletes:
+            LOG.debug("Syncing k8s resources of bay %(bay)s, updating "
+                      "%(updates)s and destroying %(deletes)s",
+                      {'bay': bay.uuid, 'updates': updates,
+                       'deletes': deletes})
+            objects.Bay.sync_k8s_resources(context, updates, deletes)
+
+
+class Handler(object):
+    """These are the backend operations.  They are executed by the backend
+         service.  API calls via AMQP (within the ReST API) trigger the
+         handlers to be called.
+
+    """
+
+    def __init__(self, resource_watcher=None, resource_sync=None):
+        super(Handler, self).__init__()
+        self._k8s_apis = K8sApiCache()
+        self._resource_watcher = resource_watcher
+        self._resource_sync = resource_sync
+
+    def _track_bay(self, context, obj):
+        if self._resource_sync is not None:
+            self._resource_sync.add(context, obj.bay_uuid)
+        if (self._resource_watcher is None or
+                self._resource_watcher.is_watching(obj.bay_uuid)):
+            return
+        self._resource_watcher.watch(context, _retrieve_bay(context, obj))
 
     def service_create(self, context, service):
         LOG.debug("service_create")
         k8s_master_url = _retrieve_k8s_master_url(context, service)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(service.manifest)
         try:
-            self.k8s_api.createService(body=manifest,
-                                       namespaces='default')
+            k8s_api.createService(body=manifest,
+                                  namespaces='default')
         except error.HTTPError as err:
             message = ast.literal_eval(err.read())['message']
             raise exception.KubernetesAPIFailed(code=err.code, message=message)
         # call the service object to persist in db
+        service.applied_manifest = json.dumps(manifest)
         service.create(context)
+        self._track_bay(context, service)
         return service
 
+    def bay_apply_manifest(self, context, bay_uuid, services, pods, rcs):
+        """Create the k8s resources of a manifest on a bay.
+
+        Services are created first, as the pods and replication
+        controllers may look them up once running. When the k8s master
+        fails to create a resource, the resources that remain are not
+        created; the records of those that were are all saved in one
+        transaction before the failure is raised. When the records can not
+        be saved, the resources created are deleted from the bay again.
+        """
+        LOG.debug("bay_apply_manifest %s", bay_uuid)
+        bay = objects.Bay.get_by_uuid(context, bay_uuid)
+        k8s_master_url = _retrieve_k8s_master_url(context, bay)
+        k8s_api = self._k8s_apis.get(k8s_master_url)
+        pool = eventlet.GreenPool(cfg.CONF.kubernetes.apply_pool_size)
+
+        def create(job):
+            key, kind, obj = job
+            return _create_resource(k8s_api, kind, obj)
+
+        created = {'service': [], 'pod': [], 'rc': []}
+        failure = None
+        try:
+            for batch in ([('service', 'Service', obj) for obj in services],
+                          [('pod', 'Pod', obj) for obj in pods] +
+                          [('rc', 'ReplicationController', obj)
+                           for obj in rcs]):
+                for (key, kind, obj), err in zip(batch,
+                                                 pool.imap(create, batch)):
+                    if err is None:
+                        created[key].append(obj)
+                    elif failure is None:
+                        failure = err
+                if failure is not None:
+                    break
+        except Exception as err:
+            # The resources created so far are still saved below.
+            failure = failure or err
+
+        # call the objects to persist in db
+        try:
+            objects.Bay.create_k8s_resources(context, created)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                _delete_resources(k8s_api, created)
+        tracked = created['service'] + created['pod'] + created['rc']
+        if tracked:
+            self._track_bay(context, tracked[0])
+        if failure is not None:
+            raise _api_failure(failure)
+        return {'services': created['service'], 'pods': created['pod'],
+                'rcs': created['rc']}
+
     def service_update(self, context, service):
         LOG.debug("service_update %s", service.uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, service)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(service.manifest)
         try:
-            self.k8s_api.replaceService(name=service.name,
-                                        body=manifest,
-                                        namespaces='default')
+            _update_resource(k8s_api, 'Service', service, manifest)
         except error.HTTPError as err:
             message = ast.literal_eval(err.read())['message']
             raise exception.KubernetesAPIFailed(code=err.code, message=message)
         # call the service object to persist in db
         service.refresh(context)
+        service.applied_manifest = json.dumps(manifest)
         service.save()
+        self._track_bay(context, service)
         return service
 
     def service_delete(self, context, uuid):
         LOG.debug("service_delete %s", uuid)
         service = objects.Service.get_by_uuid(context, uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, service)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         if _object_has_stack(context, service):
             try:
-                self.k8s_api.deleteService(name=service.name,
-                                           namespaces='default')
+                k8s_api.deleteService(name=service.name,
+                                      namespaces='default')
             except error.HTTPError as err:
                 if err.code == 404:
                     pass
@@ -166,10 +720,10 @@ class Handler(object):
     def pod_create(self, context, pod):
         LOG.debug("pod_create")
         k8s_master_url = _retrieve_k8s_master_url(context, pod)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(pod.manifest)
         try:
-            resp = self.k8s_api.createPod(body=manifest, namespaces='default')
+            resp = k8s_api.createPod(body=manifest, namespaces='default')
         except error.HTTPError as err:
             pod.status = 'failed'
             if err.code != 409:
@@ -182,34 +736,37 @@ class Handler(object):
         # - extract pod name and set it
         # - extract pod labels and set it
         # When do we get pod labels and name?
+        pod.applied_manifest = json.dumps(manifest)
         pod.create(context)
+        self._track_bay(context, pod)
         return pod
 
     def pod_update(self, context, pod):
         LOG.debug("pod_update %s", pod.uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, pod)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(pod.manifest)
         try:
-            self.k8s_api.replacePod(name=pod.name, body=manifest,
-                                    namespaces='default')
+            _update_resource(k8s_api, 'Pod', pod, manifest)
         except error.HTTPError as err:
             message = ast.literal_eval(err.read())['message']
             raise exception.KubernetesAPIFailed(code=err.code, message=message)
         # call the pod object to persist in db
         pod.refresh(context)
+        pod.applied_manifest = json.dumps(manifest)
         pod.save()
+        self._track_bay(context, pod)
         return pod
 
     def pod_delete(self, context, uuid):
         LOG.debug("pod_delete %s", uuid)
         pod = objects.Pod.get_by_uuid(context, uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, pod)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         if _object_has_stack(context, pod):
             try:
-                self.k8s_api.deletePod(name=pod.name,
-                                       namespaces='default')
+                k8s_api.deletePod(name=pod.name,
+                                  namespaces='default')
             except error.HTTPError as err:
                 if err.code == 404:
                     pass
@@ -224,44 +781,67 @@ class Handler(object):
     def rc_create(self, context, rc):
         LOG.debug("rc_create")
         k8s_master_url = _retrieve_k8s_master_url(context, rc)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(rc.manifest)
         try:
-            self.k8s_api.createReplicationController(body=manifest,
-                                                     namespaces='default')
+            k8s_api.createReplicationController(body=manifest,
+                                                namespaces='default')
         except error.HTTPError as err:
             message = ast.literal_eval(err.read())['message']
             raise exception.KubernetesAPIFailed(code=err.code, message=message)
         # call the rc object to persist in db
+        rc.applied_manifest = json.dumps(manifest)
         rc.create(context)
+        self._track_bay(context, rc)
         return rc
 
     def rc_update(self, context, rc):
         LOG.debug("rc_update %s", rc.uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, rc)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         manifest = k8s_manifest.parse(rc.manifest)
         try:
-            self.k8s_api.replaceReplicationController(name=rc.name,
-                                                      body=manifest,
-                                                      namespaces='default')
+            _update_resource(k8s_api, 'ReplicationController', rc, manifest)
         except error.HTTPError as err:
             message = ast.literal_eval(err.read())['message']
             raise exception.KubernetesAPIFailed(code=err.code, message=message)
         # call the rc object to persist in db
         rc.refresh(context)
+        rc.applied_manifest = json.dumps(manifest)
+        rc.save()
+        self._track_bay(context, rc)
+        return rc
+
+    def rc_scale(self, context, uuid, replicas):
+        LOG.debug("rc_scale %(uuid)s to %(replicas)s",
+                  {'uuid': uuid, 'replicas': replicas})
+        rc = objects.ReplicationController.get_by_uuid(context, uuid)
+        k8s_master_url = _retrieve_k8s_master_url(context, rc)
+        k8s_api = self._k8s_apis.get(k8s_master_url)
+        try:
+            k8s_api.patchReplicationController(
+                name=rc.name, body={'spec': {'replicas': replicas}},
+                namespaces='default')
+        except error.HTTPError as err:
+            message = ast.literal_eval(err.read())['message']
+            raise exception.KubernetesAPIFailed(code=err.code, message=message)
+        # The applied manifest is left as it is: the manifest of the rc is
+        # not stored, so the next update patches the replicas only when its
+        # manifest changes them.
+        rc.replicas = replicas
         rc.save()
+        self._track_bay(context, rc)
         return rc
 
     def rc_delete(self, context, uuid):
         LOG.debug("rc_delete %s", uuid)
         rc = objects.ReplicationController.get_by_uuid(context, uuid)
         k8s_master_url = _retrieve_k8s_master_url(context, rc)
-        self.k8s_api = k8s_master_url
+        k8s_api = self._k8s_apis.get(k8s_master_url)
         if _object_has_stack(context, rc):
             try:
-                self.k8s_api.deleteReplicationController(name=rc.name,
-                                                         namespaces='default')
+                k8s_api.deleteReplicationController(name=rc.name,
+                                                    namespaces='default')
             except error.HTTPError as err:
                 if err.code == 404:
                     pass
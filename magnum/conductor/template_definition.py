@@ -12,12 +12,16 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import os
 import uuid
 
+from heatclient.common import template_utils
 from oslo_config import cfg
 from pkg_resources import iter_entry_points
 import requests
 import six
+from six.moves.urllib import parse as urlparse
+from six.moves.urllib import request as urlrequest
 
 from magnum.common import exception
 from magnum.i18n import _
@@ -131,11 +135,64 @@ class TemplateDefinition(object):
     '''
     definitions = None
     provides = list()
+    _template_cache = dict()
 
     def __init__(self):
         self.param_mappings = list()
         self.output_mappings = list()
 
+    @staticmethod
+    def _get_file_stamps(paths):
+        stamps = dict()
+        for path in paths:
+            stat = os.stat(path)
+            stamps[path] = (stat.st_mtime, stat.st_size)
+        return stamps
+
+    @classmethod
+    def get_template_contents(cls, template_path):
+        '''Returns the files and the parsed template of a Heat template.
+
+        The template is read and parsed, along with the files it refers
+        to, on first use. Later calls return the cached bundle as long as
+        neither the template nor any of its files changed on disk.
+
+        :param template_path: path of the Heat template.
+
+        :return: tuple of the dict of template files keyed by URL and the
+                 parsed template
+        '''
+        cached = cls._template_cache.get(template_path)
+        if cached is not None:
+            stamps, tpl_files, template = cached
+            try:
+                if cls._get_file_stamps(stamps) == stamps:
+                    return dict(tpl_files), template
+            except OSError:
+                pass
+
+        tpl_files, template = template_utils.get_template_contents(
+            template_path)
+
+        paths = [template_path]
+        for url in tpl_files:
+            url = urlparse.urlparse(url)
+            if url.scheme != 'file':
+                # Only files on disk can be checked for changes.
+                paths = None
+                break
+            paths.append(urlrequest.url2pathname(url.path))
+        try:
+            if paths is None:
+                raise OSError()
+            stamps = cls._get_file_stamps(paths)
+        except OSError:
+            cls._template_cache.pop(template_path, None)
+        else:
+            cls._template_cache[template_path] = (stamps, tpl_files, template)
+
+        return dict(tpl_files), template
+
     @staticmethod
     def load_entry_points():
         for entry_point in iter_entry_points('magnum.template_definitions'):
@@ -323,6 +323,22 @@ class Connection(object):
         :raises: BayNotFound
         """
 
+    @abc.abstractmethod
+    def get_containers_by_bay_uuid(self, bay_uuid):
+        """List all the containers for a given bay.
+
+        :param bay_uuid: The uuid of a bay.
+        :returns: A list of containers.
+        """
+
+    @abc.abstractmethod
+    def update_container_status(self, statuses):
+        """Update the status of several containers in one transaction.
+
+        :param statuses: A dict of the new status of each container, keyed
+                         by container uuid.
+        """
+
     @abc.abstractmethod
     def get_node_list(self, context, filters=None, limit=None,
                       marker=None, sort_key=None, sort_dir=None):
@@ -659,3 +675,25 @@ class Connection(object):
         :param rc_id: The id or uuid of a ReplicationController.
         :returns: A ReplicationController.
         """
+
+    @abc.abstractmethod
+    def create_k8s_resources(self, resources):
+        """Create k8s resources in one transaction.
+
+        :param resources: A dict of the lists of the values of the
+                          resources to create, keyed by kind of resource
+                          ('pod', 'service' or 'rc').
+        :returns: A dict of the lists of the created resources, keyed by
+                  kind of resource.
+        """
+
+    @abc.abstractmethod
+    def sync_k8s_resources(self, updates, deletes):
+        """Update and destroy k8s resources in one transaction.
+
+        :param updates: A dict of the values to update of each resource,
+                        keyed by kind of resource ('pod', 'service' or
+                        'rc') and then by uuid.
+        :param deletes: A dict of the uuids of the resources to destroy,
+                        keyed by kind of resource.
+        """
@@ -0,0 +1,31 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""add applied_manifest to pod, service and replicationcontroller
+
+Revision ID: 47380964133d
+Revises: 1c1ff5e56048
+Create Date: 2015-06-18 14:27:05.831617
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '47380964133d'
+down_revision = '1c1ff5e56048'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    for table in ('pod', 'service', 'replicationcontroller'):
+        op.add_column(table,
+                      sa.Column('applied_manifest', sa.Text, nullable=True))
@@ -486,6 +486,22 @@ class Connection(api.Connection):
 
         return self._do_update_container(container_id, values)
 
+    def get_containers_by_bay_uuid(self, bay_uuid):
+        query = model_query(models.Container).filter_by(bay_uuid=bay_uuid)
+        return query.all()
+
+    def update_container_status(self, statuses):
+        uuids_by_status = {}
+        for uuid, status in statuses.items():
+            uuids_by_status.setdefault(status, []).append(uuid)
+
+        session = get_session()
+        with session.begin():
+            for status, uuids in uuids_by_status.items():
+                query = model_query(models.Container, session=session)
+                query = query.filter(models.Container.uuid.in_(uuids))
+                query.update({'status': status}, synchronize_session=False)
+
     def _do_update_container(self, container_id, values):
         session = get_session()
         with session.begin():
@@ -914,3 +930,55 @@ class Connection(api.Connection):
 
             ref.update(values)
         return ref
+
+    _K8S_RESOURCE_MODELS = {
+        'pod': models.Pod,
+        'service': models.Service,
+        'rc': models.ReplicationController,
+    }
+
+    _K8S_RESOURCE_EXISTS = {
+        'pod': exception.PodAlreadyExists,
+        'service': exception.ServiceAlreadyExists,
+        'rc': exception.ReplicationControllerAlreadyExists,
+    }
+
+    def create_k8s_resources(self, resources):
+        created = {}
+        session = get_session()
+        with session.begin():
+            for kind, values_list in resources.items():
+                model = self._K8S_RESOURCE_MODELS[kind]
+                created[kind] = []
+                for values in values_list:
+                    # ensure defaults are present for new resources
+                    if not values.get('uuid'):
+                        values['uuid'] = utils.generate_uuid()
+
+                    ref = model()
+                    ref.update(values)
+                    session.add(ref)
+                    try:
+                        session.flush()
+                    except db_exc.DBDuplicateEntry:
+                        raise self._K8S_RESOURCE_EXISTS[kind](
+                            uuid=values['uuid'])
+                    created[kind].append(ref)
+        return created
+
+    def sync_k8s_resources(self, updates, deletes):
+        session = get_session()
+        with session.begin():
+            for kind, values_by_uuid in updates.items():
+                model = self._K8S_RESOURCE_MODELS[kind]
+                for uuid, values in values_by_uuid.items():
+                    query = model_query(model, session=session)
+                    query = query.filter_by(uuid=uuid)
+                    query.update(values, synchronize_session=False)
+            for kind, uuids in deletes.items():
+                if not uuids:
+                    continue
+                model = self._K8S_RESOURCE_MODELS[kind]
+                query = model_query(model, session=session)
+                query = query.filter(model.uuid.in_(uuids))
+                query.delete(synchronize_session=False)
@@ -171,6 +171,7 @@ class BayModel(Base):
     ssh_authorized_key = Column(Text)
     cluster_distro = Column(String(255))
     coe = Column(String(255))
+    prewarm_images = Column(JSONEncodedList)
 
 
 class Container(Base):
@@ -229,6 +230,7 @@ class Pod(Base):
     status = Column(String(255))
     project_id = Column(String(255))
     user_id = Column(String(255))
+    applied_manifest = Column(Text)
 
 
 class Service(Base):
@@ -249,6 +251,7 @@ class Service(Base):
     ports = Column(JSONEncodedList)
     project_id = Column(String(255))
     user_id = Column(String(255))
+    applied_manifest = Column(Text)
 
 
 class ReplicationController(Base):
@@ -269,3 +272,4 @@ class ReplicationController(Base):
     replicas = Column(Integer())
     project_id = Column(String(255))
     user_id = Column(String(255))
+    applied_manifest = Column(Text)
@@ -37,7 +37,9 @@ class Status(object):
 class Bay(base.MagnumPersistentObject, base.MagnumObject,
           base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add sync_k8s_resources
+    # Version 1.2: Add create_k8s_resources
+    VERSION = '1.2'
 
     dbapi = dbapi.get_instance()
 
@@ -142,6 +144,37 @@ class Bay(base.MagnumPersistentObject, base.MagnumObject,
                                          sort_dir=sort_dir)
         return Bay._from_db_object_list(db_bays, cls, context)
 
+    @base.remotable_classmethod
+    def sync_k8s_resources(cls, context, updates, deletes):
+        """Save the changes of the k8s resources of bays in one transaction.
+
+        :param context: Security context.
+        :param updates: a dict of the values to update of each resource,
+                        keyed by kind of resource ('pod', 'service' or
+                        'rc') and then by uuid.
+        :param deletes: a dict of the uuids of the resources to destroy,
+                        keyed by kind of resource.
+        """
+        cls.dbapi.sync_k8s_resources(updates, deletes)
+
+    @base.remotable_classmethod
+    def create_k8s_resources(cls, context, resources):
+        """Create the records of k8s resources of bays in one transaction.
+
+        :param context: Security context.
+        :param resources: a dict of the lists of the Pod, Service or
+                          ReplicationController objects to create, keyed
+                          by kind of resource ('pod', 'service' or 'rc').
+        :returns: the given dict, with its objects created.
+        """
+        values = dict((kind, [obj.obj_get_changes() for obj in objs])
+                      for kind, objs in resources.items())
+        db_resources = cls.dbapi.create_k8s_resources(values)
+        for kind, objs in resources.items():
+            for obj, db_obj in zip(objs, db_resources[kind]):
+                obj._from_db_object(obj, db_obj)
+        return resources
+
     @base.remotable
     def create(self, context=None):
         """Create a Bay record in the DB.
@@ -25,7 +25,8 @@ from magnum.objects import base
 class BayModel(base.MagnumPersistentObject, base.MagnumObject,
                base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Added prewarm_images field
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
 
@@ -47,6 +48,7 @@ class BayModel(base.MagnumPersistentObject, base.MagnumObject,
         'ssh_authorized_key': fields.StringField(nullable=True),
         'cluster_distro': fields.StringField(nullable=True),
         'coe': fields.StringField(nullable=True),
+        'prewarm_images': fields.ListOfStringsField(nullable=True),
     }
 
     @staticmethod
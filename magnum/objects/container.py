@@ -24,13 +24,16 @@ ERROR = 'Error'
 RUNNING = 'Running'
 STOPPED = 'Stopped'
 PAUSED = 'Paused'
+PULLING = 'Pulling'
 
 
 @base.MagnumObjectRegistry.register
 class Container(base.MagnumPersistentObject, base.MagnumObject,
                 base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add update_status
+    # Version 1.2: Add list_by_bay_uuid
+    VERSION = '1.2'
 
     dbapi = dbapi.get_instance()
 
@@ -115,6 +118,27 @@ class Container(base.MagnumPersistentObject, base.MagnumObject,
                                                      sort_dir=sort_dir)
         return Container._from_db_object_list(db_containers, cls, context)
 
+    @base.remotable_classmethod
+    def list_by_bay_uuid(cls, context, bay_uuid):
+        """Return a list of :class:`Container` objects of a given bay.
+
+        :param context: Security context.
+        :param bay_uuid: the uuid of a bay.
+        :returns: a list of :class:`Container` object.
+        """
+        db_containers = cls.dbapi.get_containers_by_bay_uuid(bay_uuid)
+        return Container._from_db_object_list(db_containers, cls, context)
+
+    @base.remotable_classmethod
+    def update_status(cls, context, statuses):
+        """Save the status of several containers in one transaction.
+
+        :param context: Security context.
+        :param statuses: a dict of the new status of each container, keyed
+                         by container uuid.
+        """
+        cls.dbapi.update_container_status(statuses)
+
     @base.remotable
     def create(self, context=None):
         """Create a Container record in the DB.
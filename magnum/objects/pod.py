@@ -23,7 +23,8 @@ from magnum.objects import base
 class Pod(base.MagnumPersistentObject, base.MagnumObject,
           base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add applied_manifest field
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
 
@@ -40,6 +41,7 @@ class Pod(base.MagnumPersistentObject, base.MagnumObject,
         'status': fields.StringField(nullable=True),
         'manifest_url': fields.StringField(nullable=True),
         'manifest': fields.StringField(nullable=True),
+        'applied_manifest': fields.StringField(nullable=True),
     }
 
     @staticmethod
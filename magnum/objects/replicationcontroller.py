@@ -22,7 +22,9 @@ from magnum.objects import base
 class ReplicationController(base.MagnumPersistentObject, base.MagnumObject,
                             base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add list_by_bay_uuid
+    # Version 1.2: Add applied_manifest field
+    VERSION = '1.2'
 
     dbapi = dbapi.get_instance()
 
@@ -38,6 +40,7 @@ class ReplicationController(base.MagnumPersistentObject, base.MagnumObject,
         'replicas': fields.IntegerField(nullable=True),
         'manifest_url': fields.StringField(nullable=True),
         'manifest': fields.StringField(nullable=True),
+        'applied_manifest': fields.StringField(nullable=True),
     }
 
     @staticmethod
@@ -99,6 +102,19 @@ class ReplicationController(base.MagnumPersistentObject, base.MagnumObject,
         rc = ReplicationController._from_db_object(cls(context), db_rc)
         return rc
 
+    @base.remotable_classmethod
+    def list_by_bay_uuid(cls, context, bay_uuid):
+        """Return a list of :class:`ReplicationController` objects
+        associated with a given bay.
+
+        :param bay_uuid: the uuid of a bay.
+        :param context: Security context
+        :returns: a list of class:`ReplicationController` object.
+        """
+        db_rcs = cls.dbapi.get_rcs_by_bay_uuid(bay_uuid)
+        return ReplicationController._from_db_object_list(db_rcs, cls,
+                                                          context)
+
     @base.remotable_classmethod
     def list(cls, context, limit=None, marker=None,
              sort_key=None, sort_dir=None):
@@ -24,7 +24,8 @@ from magnum.objects import fields as magnum_fields
 class Service(base.MagnumPersistentObject, base.MagnumObject,
               base.MagnumObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add applied_manifest field
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
 
@@ -41,6 +42,7 @@ class Service(base.MagnumPersistentObject, base.MagnumObject,
         'ports': magnum_fields.ListOfDictsField(nullable=True),
         'manifest_url': fields.StringField(nullable=True),
         'manifest': fields.StringField(nullable=True),
+        'applied_manifest': fields.StringField(nullable=True),
     }
 
     @staticmethod
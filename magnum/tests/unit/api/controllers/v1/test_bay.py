@@ -11,11 +11,13 @@
 #    limitations under the License.
 
 import datetime
+import json
 
 import mock
 from oslo_config import cfg
 from oslo_utils import timeutils
 from six.moves.urllib import parse as urlparse
+from webtest.app import AppError
 from wsme import types as wtypes
 
 from magnum.api.controllers.v1 import bay as api_bay
@@ -585,3 +587,173 @@ class TestDelete(api_base.FunctionalTest):
         self.assertEqual(409, response.status_int)
         self.assertEqual('application/json', response.content_type)
         self.assertTrue(response.json['error_message'])
+
+
+class TestPrewarmImages(api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestPrewarmImages, self).setUp()
+        self.baymodel = obj_utils.create_test_baymodel(self.context)
+        self.bay = obj_utils.create_test_bay(self.context)
+        p = mock.patch.object(rpcapi.API, 'bay_prewarm_images')
+        self.mock_bay_prewarm_images = p.start()
+        self.mock_bay_prewarm_images.return_value = {
+            'conductor': 'conductor-id', 'stream_id': 'stream-id'}
+        self.addCleanup(p.stop)
+        p = mock.patch.object(rpcapi.API, 'container_stream_read')
+        self.mock_stream_read = p.start()
+        self.addCleanup(p.stop)
+
+    def test_prewarm_images(self):
+        line = '{"node": "10.0.0.3", "image": "ubuntu", "error": null}\n'
+        self.mock_stream_read.side_effect = [
+            {'output': line, 'eof': False},
+            {'output': u'', 'eof': True}]
+
+        response = self.app.put_json(
+            '/v1/bays/%s/prewarm_images' % self.bay.uuid,
+            {'images': ['ubuntu']})
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('application/x-json-stream', response.content_type)
+        self.assertEqual(line.encode('utf-8'), response.body)
+        self.mock_bay_prewarm_images.assert_called_once_with(
+            self.bay.uuid, ['ubuntu'])
+
+    def test_prewarm_images_of_baymodel(self):
+        line = '{"node": "10.0.0.3", "image": "redis", "error": null}\n'
+        self.mock_stream_read.return_value = {'output': line, 'eof': True}
+
+        response = self.app.put('/v1/bays/%s/prewarm_images' % self.bay.name)
+
+        self.assertEqual(200, response.status_int)
+        self.mock_bay_prewarm_images.assert_called_once_with(
+            self.bay.uuid, None)
+
+    def test_prewarm_images_invalid(self):
+        response = self.app.put_json(
+            '/v1/bays/%s/prewarm_images' % self.bay.uuid,
+            {'images': 'ubuntu'}, expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.mock_bay_prewarm_images.called)
+
+    def test_prewarm_images_bay_not_found(self):
+        response = self.app.put(
+            '/v1/bays/%s/prewarm_images' % utils.generate_uuid(),
+            expect_errors=True)
+
+        self.assertEqual(404, response.status_int)
+        self.assertFalse(self.mock_bay_prewarm_images.called)
+
+    def test_prewarm_images_not_swarm(self):
+        baymodel = obj_utils.create_test_baymodel(
+            self.context, id=2, uuid=utils.generate_uuid(),
+            coe='kubernetes')
+        bay = obj_utils.create_test_bay(
+            self.context, id=2, uuid=utils.generate_uuid(), name='k8s_bay',
+            baymodel_id=baymodel.uuid)
+
+        response = self.app.put_json(
+            '/v1/bays/%s/prewarm_images' % bay.uuid,
+            {'images': ['ubuntu']}, expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.mock_bay_prewarm_images.called)
+
+
+class TestApplyManifest(api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestApplyManifest, self).setUp()
+        self.baymodel = obj_utils.create_test_baymodel(self.context)
+        self.bay = obj_utils.create_test_bay(self.context)
+        p = mock.patch.object(rpcapi.API, 'bay_apply_manifest')
+        self.mock_bay_apply_manifest = p.start()
+        self.mock_bay_apply_manifest.side_effect = self._simulate_rpc_apply
+        self.addCleanup(p.stop)
+
+    def _simulate_rpc_apply(self, bay_uuid, services, pods, rcs):
+        objects.Bay.create_k8s_resources(
+            self.context, {'service': services, 'pod': pods, 'rc': rcs})
+        return {'services': services, 'pods': pods, 'rcs': rcs}
+
+    def _manifest(self, kind, post_data):
+        manifest = json.loads(post_data['manifest'])
+        manifest['kind'] = kind
+        return manifest
+
+    def test_apply_manifest_list(self):
+        manifest = {'kind': 'List', 'items': [
+            self._manifest('ReplicationController',
+                           apiutils.rc_post_data()),
+            self._manifest('Service', apiutils.service_post_data())]}
+
+        response = self.put_json('/bays/%s/apply_manifest' % self.bay.uuid,
+                                 {'manifest': json.dumps(manifest)})
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(['test'],
+                         [service['name']
+                          for service in response.json['services']])
+        self.assertEqual([], response.json['pods'])
+        self.assertEqual(['name_of_rc'],
+                         [rc['name'] for rc in response.json['rcs']])
+        self.assertEqual(1, self.mock_bay_apply_manifest.call_count)
+        args, kwargs = self.mock_bay_apply_manifest.call_args
+        self.assertEqual((self.bay.uuid,), args)
+        self.assertEqual(self.bay.uuid, kwargs['services'][0].bay_uuid)
+        self.assertEqual(2, kwargs['rcs'][0].replicas)
+        self.assertEqual(manifest['items'][0],
+                         json.loads(kwargs['rcs'][0].manifest))
+
+    def test_apply_manifest_yaml_documents(self):
+        documents = [self._manifest('Pod', apiutils.pod_post_data()),
+                     self._manifest('Service', apiutils.service_post_data())]
+        manifest = '\n---\n'.join(json.dumps(document)
+                                  for document in documents)
+
+        response = self.put_json('/bays/%s/apply_manifest' % self.bay.name,
+                                 {'manifest': manifest})
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(['name_of_pod'],
+                         [pod['name'] for pod in response.json['pods']])
+        self.assertEqual(1, len(response.json['services']))
+        pod = objects.Pod.get_by_uuid(self.context,
+                                      response.json['pods'][0]['uuid'])
+        self.assertEqual(self.bay.uuid, pod.bay_uuid)
+
+    def test_apply_manifest_unsupported_kind(self):
+        manifest = {'kind': 'List', 'items': [
+            self._manifest('Service', apiutils.service_post_data()),
+            {'kind': 'Namespace', 'metadata': {'name': 'test'}}]}
+
+        response = self.put_json('/bays/%s/apply_manifest' % self.bay.uuid,
+                                 {'manifest': json.dumps(manifest)},
+                                 expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertTrue(response.json['error_message'])
+        self.assertFalse(self.mock_bay_apply_manifest.called)
+
+    def test_apply_manifest_invalid_manifest(self):
+        response = self.put_json('/bays/%s/apply_manifest' % self.bay.uuid,
+                                 {'manifest': 'wrong manifest'},
+                                 expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.mock_bay_apply_manifest.called)
+
+    def test_apply_manifest_bay_not_found(self):
+        response = self.put_json(
+            '/bays/%s/apply_manifest' % utils.generate_uuid(),
+            {'manifest': 'kind: Pod'}, expect_errors=True)
+
+        self.assertEqual(404, response.status_int)
+        self.assertFalse(self.mock_bay_apply_manifest.called)
+
+    def test_apply_manifest_only_put(self):
+        self.assertRaises(AppError, self.get_json,
+                          '/bays/%s/apply_manifest' % self.bay.uuid)
+        self.assertFalse(self.mock_bay_apply_manifest.called)
@@ -10,6 +10,8 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import json
+
 from magnum import objects
 from magnum.tests.unit.db import base as db_base
 from magnum.tests.unit.db import utils
@@ -45,13 +47,32 @@ class TestContainerController(db_base.DbTestCase):
         self.assertEqual(response.status_int, 201)
         self.assertTrue(mock_container_create.called)
 
-    @patch('magnum.conductor.api.API.container_show')
+    @patch('magnum.conductor.api.API.container_create')
+    @patch('magnum.conductor.api.API.container_run')
+    def test_run_container(self, mock_container_run, mock_container_create):
+        mock_container_run.side_effect = lambda x, y, z: z
+
+        params = ('{"name": "My Docker", "image_id": "ubuntu",'
+                  '"command": "env",'
+                  '"bay_uuid": "fff114da-3bfa-4a0f-a123-c0dffad9718e"}')
+        response = self.app.post('/v1/containers/run',
+                                 params=params,
+                                 content_type='application/json')
+
+        self.assertEqual(response.status_int, 201)
+        self.assertEqual('My Docker', response.json['name'])
+        container = objects.Container.list(self.context)[0]
+        mock_container_run.assert_called_once_with(
+            'My Docker', container.uuid, mock.ANY)
+        self.assertFalse(mock_container_create.called)
+
+    @patch('magnum.conductor.api.API.container_show_many')
     @patch('magnum.conductor.api.API.container_create')
     @patch('magnum.conductor.api.API.container_delete')
     def test_create_container_with_command(self,
                                            mock_container_delete,
                                            mock_container_create,
-                                           mock_container_show):
+                                           mock_container_show_many):
         mock_container_create.side_effect = lambda x, y, z: z
         # Create a container with a command
         params = ('{"name": "My Docker", "image_id": "ubuntu",'
@@ -64,7 +85,7 @@ class TestContainerController(db_base.DbTestCase):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        mock_container_show_many.return_value = [container]
         response = self.app.get('/v1/containers')
         self.assertEqual(response.status_int, 200)
         self.assertEqual(1, len(response.json))
@@ -83,13 +104,13 @@ class TestContainerController(db_base.DbTestCase):
         self.assertEqual(0, len(c))
         self.assertTrue(mock_container_create.called)
 
-    @patch('magnum.conductor.api.API.container_show')
+    @patch('magnum.conductor.api.API.container_show_many')
     @patch('magnum.conductor.api.API.container_create')
     @patch('magnum.conductor.api.API.container_delete')
     def test_create_container_with_bay_uuid(self,
                                             mock_container_delete,
                                             mock_container_create,
-                                            mock_container_show):
+                                            mock_container_show_many):
         mock_container_create.side_effect = lambda x, y, z: z
         # Create a container with a command
         params = ('{"name": "My Docker", "image_id": "ubuntu",'
@@ -102,7 +123,7 @@ class TestContainerController(db_base.DbTestCase):
         # get all containers
         container = objects.Container.list(self.context)[0]
         container.status = 'Stopped'
-        mock_container_show.return_value = container
+        mock_container_show_many.return_value = [container]
         response = self.app.get('/v1/containers')
         self.assertEqual(response.status_int, 200)
         self.assertEqual(1, len(response.json))
@@ -140,14 +161,14 @@ class TestContainerController(db_base.DbTestCase):
                           params=params, content_type='application/json')
         self.assertTrue(mock_container_create.not_called)
 
-    @patch('magnum.conductor.api.API.container_show')
+    @patch('magnum.conductor.api.API.container_show_many')
     @patch('magnum.objects.Container.list')
     def test_get_all_containers(self, mock_container_list,
-                                mock_container_show):
+                                mock_container_show_many):
         test_container = utils.get_test_container()
         containers = [objects.Container(self.context, **test_container)]
         mock_container_list.return_value = containers
-        mock_container_show.return_value = containers[0]
+        mock_container_show_many.return_value = containers
 
         response = self.app.get('/v1/containers')
 
@@ -358,6 +379,119 @@ class TestContainerController(db_base.DbTestCase):
                           '/v1/containers/%s/logs' % container_uuid)
         self.assertFalse(mock_container_logs.called)
 
+    @patch('magnum.conductor.api.API.container_stream_close')
+    @patch('magnum.conductor.api.API.container_stream_read')
+    @patch('magnum.conductor.api.API.container_logs_stream')
+    @patch('magnum.objects.Container.get_by_uuid')
+    def test_stream_logs_by_uuid(self, mock_get_by_uuid,
+                                 mock_container_logs_stream,
+                                 mock_container_stream_read,
+                                 mock_container_stream_close):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+        stream = {'conductor': 'conductor-id', 'stream_id': 'stream-id'}
+        mock_container_logs_stream.return_value = stream
+        mock_container_stream_read.side_effect = [
+            {'output': u'line1\n', 'eof': False},
+            {'output': u'', 'eof': False},
+            {'output': u'line2\n', 'eof': True}]
+
+        container_uuid = test_container.get('uuid')
+        response = self.app.get('/v1/containers/%s/stream_logs'
+                                '?tail=10&follow=true' % container_uuid)
+
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual('text/plain', response.content_type)
+        self.assertEqual(b'line1\nline2\n', response.body)
+        mock_container_logs_stream.assert_called_once_with(
+            container_uuid, 10, None, True)
+        mock_container_stream_read.assert_called_with(stream)
+        self.assertFalse(mock_container_stream_close.called)
+
+    @patch('magnum.conductor.api.API.container_logs_stream')
+    @patch('magnum.objects.Container.get_by_uuid')
+    def test_stream_logs_with_invalid_tail(self, mock_get_by_uuid,
+                                           mock_container_logs_stream):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+
+        container_uuid = test_container.get('uuid')
+        response = self.app.get('/v1/containers/%s/stream_logs?tail=-1'
+                                % container_uuid, expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(mock_container_logs_stream.called)
+
+    @patch('magnum.conductor.api.API.container_stream_close')
+    @patch('magnum.conductor.api.API.container_stream_read')
+    @patch('magnum.conductor.api.API.container_logs_stream')
+    @patch('magnum.objects.Container.get_by_uuid')
+    def test_stream_logs_since(self, mock_get_by_uuid,
+                               mock_container_logs_stream,
+                               mock_container_stream_read,
+                               mock_container_stream_close):
+        self.config(docker_remote_api_version='1.19', group='docker')
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+        mock_container_stream_read.return_value = {'output': u'line\n',
+                                                   'eof': True}
+
+        container_uuid = test_container.get('uuid')
+        response = self.app.get('/v1/containers/%s/stream_logs'
+                                '?tail=0&since=100' % container_uuid)
+
+        self.assertEqual(response.status_int, 200)
+        mock_container_logs_stream.assert_called_once_with(
+            container_uuid, 0, 100, False)
+
+    @patch('magnum.conductor.api.API.container_logs_stream')
+    @patch('magnum.objects.Container.get_by_uuid')
+    def test_stream_logs_since_with_old_api_version(
+            self, mock_get_by_uuid, mock_container_logs_stream):
+        self.config(docker_remote_api_version='1.18', group='docker')
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+
+        container_uuid = test_container.get('uuid')
+        response = self.app.get('/v1/containers/%s/stream_logs?since=100'
+                                % container_uuid, expect_errors=True)
+
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(mock_container_logs_stream.called)
+
+    @patch('magnum.conductor.api.API.container_stream_close')
+    @patch('magnum.conductor.api.API.container_stream_read')
+    @patch('magnum.conductor.api.API.container_execute_stream')
+    @patch('magnum.objects.Container.get_by_uuid')
+    def test_stream_execute_by_uuid(self, mock_get_by_uuid,
+                                    mock_container_execute_stream,
+                                    mock_container_stream_read,
+                                    mock_container_stream_close):
+        test_container = utils.get_test_container()
+        test_container_obj = objects.Container(self.context, **test_container)
+        mock_get_by_uuid.return_value = test_container_obj
+        stream = {'conductor': 'conductor-id', 'stream_id': 'stream-id'}
+        mock_container_execute_stream.return_value = stream
+        mock_container_stream_read.side_effect = [
+            {'output': u'total 0\n', 'eof': False},
+            {'output': u'', 'eof': True, 'exit_code': 0}]
+
+        container_uuid = test_container.get('uuid')
+        response = self.app.put('/v1/containers/%s/stream_execute'
+                                % container_uuid, {'command': 'ls'})
+
+        self.assertEqual(response.status_int, 200)
+        self.assertEqual([{'output': 'total 0\n'}, {'exit_code': 0}],
+                         [json.loads(line)
+                          for line in response.body.splitlines()])
+        mock_container_execute_stream.assert_called_once_with(
+            container_uuid, 'ls')
+        self.assertFalse(mock_container_stream_close.called)
+
     @patch('magnum.conductor.api.API.container_execute')
     @patch('magnum.objects.Container.get_by_uuid')
     def test_execute_command_by_uuid(self, mock_get_by_uuid,
@@ -389,6 +523,65 @@ class TestContainerController(db_base.DbTestCase):
         self.assertEqual(response.status_int, 200)
         mock_container_execute.assert_called_one_with(container_uuid, cmd)
 
+    @patch('magnum.conductor.api.API.container_action_many')
+    def test_container_action(self, mock_container_action_many):
+        container1 = utils.create_test_container(
+            name='container1', uuid='a1b2c3d4-0000-4000-8000-000000000001')
+        container2 = utils.create_test_container(
+            name='container2', uuid='a1b2c3d4-0000-4000-8000-000000000002')
+        mock_container_action_many.return_value = [
+            {'uuid': container1.uuid, 'status': 'Stopped', 'error': None},
+            {'uuid': container2.uuid, 'status': 'Running',
+             'error': 'Docker API Error'}]
+        missing_uuid = 'a1b2c3d4-0000-4000-8000-000000000003'
+
+        response = self.app.post_json(
+            '/v1/containers/action',
+            {'action': 'stop',
+             'containers': [container1.uuid, missing_uuid, 'container2']})
+
+        self.assertEqual(200, response.status_int)
+        uuids, action = mock_container_action_many.call_args[0]
+        self.assertEqual('stop', action)
+        self.assertEqual(set([container1.uuid, container2.uuid]), set(uuids))
+        results = response.json['results']
+        self.assertEqual([container1.uuid, missing_uuid, 'container2'],
+                         [result['container'] for result in results])
+        self.assertEqual('Stopped', results[0]['status'])
+        self.assertIsNone(results[0]['error'])
+        self.assertIn(missing_uuid, results[1]['error'])
+        self.assertEqual(container2.uuid, results[2]['uuid'])
+        self.assertEqual('Docker API Error', results[2]['error'])
+
+    @patch('magnum.conductor.api.API.container_action_many')
+    def test_container_action_delete(self, mock_container_action_many):
+        container1 = utils.create_test_container(
+            name='container1', uuid='a1b2c3d4-0000-4000-8000-000000000001')
+        container2 = utils.create_test_container(
+            name='container2', uuid='a1b2c3d4-0000-4000-8000-000000000002')
+        mock_container_action_many.return_value = [
+            {'uuid': container1.uuid, 'status': None, 'error': None},
+            {'uuid': container2.uuid, 'status': 'Running',
+             'error': 'Docker API Error'}]
+
+        response = self.app.post_json(
+            '/v1/containers/action',
+            {'action': 'delete',
+             'containers': [container1.uuid, container2.uuid]})
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual([container2.uuid],
+                         [c.uuid for c in objects.Container.list(
+                             self.context)])
+
+    def test_container_action_with_invalid_action(self):
+        response = self.app.post_json(
+            '/v1/containers/action',
+            {'action': 'explode',
+             'containers': ['a1b2c3d4-0000-4000-8000-000000000001']},
+            expect_errors=True)
+        self.assertEqual(400, response.status_int)
+
     @patch('magnum.conductor.api.API.container_delete')
     @patch('magnum.objects.Container.get_by_uuid')
     def test_delete_container_by_uuid(self, mock_get_by_uuid,
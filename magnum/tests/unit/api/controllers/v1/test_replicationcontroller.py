@@ -16,6 +16,7 @@ import mock
 from oslo_config import cfg
 from oslo_utils import timeutils
 from six.moves.urllib import parse as urlparse
+from webtest.app import AppError
 from wsme import types as wtypes
 
 from magnum.api.controllers.v1 import replicationcontroller as api_rc
@@ -492,3 +493,58 @@ class TestDelete(api_base.FunctionalTest):
         self.assertEqual(409, response.status_int)
         self.assertEqual('application/json', response.content_type)
         self.assertTrue(response.json['error_message'])
+
+
+class TestScale(api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestScale, self).setUp()
+        obj_utils.create_test_bay(self.context)
+        self.rc = obj_utils.create_test_rc(self.context)
+        p = mock.patch.object(rpcapi.API, 'rc_scale')
+        self.mock_rc_scale = p.start()
+        self.mock_rc_scale.side_effect = self._simulate_rpc_rc_scale
+        self.addCleanup(p.stop)
+
+    def _simulate_rpc_rc_scale(self, rc_uuid, replicas):
+        rc = objects.ReplicationController.get_by_uuid(self.context, rc_uuid)
+        rc.replicas = replicas
+        rc.save()
+        return rc
+
+    def test_scale_rc(self):
+        response = self.put_json('/rcs/%s/scale' % self.rc.uuid,
+                                 {'replicas': 5})
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(5, response.json['replicas'])
+        self.mock_rc_scale.assert_called_once_with(self.rc.uuid, 5)
+
+    def test_scale_rc_by_name(self):
+        response = self.put_json('/rcs/%s/scale' % self.rc.name,
+                                 {'replicas': 0})
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(0, response.json['replicas'])
+        self.mock_rc_scale.assert_called_once_with(self.rc.uuid, 0)
+
+    def test_scale_rc_negative_replicas(self):
+        response = self.put_json('/rcs/%s/scale' % self.rc.uuid,
+                                 {'replicas': -1}, expect_errors=True)
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.mock_rc_scale.called)
+
+    def test_scale_rc_no_replicas(self):
+        response = self.put_json('/rcs/%s/scale' % self.rc.uuid,
+                                 {}, expect_errors=True)
+        self.assertEqual(400, response.status_int)
+        self.assertFalse(self.mock_rc_scale.called)
+
+    def test_scale_rc_not_found(self):
+        response = self.put_json('/rcs/%s/scale' % utils.generate_uuid(),
+                                 {'replicas': 5}, expect_errors=True)
+        self.assertEqual(404, response.status_int)
+        self.assertFalse(self.mock_rc_scale.called)
+
+    def test_scale_rc_only_put(self):
+        self.assertRaises(AppError, self.get_json,
+                          '/rcs/%s/scale' % self.rc.uuid)
+        self.assertFalse(self.mock_rc_scale.called)
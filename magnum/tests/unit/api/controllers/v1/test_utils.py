@@ -85,3 +85,32 @@ class TestApiUtils(base.FunctionalTest):
         self.assertRaises(exception.Conflict,
                           utils.get_openstack_resource,
                           fake_manager, 'fake_resource', 'fake_resource_type')
+
+    def test_relay_stream(self):
+        rpcapi = mock.MagicMock()
+        rpcapi.container_stream_read.side_effect = [
+            {'output': 'a', 'eof': False}, {'output': '', 'eof': False},
+            {'output': 'b', 'eof': True}]
+
+        body = list(utils.relay_stream(rpcapi, mock.sentinel.stream,
+                                       lambda chunk: chunk['output']))
+
+        self.assertEqual(['a', 'b'], body)
+        self.assertFalse(rpcapi.container_stream_close.called)
+
+    @mock.patch.object(utils, 'time')
+    def test_relay_stream_ends_when_quiet(self, mock_time):
+        CONF.set_override('stream_quiet_timeout', 60, group='api')
+        mock_time.time.side_effect = [0, 10, 30, 50, 75, 135]
+        rpcapi = mock.MagicMock()
+        rpcapi.container_stream_read.side_effect = [
+            {'output': 'a', 'eof': False}, {'output': '', 'eof': False},
+            {'output': 'b', 'eof': False}, {'output': '', 'eof': False},
+            {'output': '', 'eof': False}]
+
+        body = list(utils.relay_stream(rpcapi, mock.sentinel.stream,
+                                       lambda chunk: chunk['output']))
+
+        self.assertEqual(['a', 'b'], body)
+        rpcapi.container_stream_close.assert_called_once_with(
+            mock.sentinel.stream)
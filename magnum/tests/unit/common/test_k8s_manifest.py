@@ -80,3 +80,86 @@ class K8sManifestTestCase(base.TestCase):
         invalid_str = "}invalid: y'm'l3!"
 
         self.assertRaises(ValueError, k8s_manifest.parse, invalid_str)
+
+    def test_parse_all_with_yaml_documents(self):
+        yaml_str = ('kind: Service\n'
+                    'metadata:\n'
+                    '  name: redis-master\n'
+                    '---\n'
+                    '---\n'
+                    'kind: Pod\n'
+                    'metadata:\n'
+                    '  name: redis-master\n')
+
+        manifests = k8s_manifest.parse_all(yaml_str)
+        self.assertEqual(['Service', 'Pod'],
+                         [manifest['kind'] for manifest in manifests])
+
+    def test_parse_all_with_list(self):
+        json_str = '''{
+          "kind": "List",
+          "items": [
+            {"kind": "Service", "metadata": {"name": "redis-master"}},
+            {"kind": "ReplicationController",
+             "metadata": {"name": "redis-master"}}
+          ]
+        }'''
+
+        manifests = k8s_manifest.parse_all(json_str)
+        self.assertEqual(['Service', 'ReplicationController'],
+                         [manifest['kind'] for manifest in manifests])
+
+    def test_parse_all_with_json_documents(self):
+        json_str = '{"kind": "Service"}\n---\n{"kind": "Pod"}\n'
+
+        manifests = k8s_manifest.parse_all(json_str)
+        self.assertEqual([{'kind': 'Service'}, {'kind': 'Pod'}], manifests)
+
+    def test_parse_all_single_manifest(self):
+        manifests = k8s_manifest.parse_all('kind: Pod')
+        self.assertEqual([{'kind': 'Pod'}], manifests)
+
+    def test_parse_all_empty_value(self):
+        self.assertRaises(ValueError, k8s_manifest.parse_all, '')
+        self.assertRaises(ValueError, k8s_manifest.parse_all, '---\n---\n')
+        self.assertRaises(ValueError, k8s_manifest.parse_all,
+                          '{"kind": "List", "items": []}')
+
+    def test_parse_all_invalid_value(self):
+        self.assertRaises(ValueError, k8s_manifest.parse_all,
+                          'kind: Pod\n---\n- not a mapping\n')
+        self.assertRaises(ValueError, k8s_manifest.parse_all,
+                          '{"kind": "List", "items": [1]}')
+        self.assertRaises(ValueError, k8s_manifest.parse_all,
+                          "}invalid: y'm'l3!")
+
+    def test_merge_patch(self):
+        original = {'metadata': {'name': 'rc1', 'labels': {'app': 'web'}},
+                    'spec': {'replicas': 2,
+                             'template': {'spec': {'containers': [
+                                 {'name': 'web', 'image': 'nginx:1.7'}]}}}}
+        manifest = {'metadata': {'name': 'rc1'},
+                    'spec': {'replicas': 5,
+                             'template': {'spec': {'containers': [
+                                 {'name': 'web', 'image': 'nginx:1.9'}]}}}}
+
+        patch = k8s_manifest.merge_patch(original, manifest)
+
+        self.assertEqual(
+            {'metadata': {'labels': None},
+             'spec': {'replicas': 5,
+                      'template': {'spec': {'containers': [
+                          {'name': 'web', 'image': 'nginx:1.9'}]}}}},
+            patch)
+
+    def test_merge_patch_unchanged(self):
+        manifest = {'metadata': {'name': 'pod1'}, 'spec': {'containers': []}}
+        self.assertEqual({}, k8s_manifest.merge_patch(manifest,
+                                                      dict(manifest)))
+
+    def test_merge_patch_with_null(self):
+        self.assertIsNone(k8s_manifest.merge_patch(
+            {'metadata': {'name': 'pod1'}},
+            {'metadata': {'name': 'pod1', 'labels': None}}))
+        self.assertIsNone(k8s_manifest.merge_patch(
+            {'spec': {}}, {'spec': {'ports': [{'name': None}]}}))
@@ -0,0 +1,70 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import eventlet
+from eventlet import event
+import mock
+
+from magnum.common import rpc_service
+from magnum.tests import base
+
+
+class FakeHandler(object):
+    target = None
+
+    def __init__(self):
+        self.event = event.Event()
+
+    def bay_create(self, context):
+        return self.event.wait()
+
+    def container_show(self, context):
+        return 'shown'
+
+
+class TestConcurrencyLimiter(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestConcurrencyLimiter, self).setUp()
+        self.handler = FakeHandler()
+        self.limiter = rpc_service.ConcurrencyLimiter({'bay_create': '1'})
+        self.wrapped = self.limiter.wrap(self.handler)
+
+    def test_wrap_passes_through_attributes(self):
+        self.assertIsNone(self.wrapped.target)
+        self.assertEqual('shown', self.wrapped.container_show({}))
+        self.assertFalse(hasattr(self.wrapped, 'no_such_method'))
+
+    def test_method_limit(self):
+        first = eventlet.spawn(self.wrapped.bay_create, {})
+        second = eventlet.spawn(self.wrapped.bay_create, {})
+        eventlet.sleep(0)
+        self.assertEqual({'in_flight': 1, 'queued': 1},
+                         self.limiter.stats())
+
+        # Calls of methods without a limit are not held up.
+        self.assertEqual('shown', self.wrapped.container_show({}))
+
+        self.handler.event.send('created')
+        self.assertEqual('created', first.wait())
+        self.assertEqual('created', second.wait())
+        self.assertEqual({'in_flight': 0, 'queued': 0},
+                         self.limiter.stats())
+
+    def test_call_releases_slot_on_error(self):
+        func = mock.Mock(side_effect=ValueError)
+        self.assertRaises(ValueError, self.limiter.call, 'bay_create', func)
+        self.assertEqual({'in_flight': 0, 'queued': 0},
+                         self.limiter.stats())
+        func.side_effect = None
+        func.return_value = 'created'
+        self.assertEqual('created', self.limiter.call('bay_create', func))
@@ -0,0 +1,65 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+from oslo_config import cfg
+
+from magnum.common import service
+from magnum.tests import base
+
+
+class TestWSGIService(base.BaseTestCase):
+
+    @mock.patch.object(service.eventlet, 'listen')
+    def test_workers_set_by_config(self, mock_listen):
+        cfg.CONF.set_override('workers', 8, group='api')
+        server = service.WSGIService('magnum_api', mock.sentinel.app,
+                                     '127.0.0.1', 9511)
+        self.assertEqual(8, server.workers)
+        mock_listen.assert_called_once_with(('127.0.0.1', 9511),
+                                            backlog=cfg.CONF.api.backlog)
+
+    @mock.patch.object(service.processutils, 'get_worker_count')
+    @mock.patch.object(service.eventlet, 'listen')
+    def test_workers_default_to_cpu_count(self, mock_listen,
+                                          mock_get_worker_count):
+        mock_get_worker_count.return_value = 4
+        server = service.WSGIService('magnum_api', mock.sentinel.app,
+                                     '127.0.0.1', 9511)
+        self.assertEqual(4, server.workers)
+
+    @mock.patch.object(service.eventlet, 'spawn')
+    @mock.patch.object(service.eventlet, 'listen')
+    def test_start(self, mock_listen, mock_spawn):
+        server = service.WSGIService('magnum_api', mock.sentinel.app,
+                                     '127.0.0.1', 9511)
+        server.start()
+        args, kwargs = mock_spawn.call_args
+        self.assertEqual((service.wsgi.server, mock_listen.return_value,
+                          mock.sentinel.app), args)
+        self.assertTrue(kwargs['keepalive'])
+        self.assertEqual(cfg.CONF.api.client_socket_timeout,
+                         kwargs['socket_timeout'])
+
+    @mock.patch.object(service.eventlet, 'spawn')
+    @mock.patch.object(service.eventlet, 'listen')
+    def test_stop_and_wait(self, mock_listen, mock_spawn):
+        server = service.WSGIService('magnum_api', mock.sentinel.app,
+                                     '127.0.0.1', 9511)
+        server._pool = mock.MagicMock()
+        server.start()
+        server.stop()
+        server.wait()
+        server._pool.resize.assert_called_once_with(0)
+        mock_spawn.return_value.kill.assert_called_once_with()
+        server._pool.waitall.assert_called_once_with()
+        mock_spawn.return_value.wait.assert_called_once_with()
@@ -0,0 +1,251 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import StringIO
+import urllib2
+
+import mock
+import requests
+
+from magnum.common.pythonk8sclient.client import swagger
+from magnum.tests import base
+
+
+def _response(status_code=200, body='{}'):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.reason = 'reason'
+    response.headers = {'Content-Type': 'application/json'}
+    response.raw = StringIO.StringIO(body)
+    return response
+
+
+class TestSessionTransport(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestSessionTransport, self).setUp()
+        self.session = mock.MagicMock()
+        self.transport = swagger.SessionTransport(session=self.session,
+                                                  timeout=(5, 30),
+                                                  retries=3, backoff=0.5)
+        p = mock.patch.object(swagger.time, 'sleep')
+        self.mock_sleep = p.start()
+        self.addCleanup(p.stop)
+
+    def test_request(self):
+        self.session.request.return_value = _response(
+            body='{"kind": "Pod"}')
+
+        headers, data = self.transport.request('GET', 'http://k8s/pods',
+                                               {}, None)
+
+        self.assertEqual({'kind': 'Pod'}, data)
+        self.assertEqual({'Content-Type': 'application/json'}, headers)
+        self.session.request.assert_called_once_with(
+            'GET', 'http://k8s/pods', headers={}, data=None,
+            timeout=(5, 30), stream=True)
+        self.assertFalse(self.mock_sleep.called)
+
+    def test_request_without_body(self):
+        self.session.request.return_value = _response(body='')
+
+        headers, data = self.transport.request('PUT', 'http://k8s/pods/p1',
+                                               {}, '{}')
+
+        self.assertIsNone(data)
+
+    def test_request_retries_connection_error(self):
+        self.session.request.side_effect = [requests.ConnectionError(),
+                                            _response(body='{"kind": "Pod"}')]
+
+        headers, data = self.transport.request('GET', 'http://k8s/pods',
+                                               {}, None)
+
+        self.assertEqual({'kind': 'Pod'}, data)
+        self.assertEqual(2, self.session.request.call_count)
+        self.mock_sleep.assert_called_once_with(0.5)
+
+    def test_request_backoff(self):
+        self.session.request.side_effect = [requests.Timeout(),
+                                            requests.ConnectionError(),
+                                            _response(status_code=503),
+                                            _response()]
+
+        self.transport.request('DELETE', 'http://k8s/pods/p1', {}, None)
+
+        self.assertEqual(4, self.session.request.call_count)
+        self.assertEqual([mock.call(0.5), mock.call(1.0), mock.call(2.0)],
+                         self.mock_sleep.call_args_list)
+
+    def test_request_gives_up_after_last_retry(self):
+        self.session.request.side_effect = requests.ConnectionError()
+
+        self.assertRaises(requests.ConnectionError,
+                          self.transport.request,
+                          'GET', 'http://k8s/pods', {}, None)
+        self.assertEqual(4, self.session.request.call_count)
+        self.assertEqual(3, self.mock_sleep.call_count)
+
+    def test_request_not_retried_when_not_idempotent(self):
+        self.session.request.side_effect = requests.ConnectionError()
+
+        self.assertRaises(requests.ConnectionError,
+                          self.transport.request,
+                          'POST', 'http://k8s/pods', {}, '{}')
+        self.assertEqual(1, self.session.request.call_count)
+        self.assertFalse(self.mock_sleep.called)
+
+    def test_request_client_error(self):
+        self.session.request.return_value = _response(
+            status_code=404, body='{"message": "not found"}')
+
+        err = self.assertRaises(urllib2.HTTPError,
+                                self.transport.request,
+                                'GET', 'http://k8s/pods/p1', {}, None)
+
+        self.assertEqual(404, err.code)
+        self.assertEqual('{"message": "not found"}', err.read())
+        # Client errors are not retried.
+        self.assertEqual(1, self.session.request.call_count)
+
+    def test_request_server_error_after_last_retry(self):
+        self.session.request.side_effect = [
+            _response(status_code=503, body='{"message": "unavailable"}')
+            for i in range(4)]
+
+        err = self.assertRaises(urllib2.HTTPError,
+                                self.transport.request,
+                                'GET', 'http://k8s/pods', {}, None)
+
+        self.assertEqual(503, err.code)
+        self.assertEqual('{"message": "unavailable"}', err.read())
+        self.assertEqual(4, self.session.request.call_count)
+
+    def test_stream(self):
+        response = _response()
+        response.iter_lines.return_value = ['{"type": "ADDED"}', '',
+                                            '{"type": "DELETED"}']
+        self.session.request.return_value = response
+
+        events = self.transport.stream('GET', 'http://k8s/pods?watch=true',
+                                       {}, None)
+
+        self.assertEqual([{'type': 'ADDED'}, {'type': 'DELETED'}],
+                         list(events))
+        response.close.assert_called_once_with()
+
+
+class TestDeserialize(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestDeserialize, self).setUp()
+        self.client = swagger.ApiClient('http://k8s')
+
+    def test_deserialize_list_of_models(self):
+        pods = self.client.deserialize(
+            [{'name': 'pod1', 'labels': {'app': 'web'}}, {'name': 'pod2'}],
+            'list[V1beta3_Pod]')
+
+        self.assertEqual(['pod1', 'pod2'], [pod.name for pod in pods])
+        self.assertIsInstance(pods[0], swagger.V1beta3_Pod.V1beta3_Pod)
+        self.assertIsNone(pods[1].labels)
+
+    def test_deserialize_nested_models(self):
+        pod_list = self.client.deserialize(
+            {'kind': 'PodList',
+             'items': [{'name': 'pod1',
+                        'spec': {'hostNetwork': True,
+                                 'containers': [
+                                     {'name': 'web', 'image': 'nginx',
+                                      'command': ['nginx', '-g'],
+                                      'ports': [{'containerPort': '80'}]}]}}]},
+            'V1beta3_PodList')
+
+        self.assertEqual('PodList', pod_list.kind)
+        spec = pod_list.items[0].spec
+        self.assertIsInstance(spec, swagger.V1beta3_PodSpec.V1beta3_PodSpec)
+        self.assertTrue(spec.hostNetwork)
+        container = spec.containers[0]
+        self.assertIsInstance(container,
+                              swagger.V1beta3_Container.V1beta3_Container)
+        self.assertEqual('nginx', container.image)
+        self.assertEqual(['nginx', '-g'], container.command)
+        self.assertEqual(80, container.ports[0].containerPort)
+        self.assertIsNone(spec.volumes)
+
+    def test_deserialize_scalars(self):
+        self.assertEqual(80, self.client.deserialize('80', 'int'))
+        self.assertEqual('80', self.client.deserialize(80, 'str'))
+        self.assertEqual(1.5, self.client.deserialize('1.5', float))
+        self.assertTrue(self.client.deserialize(1, 'bool'))
+
+        pod = self.client.deserialize({'name': u'p\xf6d', 'uid': 12},
+                                      'V1beta3_Pod')
+        self.assertEqual(u'p\xf6d', pod.name)
+        self.assertEqual('12', pod.uid)
+
+    def test_deserialize_datetime(self):
+        mock_dateutil = mock.MagicMock()
+        with mock.patch.dict('sys.modules',
+                             {'dateutil': mock_dateutil,
+                              'dateutil.parser': mock_dateutil.parser}):
+            result = self.client.deserialize('2015-06-01T10:00:00Z',
+                                             'datetime')
+
+        mock_dateutil.parser.parse.assert_called_once_with(
+            '2015-06-01T10:00:00Z')
+        self.assertEqual(mock_dateutil.parser.parse.return_value, result)
+
+    def test_deserialize_any(self):
+        labels = {'app': 'web', 'tier': ['frontend']}
+
+        self.assertIs(labels, self.client.deserialize(labels, 'any'))
+        pod = self.client.deserialize({'labels': labels}, 'V1beta3_Pod')
+        self.assertIs(labels, pod.labels)
+        self.assertEqual(labels, self.client.deserialize(labels, 'dict'))
+
+    def test_deserialize_raw_responses(self):
+        client = swagger.ApiClient('http://k8s', rawResponses=True)
+        response = {'kind': 'Pod', 'name': 'pod1'}
+
+        self.assertIs(response, client.deserialize(response, 'V1beta3_Pod'))
+
+    def test_deserialize_unknown_model(self):
+        self.assertRaises(ValueError, self.client.deserialize, {},
+                          'V1beta3_NoSuchModel')
+
+    def test_plans_are_cached_per_model(self):
+        pod_class = swagger.V1beta3_Pod.V1beta3_Pod
+        port_class = swagger.V1beta3_ContainerPort.V1beta3_ContainerPort
+
+        self.assertEqual(('list', ('model', pod_class)),
+                         swagger.ApiClient.getTypePlan('list[V1beta3_Pod]'))
+        self.assertIs(swagger.ApiClient.getTypePlan('list[V1beta3_Pod]'),
+                      swagger.ApiClient.getTypePlan('list[V1beta3_Pod]'))
+
+        pod_plan = swagger.ApiClient.getModelPlan(pod_class)
+        port_plan = swagger.ApiClient.getModelPlan(port_class)
+        self.assertIs(pod_plan, swagger.ApiClient.getModelPlan(pod_class))
+        self.assertEqual(sorted(pod_class().swaggerTypes),
+                         sorted(attr for attr, key, plan in pod_plan))
+        self.assertEqual(sorted(port_class().swaggerTypes),
+                         sorted(attr for attr, key, plan in port_plan))
+        self.assertIn(('containerPort', 'containerPort', ('scalar', int)),
+                      port_plan)
+
+        # Deserializing one model after the other uses the plan of each.
+        pod = self.client.deserialize({'name': 'pod1'}, 'V1beta3_Pod')
+        port = self.client.deserialize({'name': 'http', 'hostPort': '8080'},
+                                       'V1beta3_ContainerPort')
+        self.assertEqual('pod1', pod.name)
+        self.assertEqual(8080, port.hostPort)
+        self.assertFalse(hasattr(port, 'spec'))
@@ -144,6 +144,50 @@ class DockerClientTestCase(base.BaseTestCase):
         mock_raise_for_status.assert_called_once_with(
             mock_post.return_value)
 
+    @mock.patch.object(docker_py_client.Client,
+                       '_multiplexed_response_stream_helper')
+    @mock.patch.object(docker_py_client.Client, '_raise_for_status')
+    @mock.patch.object(docker_py_client.Client, '_get')
+    @mock.patch.object(docker_py_client.Client, '_url')
+    def test_logs_stream(self, mock_url, mock_get, mock_raise_for_status,
+                         mock_stream_helper):
+        mock_stream_helper.return_value = iter(['line1\n', 'line2\n'])
+        client = docker_client.DockerHTTPClient()
+
+        frames = client.logs_stream('someid', tail=10, since=100,
+                                    follow=True)
+
+        mock_url.assert_called_once_with('/containers/someid/logs')
+        mock_get.assert_called_once_with(
+            mock_url.return_value,
+            params={'stdout': 1, 'stderr': 1, 'follow': 1, 'tail': 10,
+                    'since': 100},
+            stream=True)
+        mock_raise_for_status.assert_called_once_with(
+            mock_get.return_value)
+        self.assertEqual(['line1\n', 'line2\n'], list(frames))
+        mock_get.return_value.close.assert_called_once_with()
+
+    @mock.patch.object(docker_py_client.Client,
+                       '_multiplexed_response_stream_helper')
+    @mock.patch.object(docker_py_client.Client, '_raise_for_status')
+    @mock.patch.object(docker_py_client.Client, '_post_json')
+    @mock.patch.object(docker_py_client.Client, '_url')
+    def test_exec_start_stream(self, mock_url, mock_post_json,
+                               mock_raise_for_status, mock_stream_helper):
+        mock_stream_helper.return_value = iter(['output'])
+        client = docker_client.DockerHTTPClient()
+
+        frames = client.exec_start_stream({'Id': 'someid'})
+
+        mock_url.assert_called_once_with('/exec/someid/start')
+        mock_post_json.assert_called_once_with(
+            mock_url.return_value, data={'Tty': False, 'Detach': False},
+            stream=True)
+        mock_raise_for_status.assert_called_once_with(
+            mock_post_json.return_value)
+        self.assertEqual(['output'], list(frames))
+
     @mock.patch.object(docker_py_client.Client, 'attach')
     def test_get_container_logs(self, mock_attach):
         client = docker_client.DockerHTTPClient()
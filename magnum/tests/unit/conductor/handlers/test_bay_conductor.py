@@ -12,9 +12,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
 from heatclient import exc
+import oslo_messaging as messaging
 
 from magnum.common import exception
+from magnum.common import rpc_service
 from magnum.conductor.handlers import bay_conductor
 from magnum import objects
 from magnum.objects.bay import Status as bay_status
@@ -667,18 +670,37 @@ class TestBayConductorWithK8s(base.TestCase):
         # to process normally
         poller.poll_and_check()
 
+    def _max_wait(self):
+        return (cfg.CONF.bay_heat.max_attempts *
+                cfg.CONF.bay_heat.wait_interval)
+
+    @patch('magnum.conductor.handlers.bay_conductor.time.time')
+    def test_poll_delete_in_progress_max_wait_boundary(self, mock_time):
+        mock_time.return_value = 1000
+        mock_heat_stack, bay, poller = self.setup_poll_test()
+        mock_heat_stack.stack_status = bay_status.DELETE_IN_PROGRESS
+        # Many more polls than max_attempts fit in the wait once the
+        # intervals back off; only the time spent polling counts.
+        poller.attempts = cfg.CONF.bay_heat.max_attempts * 10
+
+        mock_time.return_value = 1000 + self._max_wait() - 1
+        poller.poll_and_check()
+
+        mock_time.return_value = 1000 + self._max_wait()
+        self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
+
     def test_poll_delete_in_progress_max_attempts_reached(self):
         mock_heat_stack, bay, poller = self.setup_poll_test()
 
         mock_heat_stack.stack_status = bay_status.DELETE_IN_PROGRESS
-        poller.attempts = cfg.CONF.bay_heat.max_attempts
+        poller.started_at -= self._max_wait()
         self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
 
     def test_poll_create_in_prog_max_att_reached_no_timeout(self):
         mock_heat_stack, bay, poller = self.setup_poll_test()
 
         mock_heat_stack.stack_status = bay_status.CREATE_IN_PROGRESS
-        poller.attempts = cfg.CONF.bay_heat.max_attempts
+        poller.started_at -= self._max_wait()
         mock_heat_stack.timeout_mins = None
         self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
 
@@ -686,7 +708,7 @@ class TestBayConductorWithK8s(base.TestCase):
         mock_heat_stack, bay, poller = self.setup_poll_test()
 
         mock_heat_stack.stack_status = bay_status.CREATE_IN_PROGRESS
-        poller.attempts = cfg.CONF.bay_heat.max_attempts
+        poller.started_at -= self._max_wait()
         mock_heat_stack.timeout_mins = 60
         # since the timeout is set the max attempts gets ignored since
         # the timeout will eventually stop the poller either when
@@ -697,7 +719,7 @@ class TestBayConductorWithK8s(base.TestCase):
         mock_heat_stack, bay, poller = self.setup_poll_test()
 
         mock_heat_stack.stack_status = bay_status.CREATE_FAILED
-        poller.attempts = cfg.CONF.bay_heat.max_attempts
+        poller.started_at -= self._max_wait()
         mock_heat_stack.timeout_mins = 60
         self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
 
@@ -722,6 +744,323 @@ class TestBayConductorWithK8s(base.TestCase):
         mock_heat_stack.timeout_mins = 60
         self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
 
+    def test_poll_status_change_resets_schedule(self):
+        mock_heat_stack, bay, poller = self.setup_poll_test()
+        poller.schedule = mock.MagicMock()
+        bay.status = bay_status.CREATE_IN_PROGRESS
+        mock_heat_stack.stack_status = bay_status.CREATE_IN_PROGRESS
+
+        poller.poll_and_check()
+        poller.poll_and_check()
+        self.assertEqual(1, poller.schedule.reset.call_count)
+
+        mock_heat_stack.stack_status = bay_status.CREATE_FAILED
+        self.assertRaises(loopingcall.LoopingCallDone, poller.poll_and_check)
+        self.assertEqual(2, poller.schedule.reset.call_count)
+
+    def test_poll_listed_stack(self):
+        mock_heat_stack, bay, poller = self.setup_poll_test()
+        listed_stack = mock.MagicMock()
+        listed_stack.stack_status = bay_status.CREATE_IN_PROGRESS
+        bay.status = bay_status.CREATE_IN_PROGRESS
+
+        poller.poll_and_check(listed_stack)
+
+        heat = poller.openstack_client.heat.return_value
+        self.assertFalse(heat.stacks.get.called)
+        self.assertEqual(poller.attempts, 1)
+
+    def test_poll_listed_stack_complete_fetches_outputs(self):
+        mock_heat_stack, bay, poller = self.setup_poll_test()
+        listed_stack = mock.MagicMock()
+        listed_stack.stack_status = bay_status.CREATE_COMPLETE
+        mock_heat_stack.stack_status = bay_status.CREATE_COMPLETE
+
+        with patch.object(bay_conductor,
+                          '_update_stack_outputs') as mock_update_outputs:
+            self.assertRaises(loopingcall.LoopingCallDone,
+                              poller.poll_and_check, listed_stack)
+            mock_update_outputs.assert_called_once_with(
+                poller.context, mock_heat_stack, bay)
+
+
+class TestPollSchedule(base.BaseTestCase):
+
+    def test_next_interval_backs_off(self):
+        schedule = bay_conductor.PollSchedule(1, 10, backoff=2)
+        intervals = [schedule.next_interval() for i in range(6)]
+        self.assertEqual([1, 2, 4, 8, 10, 10], intervals)
+
+    def test_reset(self):
+        schedule = bay_conductor.PollSchedule(1, 10, backoff=2)
+        schedule.next_interval()
+        schedule.next_interval()
+        schedule.reset()
+        self.assertEqual(1, schedule.next_interval())
+
+    def test_jitter(self):
+        schedule = bay_conductor.PollSchedule(10, 10, jitter=0.5)
+        for i in range(20):
+            interval = schedule.next_interval()
+            self.assertTrue(5 <= interval <= 15)
+
+    def test_for_operation_with_notifications(self):
+        cfg.CONF.set_override('enable_notifications', True,
+                              group='bay_heat')
+        schedule = bay_conductor.PollSchedule.for_operation('create')
+        self.assertEqual(cfg.CONF.bay_heat.notification_max_wait_interval,
+                         schedule.max_interval)
+
+    def test_for_operation(self):
+        cfg.CONF.set_override('wait_interval', 2, group='bay_heat')
+        cfg.CONF.set_override('delete_max_wait_interval', 7,
+                              group='bay_heat')
+        schedule = bay_conductor.PollSchedule.for_operation('delete')
+        self.assertEqual(2, schedule.initial_interval)
+        self.assertEqual(7, schedule.max_interval)
+        self.assertEqual(cfg.CONF.bay_heat.wait_interval_backoff,
+                         schedule.backoff)
+        self.assertEqual(cfg.CONF.bay_heat.wait_interval_jitter,
+                         schedule.jitter)
+
+
+class TestStackPoller(base.TestCase):
+
+    def setUp(self):
+        super(TestStackPoller, self).setUp()
+        self.stack_poller = bay_conductor.StackPoller()
+        self.stack_poller._timer = mock.MagicMock()
+        self.heat = mock.MagicMock()
+
+    def _make_poller(self, stack_id, project_id='project', attempts=1):
+        poller = mock.MagicMock()
+        poller.bay.stack_id = stack_id
+        poller.context.project_id = project_id
+        poller.openstack_client.heat.return_value = self.heat
+        poller.attempts = attempts
+        poller.next_poll = 0
+        poller.schedule.next_interval.return_value = 5
+        self.stack_poller.add(poller)
+        return poller
+
+    def _make_stack(self, stack_id):
+        stack = mock.MagicMock()
+        stack.id = stack_id
+        return stack
+
+    @patch.object(loopingcall, 'DynamicLoopingCall')
+    def test_add_starts_single_timer(self, mock_looping_call):
+        self.stack_poller._timer = None
+        self._make_poller('stack1')
+        self._make_poller('stack2')
+        mock_looping_call.assert_called_once_with(f=self.stack_poller.poll)
+        mock_looping_call.return_value.start.assert_called_once_with(
+            initial_delay=cfg.CONF.bay_heat.wait_interval,
+            periodic_interval_max=cfg.CONF.bay_heat.wait_interval)
+
+    @patch.object(bay_conductor, '_ts')
+    def test_poll_only_due_pollers(self, mock_ts):
+        mock_ts.return_value = 100
+        poller1 = self._make_poller('stack1')
+        poller2 = self._make_poller('stack2')
+        poller2.next_poll = 103
+        stack1 = self._make_stack('stack1')
+        self.heat.stacks.list.return_value = [stack1]
+
+        idle = self.stack_poller.poll()
+
+        self.heat.stacks.list.assert_called_once_with(
+            filters={'id': ['stack1']}, show_deleted=True)
+        poller1.poll_and_check.assert_called_once_with(stack1)
+        self.assertFalse(poller2.poll_and_check.called)
+        self.assertEqual(105, poller1.next_poll)
+        self.assertEqual(3, idle)
+
+    def test_poll_lists_stacks_once(self):
+        poller1 = self._make_poller('stack1')
+        poller2 = self._make_poller('stack2')
+        stack1 = self._make_stack('stack1')
+        stack2 = self._make_stack('stack2')
+        self.heat.stacks.list.return_value = [stack1, stack2]
+
+        self.stack_poller.poll()
+
+        self.assertEqual(1, self.heat.stacks.list.call_count)
+        kwargs = self.heat.stacks.list.call_args[1]
+        self.assertEqual(set(['stack1', 'stack2']),
+                         set(kwargs['filters']['id']))
+        self.assertTrue(kwargs['show_deleted'])
+        poller1.poll_and_check.assert_called_once_with(stack1)
+        poller2.poll_and_check.assert_called_once_with(stack2)
+
+    def test_poll_batches_by_project_and_size(self):
+        cfg.CONF.set_override('poll_batch_size', 2, group='bay_heat')
+        for i in range(3):
+            self._make_poller('stack%d' % i, project_id='project1')
+        self._make_poller('stack3', project_id='project2')
+        self.heat.stacks.list.return_value = []
+
+        self.stack_poller.poll()
+
+        self.assertEqual(3, self.heat.stacks.list.call_count)
+
+    def test_poll_new_poller_fetches_stack(self):
+        poller = self._make_poller('stack1', attempts=0)
+
+        self.stack_poller.poll()
+
+        self.assertFalse(self.heat.stacks.list.called)
+        poller.poll_and_check.assert_called_once_with(None)
+
+    def test_poll_missing_stack_fetches_stack(self):
+        poller = self._make_poller('stack1')
+        self.heat.stacks.list.return_value = []
+
+        self.stack_poller.poll()
+
+        poller.poll_and_check.assert_called_once_with(None)
+
+    def test_poll_removes_done_pollers(self):
+        poller1 = self._make_poller('stack1')
+        poller2 = self._make_poller('stack2')
+        poller1.poll_and_check.side_effect = loopingcall.LoopingCallDone()
+        poller2.poll_and_check.side_effect = ValueError()
+        self.heat.stacks.list.return_value = []
+
+        self.assertRaises(loopingcall.LoopingCallDone,
+                          self.stack_poller.poll)
+        self.assertIsNone(self.stack_poller._timer)
+
+    def test_update(self):
+        poller = self._make_poller('stack1')
+        stack = self._make_stack('stack1')
+
+        self.assertTrue(self.stack_poller.update(stack))
+        self.assertFalse(self.stack_poller.update(
+            self._make_stack('stack2')))
+
+        poller.poll_and_check.assert_called_once_with(stack)
+
+    def test_poll_skips_poller_finished_while_listing(self):
+        poller1 = self._make_poller('stack1')
+        poller2 = self._make_poller('stack2')
+        stack1 = self._make_stack('stack1')
+        stack2 = self._make_stack('stack2')
+        poller1.poll_and_check.side_effect = loopingcall.LoopingCallDone()
+
+        def list_stacks(**kwargs):
+            # Notifications are handled while Heat is being called.
+            self.stack_poller.update(stack1)
+            replacement = self._make_poller('stack2')
+            self.assertIsNot(poller2, replacement)
+            return [stack1, stack2]
+        self.heat.stacks.list.side_effect = list_stacks
+
+        self.stack_poller.poll()
+
+        poller1.poll_and_check.assert_called_once_with(stack1)
+        self.assertFalse(poller2.poll_and_check.called)
+
+    def test_update_new_poller_fetches_stack(self):
+        poller = self._make_poller('stack1', attempts=0)
+
+        self.stack_poller.update(self._make_stack('stack1'))
+
+        poller.poll_and_check.assert_called_once_with(None)
+
+    def test_poll_list_failure_keeps_pollers(self):
+        poller = self._make_poller('stack1')
+        self.heat.stacks.list.side_effect = exc.HTTPInternalServerError
+
+        self.stack_poller.poll()
+
+        self.assertFalse(poller.poll_and_check.called)
+        self.stack_poller.poll()
+        self.assertEqual(2, self.heat.stacks.list.call_count)
+
+    def test_poll_client_failure_keeps_pollers(self):
+        poller = self._make_poller('stack1')
+        poller.openstack_client.heat.side_effect = (
+            exception.AuthorizationFailure(client='heat', message='fail'))
+
+        self.stack_poller.poll()
+
+        self.assertFalse(poller.poll_and_check.called)
+        self.assertIn('stack1', self.stack_poller._pollers)
+
+    def test_poll_failure_keeps_polling(self):
+        poller = self._make_poller('stack1')
+        self.heat.stacks.list.return_value = []
+
+        with patch.object(self.stack_poller, '_poll',
+                          side_effect=ValueError()):
+            self.assertEqual(cfg.CONF.bay_heat.wait_interval,
+                             self.stack_poller.poll())
+        self.assertIsNotNone(self.stack_poller._timer)
+        self.stack_poller.poll()
+        poller.poll_and_check.assert_called_once_with(None)
+
+
+class TestHeatNotificationEndpoint(base.TestCase):
+
+    def setUp(self):
+        super(TestHeatNotificationEndpoint, self).setUp()
+        self.stack_poller = mock.MagicMock()
+        self.endpoint = bay_conductor.HeatNotificationEndpoint(
+            self.stack_poller)
+        self.payload = {
+            'stack_identity': 'arn:openstack:heat::tenant:stacks/bay1/'
+                              'c8e44e2b-3aee-4b67-8ad7-7a8b0a1f9b1c',
+            'stack_name': 'bay1',
+            'state': bay_status.CREATE_FAILED,
+            'state_reason': 'Create failed',
+        }
+
+    def test_info(self):
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end',
+                           self.payload, {})
+        stack = self.stack_poller.update.call_args[0][0]
+        self.assertEqual('c8e44e2b-3aee-4b67-8ad7-7a8b0a1f9b1c', stack.id)
+        self.assertEqual(bay_status.CREATE_FAILED, stack.stack_status)
+        self.assertEqual('Create failed', stack.stack_status_reason)
+
+    def test_error(self):
+        self.endpoint.error({}, 'orchestration.host',
+                            'orchestration.stack.create.error',
+                            self.payload, {})
+        self.assertTrue(self.stack_poller.update.called)
+
+    def test_ignore_other_events(self):
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.autoscaling.start',
+                           self.payload, {})
+        self.endpoint.info({}, 'orchestration.host',
+                           'orchestration.stack.create.end',
+                           {'stack_name': 'bay1'}, {})
+        self.assertFalse(self.stack_poller.update.called)
+
+    def test_notifications_from_message_bus(self):
+        transport = messaging.get_transport(cfg.CONF, 'fake:')
+        listener = rpc_service.NotificationListener(
+            ['notifications'], None, [self.endpoint],
+            executor='eventlet', transport=transport)
+        listener.start()
+        self.addCleanup(listener.wait)
+        self.addCleanup(listener.stop)
+
+        notifier = messaging.Notifier(transport, 'orchestration.host',
+                                      driver='messaging',
+                                      topic='notifications')
+        notifier.info({}, 'orchestration.stack.create.end', self.payload)
+        for i in range(100):
+            if self.stack_poller.update.called:
+                break
+            eventlet.sleep(0.01)
+
+        stack = self.stack_poller.update.call_args[0][0]
+        self.assertEqual('c8e44e2b-3aee-4b67-8ad7-7a8b0a1f9b1c', stack.id)
+
 
 class TestHandler(db_base.DbTestCase):
 
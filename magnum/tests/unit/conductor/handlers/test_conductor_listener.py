@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import mock
+
 from magnum.conductor.handlers import conductor_listener
 from magnum.tests import base
 
@@ -22,3 +24,13 @@ class TestHandler(base.BaseTestCase):
 
     def test_ping_conductor(self):
         self.assertEqual(self.handler.ping_conductor({}), True)
+
+    def test_conductor_stats(self):
+        limiter = mock.MagicMock()
+        limiter.stats.return_value = {'in_flight': 2, 'queued': 1}
+        handler = conductor_listener.Handler(limiter)
+        self.assertEqual({'in_flight': 2, 'queued': 1},
+                         handler.conductor_stats({}))
+
+    def test_conductor_stats_without_limiter(self):
+        self.assertEqual({}, self.handler.conductor_stats({}))
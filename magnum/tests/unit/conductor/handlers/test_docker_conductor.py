@@ -11,10 +11,14 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import json
+
 import docker
 from docker import errors
+import eventlet
 import mock
 from oslo_config import cfg
+import requests
 
 from magnum.common import exception
 from magnum.conductor.handlers import docker_conductor
@@ -30,6 +34,7 @@ class TestDockerConductor(base.BaseTestCase):
     def setUp(self):
         super(TestDockerConductor, self).setUp()
         self.conductor = docker_conductor.Handler()
+        self.addCleanup(docker_conductor.Handler._docker_clients.clear)
 
     @mock.patch.object(docker_conductor, 'docker_client')
     def test_docker_for_bay(self, mock_docker_client):
@@ -46,6 +51,93 @@ class TestDockerConductor(base.BaseTestCase):
                 CONF.docker.default_timeout)
         mock_docker_client.DockerHTTPClient.assert_called_once_with(*args)
 
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_docker_for_bay_reuses_client(self, mock_docker_client):
+        mock_bay = mock.MagicMock()
+        mock_bay.api_address = '1.1.1.1'
+        other_bay = mock.MagicMock()
+        other_bay.api_address = '2.2.2.2'
+
+        docker1 = self.conductor._docker_for_bay(mock_bay)
+        docker2 = self.conductor._docker_for_bay(other_bay)
+
+        self.assertIs(docker1, self.conductor._docker_for_bay(mock_bay))
+        self.assertEqual(2, mock_docker_client.DockerHTTPClient.call_count)
+        self.assertFalse(docker1.ping.called)
+        self.assertFalse(docker2.close.called)
+
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_docker_for_bay_evicts_least_recently_used(self,
+                                                       mock_docker_client):
+        CONF.set_override('client_pool_size', 1, group='docker')
+        self.addCleanup(CONF.clear_override, 'client_pool_size',
+                        group='docker')
+        mock_docker_client.DockerHTTPClient.side_effect = (
+            lambda *args: mock.MagicMock())
+        mock_bay = mock.MagicMock()
+        mock_bay.api_address = '1.1.1.1'
+        other_bay = mock.MagicMock()
+        other_bay.api_address = '2.2.2.2'
+
+        docker1 = self.conductor._docker_for_bay(mock_bay)
+        self.conductor._docker_clients.release(docker1)
+        self.conductor._docker_for_bay(other_bay)
+
+        docker1.close.assert_called_once_with()
+        self.assertIsNot(docker1, self.conductor._docker_for_bay(mock_bay))
+
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_docker_for_bay_evicts_client_in_use(self, mock_docker_client):
+        CONF.set_override('client_pool_size', 1, group='docker')
+        self.addCleanup(CONF.clear_override, 'client_pool_size',
+                        group='docker')
+        mock_docker_client.DockerHTTPClient.side_effect = (
+            lambda *args: mock.MagicMock())
+        mock_bay = mock.MagicMock()
+        mock_bay.api_address = '1.1.1.1'
+        other_bay = mock.MagicMock()
+        other_bay.api_address = '2.2.2.2'
+        pool = self.conductor._docker_clients
+
+        docker1 = self.conductor._docker_for_bay(mock_bay)
+        self.assertIs(docker1, self.conductor._docker_for_bay(mock_bay))
+        docker2 = self.conductor._docker_for_bay(other_bay)
+
+        # Both calls that checked out docker1 are still using it.
+        self.assertFalse(docker1.close.called)
+        pool.release(docker1)
+        self.assertFalse(docker1.close.called)
+        pool.release(docker1)
+        docker1.close.assert_called_once_with()
+        pool.release(docker2)
+        self.assertFalse(docker2.close.called)
+
+    @mock.patch('time.time')
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_docker_for_bay_checks_unused_client(self, mock_docker_client,
+                                                 mock_time):
+        mock_docker_client.DockerHTTPClient.side_effect = (
+            lambda *args: mock.MagicMock())
+        mock_bay = mock.MagicMock()
+        mock_bay.api_address = '1.1.1.1'
+        pool = self.conductor._docker_clients
+        mock_time.return_value = 1000
+        docker1 = self.conductor._docker_for_bay(mock_bay)
+        pool.release(docker1)
+
+        mock_time.return_value = 1000 + CONF.docker.client_check_interval + 1
+        self.assertIs(docker1, self.conductor._docker_for_bay(mock_bay))
+        docker1.ping.assert_called_once_with()
+
+        mock_time.return_value += CONF.docker.client_check_interval + 1
+        docker1.ping.side_effect = Exception('connection refused')
+        docker2 = self.conductor._docker_for_bay(mock_bay)
+        self.assertIsNot(docker1, docker2)
+        # The replaced client is closed once the call using it is done.
+        self.assertFalse(docker1.close.called)
+        pool.release(docker1)
+        docker1.close.assert_called_once_with()
+
     @mock.patch.object(docker_conductor, 'docker_client')
     @mock.patch.object(docker_conductor.objects.Bay, 'get_by_uuid')
     def test_get_docker_client(self, mock_bay_get_by_uuid,
@@ -88,6 +180,7 @@ class TestDockerConductor(base.BaseTestCase):
 
         mock_container = mock.MagicMock()
         mock_container.uuid = '8e48ffb1-754d-4f21-bdd0-1a39bf796389'
+        mock_container.name = 'name'
         mock_container.bay_uuid = '9fb6c41e-a7e4-48b8-97c4-702b26034b8e'
         mock_container_get_by_uuid.return_value = mock_container
 
@@ -95,6 +188,8 @@ class TestDockerConductor(base.BaseTestCase):
                                                          mock_container.uuid)
 
         self.assertEqual(mock_docker, actual_docker)
+        self.assertEqual({mock_container.uuid: 'name'},
+                         self.conductor._docker_names)
 
         args = ('tcp://1.1.1.1:2376', CONF.docker.docker_remote_api_version,
                 CONF.docker.default_timeout)
@@ -129,6 +224,72 @@ class TestDockerConductor(base.BaseTestCase):
             command=None)
         self.assertEqual(obj_container.STOPPED, container.status)
 
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_run(self, mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.create_container.return_value = {'Id': 'some-id'}
+
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+        mock_container.command = None
+
+        container = self.conductor.container_run(
+            None, 'some-name', 'some-uuid', mock_container)
+
+        mock_get_docker_client.assert_called_once_with(None, mock_container)
+        mock_docker.create_container.assert_called_once_with(
+            mock_container.image_id,
+            name='some-name',
+            hostname='some-uuid',
+            command=None)
+        mock_docker.start.assert_called_once_with('some-id')
+        self.assertFalse(mock_docker.list_instances.called)
+        self.assertEqual(obj_container.RUNNING, container.status)
+        mock_container.save.assert_called_once_with()
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_run_with_failure(self, mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.create_container.return_value = {'Id': 'some-id'}
+        mock_docker.start.side_effect = errors.APIError('Error', '', '')
+
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+
+        self.assertRaises(exception.ContainerException,
+                          self.conductor.container_run,
+                          None, 'some-name', 'some-uuid', mock_container)
+        self.assertEqual(obj_container.ERROR, mock_container.status)
+        mock_container.save.assert_called_once_with()
+
+    @mock.patch.object(docker_conductor.eventlet, 'spawn_n')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_run_with_async_pull(self, mock_get_docker_client,
+                                           mock_spawn_n):
+        CONF.set_override('async_image_pull', True, group='docker')
+        self.addCleanup(CONF.clear_override, 'async_image_pull',
+                        group='docker')
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.create_container.return_value = {'Id': 'some-id'}
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+
+        container = self.conductor.container_run(
+            None, 'some-name', 'some-uuid', mock_container)
+
+        self.assertEqual(obj_container.PULLING, container.status)
+        mock_spawn_n.assert_called_once_with(
+            self.conductor._pull_and_create, mock_docker, 'some-name',
+            'some-uuid', mock_container, True)
+
+        self.conductor._pull_and_create(mock_docker, 'some-name',
+                                        'some-uuid', mock_container, True)
+        mock_docker.start.assert_called_once_with('some-id')
+        self.assertEqual(obj_container.RUNNING, container.status)
+
     @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
     def test_container_create_with_command(self, mock_get_docker_client):
         mock_docker = mock.MagicMock()
@@ -153,6 +314,95 @@ class TestDockerConductor(base.BaseTestCase):
             command='env')
         self.assertEqual(obj_container.STOPPED, container.status)
 
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_create_with_present_image(self,
+                                                 mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.images.return_value = [
+            {'RepoTags': ['test_image:some_tag']}]
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+        mock_container.bay_uuid = 'bay-uuid'
+
+        for i in range(2):
+            container = self.conductor.container_create(
+                None, 'some-name', 'some-uuid', mock_container)
+
+        mock_docker.images.assert_called_once_with()
+        self.assertFalse(mock_docker.pull.called)
+        self.assertEqual(2, mock_docker.create_container.call_count)
+        self.assertEqual(obj_container.STOPPED, container.status)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_create_with_removed_image(self,
+                                                 mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.images.return_value = [
+            {'RepoTags': ['test_image:latest']}]
+        fake_response = mock.MagicMock()
+        fake_response.status_code = 404
+        mock_docker.create_container.side_effect = [
+            errors.APIError('not_found', fake_response), {'Id': 'some-id'}]
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image'
+
+        container = self.conductor.container_create(
+            None, 'some-name', 'some-uuid', mock_container)
+
+        mock_docker.pull.assert_called_once_with('test_image', tag=None)
+        self.assertEqual(2, mock_docker.create_container.call_count)
+        self.assertEqual(obj_container.STOPPED, container.status)
+        self.assertEqual('some-id', self.conductor._docker_ids['some-uuid'])
+
+    @mock.patch.object(docker_conductor.eventlet, 'spawn_n')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_create_with_async_pull(self, mock_get_docker_client,
+                                              mock_spawn_n):
+        CONF.set_override('async_image_pull', True, group='docker')
+        self.addCleanup(CONF.clear_override, 'async_image_pull',
+                        group='docker')
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+
+        container = self.conductor.container_create(
+            None, 'some-name', 'some-uuid', mock_container)
+
+        self.assertEqual(obj_container.PULLING, container.status)
+        mock_container.save.assert_called_once_with()
+        self.assertFalse(mock_docker.pull.called)
+        mock_spawn_n.assert_called_once_with(
+            self.conductor._pull_and_create, mock_docker, 'some-name',
+            'some-uuid', mock_container, False)
+
+        self.conductor._pull_and_create(mock_docker, 'some-name',
+                                        'some-uuid', mock_container)
+        mock_docker.pull.assert_called_once_with('test_image',
+                                                 tag='some_tag')
+        self.assertTrue(mock_docker.create_container.called)
+        self.assertEqual(obj_container.STOPPED, container.status)
+        self.assertEqual(2, mock_container.save.call_count)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_pull_and_create_with_deleted_container(self,
+                                                    mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_docker.create_container.return_value = {'Id': 'some-id'}
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+        mock_container.save.side_effect = exception.ContainerNotFound(
+            container='some-uuid')
+
+        self.conductor._pull_and_create(mock_docker, 'some-name',
+                                        'some-uuid', mock_container)
+
+        mock_docker.remove_container.assert_called_once_with('some-id',
+                                                             force=True)
+        self.assertNotIn('some-uuid', self.conductor._docker_ids)
+
     @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
     def test_container_create_with_failure(self, mock_get_docker_client):
         mock_docker = mock.MagicMock()
@@ -184,6 +434,158 @@ class TestDockerConductor(base.BaseTestCase):
         ret = self.conductor._find_container_by_name(mock_docker, '1')
         self.assertEqual({}, ret)
 
+    def test_find_container_by_name_indexes_bay_containers(self):
+        mock_docker = mock.MagicMock()
+        uuid1 = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        uuid2 = '8e48ffb1-754d-4f21-bdd0-1a39bf796389'
+        mock_docker.list_instances.return_value = [
+            {'Id': 'id1', 'Config': {'Hostname': uuid1}},
+            {'Id': 'id2', 'Config': {'Hostname': uuid2}},
+            {'Id': 'id3', 'Config': {'Hostname': 'not-magnum'}}]
+
+        self.assertEqual('id1', self.conductor._find_container_by_name(
+            mock_docker, uuid1))
+        self.assertEqual('id2', self.conductor._find_container_by_name(
+            mock_docker, uuid2))
+        mock_docker.list_instances.assert_called_once_with(inspect=True)
+        self.assertEqual({uuid1: 'id1', uuid2: 'id2'},
+                         self.conductor._docker_ids)
+
+    def test_find_container_by_name_inspects_docker_name(self):
+        mock_docker = mock.MagicMock()
+        uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        self.conductor._docker_names[uuid] = 'name'
+        mock_docker.inspect_container.return_value = {
+            'Id': 'id1', 'Config': {'Hostname': uuid}}
+
+        self.assertEqual('id1', self.conductor._find_container_by_name(
+            mock_docker, uuid))
+        mock_docker.inspect_container.assert_called_once_with('name')
+        self.assertFalse(mock_docker.list_instances.called)
+        self.assertEqual({uuid: 'id1'}, self.conductor._docker_ids)
+
+    def test_find_container_by_name_with_other_container_of_name(self):
+        mock_docker = mock.MagicMock()
+        uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        self.conductor._docker_names[uuid] = 'name'
+        mock_docker.inspect_container.return_value = {
+            'Id': 'id1', 'Config': {'Hostname': 'not-magnum'}}
+        mock_docker.list_instances.return_value = [
+            {'Id': 'id2', 'Config': {'Hostname': uuid}}]
+
+        self.assertEqual('id2', self.conductor._find_container_by_name(
+            mock_docker, uuid))
+        mock_docker.list_instances.assert_called_once_with(inspect=True)
+
+    def test_find_container_by_name_scans_missing_container_once(self):
+        mock_docker = mock.MagicMock()
+        uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        self.conductor._docker_names[uuid] = 'name'
+        fake_response = mock.MagicMock()
+        fake_response.status_code = 404
+        mock_docker.inspect_container.side_effect = errors.APIError(
+            'No such container', fake_response)
+        mock_docker.list_instances.return_value = []
+
+        for i in range(2):
+            self.assertEqual({}, self.conductor._find_container_by_name(
+                mock_docker, uuid))
+        self.assertEqual(2, mock_docker.inspect_container.call_count)
+        mock_docker.list_instances.assert_called_once_with(inspect=True)
+
+        # A container recreated under the name is found again.
+        mock_docker.inspect_container.side_effect = None
+        mock_docker.inspect_container.return_value = {
+            'Id': 'id1', 'Config': {'Hostname': uuid}}
+        self.assertEqual('id1', self.conductor._find_container_by_name(
+            mock_docker, uuid))
+        self.assertEqual(set(), self.conductor._missing)
+
+    def _recreated_container(self, mock_docker, container_uuid):
+        # The indexed container was deleted and recreated under its name.
+        self.conductor._docker_ids[container_uuid] = 'old-id'
+        mock_docker.list_instances.return_value = [
+            {'Id': 'new-id', 'Config': {'Hostname': container_uuid}}]
+        fake_response = mock.MagicMock()
+        fake_response.status_code = 404
+        return errors.APIError('No such container', fake_response)
+
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_action_with_recreated_container(
+            self, mock_get_docker_client, mock_get_by_uuid):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        not_found = self._recreated_container(mock_docker, container_uuid)
+        mock_docker.stop.side_effect = [not_found, None]
+
+        self.conductor.container_stop(None, container_uuid)
+
+        self.assertEqual([mock.call('old-id'), mock.call('new-id')],
+                         mock_docker.stop.call_args_list)
+        self.assertEqual({container_uuid: 'new-id'},
+                         self.conductor._docker_ids)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_delete_with_recreated_container(
+            self, mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        not_found = self._recreated_container(mock_docker, container_uuid)
+        mock_docker.remove_container.side_effect = [not_found, None]
+
+        self.conductor.container_delete(None, container_uuid)
+
+        self.assertEqual([mock.call('old-id'), mock.call('new-id')],
+                         mock_docker.remove_container.call_args_list)
+        self.assertEqual({}, self.conductor._docker_ids)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_logs_with_deleted_container(self,
+                                                   mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        not_found = self._recreated_container(mock_docker, container_uuid)
+        mock_docker.list_instances.return_value = []
+        mock_docker.get_container_logs.side_effect = not_found
+
+        self.assertRaises(exception.ContainerException,
+                          self.conductor.container_logs,
+                          None, container_uuid)
+        self.assertEqual(2, mock_docker.get_container_logs.call_count)
+        self.assertEqual({}, self.conductor._docker_ids)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_create_indexes_docker_id(self, mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.create_container.return_value = {'Id': 'some-id'}
+        mock_container = mock.MagicMock()
+        mock_container.image_id = 'test_image:some_tag'
+
+        self.conductor.container_create(None, 'some-name', 'some-uuid',
+                                        mock_container)
+
+        self.assertEqual('some-id', self.conductor._find_container_by_name(
+            mock_docker, 'some-uuid'))
+        self.assertFalse(mock_docker.list_instances.called)
+
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_delete_removes_docker_id(self,
+                                                mock_get_docker_client):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        self.conductor._docker_ids[mock_container_uuid] = '2703ef2b705d'
+
+        self.conductor.container_delete(None, mock_container_uuid)
+
+        mock_docker.remove_container.assert_called_once_with('2703ef2b705d')
+        self.assertNotIn(mock_container_uuid, self.conductor._docker_ids)
+
     @mock.patch.object(docker_conductor.Handler, '_find_container_by_name')
     @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
     def test_container_delete(self, mock_get_docker_client,
@@ -379,6 +781,22 @@ class TestDockerConductor(base.BaseTestCase):
                                                         mock_container_uuid)
             mock_init.assert_called_once_with()
 
+    @mock.patch.object(docker_conductor.Handler._docker_clients, 'release')
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_stop_releases_client(self, mock_get_docker_client,
+                                            mock_find_container,
+                                            mock_release):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_find_container.return_value = '2703ef2b705d'
+        mock_docker.stop.side_effect = errors.APIError('Error', '', '')
+
+        self.assertRaises(exception.ContainerException,
+                          self.conductor.container_stop,
+                          None, 'd545a92d-609a-428f-8edb-16b02ad20ca1')
+        mock_release.assert_called_once_with(mock_docker)
+
     @mock.patch.object(objects.Container, 'get_by_uuid')
     @patch.object(docker_conductor.Handler, '_find_container_by_name')
     @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
@@ -478,6 +896,108 @@ class TestDockerConductor(base.BaseTestCase):
         mock_find_container.assert_called_once_with(mock_docker,
                                                     mock_container_uuid)
 
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_show_of_watched_bay(self, mock_get_docker_client,
+                                           mock_get_by_uuid):
+        event_watcher = mock.MagicMock()
+        event_watcher.is_watching.return_value = True
+        conductor = docker_conductor.Handler(event_watcher)
+        mock_container = mock.MagicMock()
+        mock_get_by_uuid.return_value = mock_container
+
+        container = conductor.container_show(None, 'some-uuid')
+
+        self.assertEqual(mock_container, container)
+        event_watcher.is_watching.assert_called_once_with(
+            mock_container.bay_uuid)
+        self.assertFalse(mock_get_docker_client.called)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_bay')
+    def test_container_show_many(self, mock_docker_for_bay,
+                                 mock_bay_get_by_uuid, mock_update_status):
+        mock_docker = mock.MagicMock()
+        mock_docker_for_bay.return_value = mock_docker
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/name1'], 'Status': 'Up 2 minutes'},
+            {'Id': 'id2', 'Names': ['/name2'],
+             'Status': 'Up 2 minutes (Paused)'},
+            {'Id': 'id3', 'Names': ['/name3'],
+             'Status': 'Exited (0) 3 seconds ago'}]
+        containers = []
+        for i in range(1, 5):
+            container = objects.Container({})
+            container.uuid = 'uuid%d' % i
+            container.name = 'name%d' % i
+            container.bay_uuid = 'bay-uuid'
+            container.status = obj_container.STOPPED
+            containers.append(container)
+
+        result = self.conductor.container_show_many(mock.sentinel.context,
+                                                    containers)
+
+        self.assertEqual([obj_container.RUNNING, obj_container.PAUSED,
+                          obj_container.STOPPED, obj_container.ERROR],
+                         [c.status for c in result])
+        mock_bay_get_by_uuid.assert_called_once_with(mock.sentinel.context,
+                                                     'bay-uuid')
+        mock_docker.containers.assert_called_once_with(all=True)
+        self.assertFalse(mock_docker.list_instances.called)
+        self.assertFalse(mock_docker.inspect_container.called)
+        mock_update_status.assert_called_once_with(
+            mock.sentinel.context, {'uuid1': obj_container.RUNNING,
+                                    'uuid2': obj_container.PAUSED,
+                                    'uuid4': obj_container.ERROR})
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_bay')
+    def test_container_show_many_with_recreated_container(
+            self, mock_docker_for_bay, mock_bay_get_by_uuid,
+            mock_update_status):
+        mock_docker = mock.MagicMock()
+        mock_docker_for_bay.return_value = mock_docker
+        container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        self.conductor._docker_ids[container_uuid] = 'old-id'
+        mock_docker.containers.return_value = [
+            {'Id': 'new-id', 'Names': ['/name'], 'Status': 'Up 2 seconds'}]
+        container = objects.Container({})
+        container.uuid = container_uuid
+        container.name = 'name'
+        container.bay_uuid = 'bay-uuid'
+        container.status = obj_container.STOPPED
+
+        result = self.conductor.container_show_many(mock.sentinel.context,
+                                                    [container])
+
+        self.assertEqual(obj_container.RUNNING, result[0].status)
+        self.assertFalse(mock_docker.list_instances.called)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_bay')
+    def test_container_show_many_on_swarm(self, mock_docker_for_bay,
+                                          mock_bay_get_by_uuid,
+                                          mock_update_status):
+        mock_docker = mock.MagicMock()
+        mock_docker_for_bay.return_value = mock_docker
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/node1/name'],
+             'Status': 'Up 2 minutes'}]
+        container = objects.Container({})
+        container.uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        container.name = 'name'
+        container.bay_uuid = 'bay-uuid'
+        container.status = obj_container.RUNNING
+
+        self.conductor.container_show_many(mock.sentinel.context,
+                                           [container])
+
+        self.assertEqual(obj_container.RUNNING, container.status)
+        self.assertFalse(mock_update_status.called)
+
     @mock.patch.object(objects.Container, 'get_by_uuid')
     @mock.patch.object(docker_conductor.Handler, '_find_container_by_name')
     @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
@@ -731,6 +1251,323 @@ class TestDockerConductor(base.BaseTestCase):
                                                         mock_container_uuid)
             mock_init.assert_called_once_with()
 
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_container')
+    def test_container_action_many(self, mock_docker_for_container,
+                                   mock_get_by_uuid, mock_update_status):
+        uuid1, uuid2, uuid3, uuid4 = [
+            'd545a92d-609a-428f-8edb-16b02ad20ca%d' % i for i in range(4)]
+        containers = {}
+        for i, uuid, bay_uuid in [(1, uuid1, 'bay1'), (2, uuid2, 'bay1'),
+                                  (3, uuid3, 'bay2')]:
+            containers[uuid] = mock.MagicMock(uuid=uuid, bay_uuid=bay_uuid,
+                                              status=obj_container.RUNNING)
+            containers[uuid].name = 'name%d' % i
+
+        def get_by_uuid(context, uuid):
+            if uuid not in containers:
+                raise exception.ContainerNotFound(container=uuid)
+            return containers[uuid]
+        mock_get_by_uuid.side_effect = get_by_uuid
+        mock_docker = mock.MagicMock()
+        mock_docker_for_container.return_value = mock_docker
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/name1']},
+            {'Id': 'id3', 'Names': ['/name3']}]
+        # The indexed container was removed outside of magnum.
+        self.conductor._docker_ids[uuid2] = 'id2'
+
+        fake_response = mock.MagicMock()
+        fake_response.status_code = 500
+        api_error = errors.APIError('Error', fake_response)
+
+        def stop(docker_id):
+            if docker_id == 'id3':
+                raise api_error
+        mock_docker.stop.side_effect = stop
+
+        results = self.conductor.container_action_many(
+            mock.sentinel.context, [uuid1, uuid2, uuid3, uuid4],
+            'stop')
+
+        self.assertEqual(
+            [{'uuid': uuid1, 'status': obj_container.STOPPED,
+              'error': None},
+             {'uuid': uuid2, 'status': obj_container.RUNNING,
+              'error': 'Docker container %s not found' % uuid2},
+             {'uuid': uuid3, 'status': obj_container.RUNNING,
+              'error': str(api_error)},
+             {'uuid': uuid4, 'status': None,
+              'error': 'Container %s could not be found.' % uuid4}],
+            results)
+        # One client, and one listing of the containers, per bay.
+        self.assertEqual(2, mock_docker_for_container.call_count)
+        self.assertEqual([mock.call(all=True)] * 2,
+                         mock_docker.containers.call_args_list)
+        self.assertFalse(mock_docker.list_instances.called)
+        self.assertEqual({uuid1: 'id1', uuid3: 'id3'},
+                         self.conductor._docker_ids)
+        mock_update_status.assert_called_once_with(
+            mock.sentinel.context, {uuid1: obj_container.STOPPED})
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_container')
+    def test_container_action_many_delete(self, mock_docker_for_container,
+                                          mock_get_by_uuid,
+                                          mock_update_status):
+        mock_container = mock.MagicMock(
+            uuid='uuid1', bay_uuid='bay1', status=obj_container.STOPPED)
+        mock_container.name = 'name1'
+        mock_get_by_uuid.return_value = mock_container
+        mock_docker = mock.MagicMock()
+        mock_docker_for_container.return_value = mock_docker
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/name1']}]
+
+        results = self.conductor.container_action_many(
+            mock.sentinel.context, ['uuid1'], 'delete')
+
+        self.assertEqual([{'uuid': 'uuid1', 'status': None, 'error': None}],
+                         results)
+        mock_docker.remove_container.assert_called_once_with('id1')
+        self.assertNotIn('uuid1', self.conductor._docker_ids)
+        self.assertFalse(mock_update_status.called)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_container')
+    def test_container_action_many_with_connection_error(
+            self, mock_docker_for_container, mock_get_by_uuid,
+            mock_update_status):
+        containers = {
+            'uuid1': mock.MagicMock(uuid='uuid1', bay_uuid='bay1',
+                                    status=obj_container.STOPPED),
+            'uuid2': mock.MagicMock(uuid='uuid2', bay_uuid='bay1',
+                                    status=obj_container.STOPPED)}
+        containers['uuid1'].name = 'name1'
+        containers['uuid2'].name = 'name2'
+        mock_get_by_uuid.side_effect = (
+            lambda context, uuid: containers[uuid])
+        mock_docker = mock.MagicMock()
+        mock_docker_for_container.return_value = mock_docker
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/name1']},
+            {'Id': 'id2', 'Names': ['/name2']}]
+
+        def start(docker_id):
+            if docker_id == 'id1':
+                raise requests.ConnectionError('Connection refused')
+        mock_docker.start.side_effect = start
+
+        results = self.conductor.container_action_many(
+            mock.sentinel.context, ['uuid1', 'uuid2'], 'start')
+
+        self.assertEqual(
+            [{'uuid': 'uuid1', 'status': obj_container.STOPPED,
+              'error': 'Connection refused'},
+             {'uuid': 'uuid2', 'status': obj_container.RUNNING,
+              'error': None}],
+            results)
+        mock_update_status.assert_called_once_with(
+            mock.sentinel.context, {'uuid2': obj_container.RUNNING})
+
+    @mock.patch.object(objects.Container, 'get_by_uuid')
+    @mock.patch.object(docker_conductor.Handler, '_docker_for_container')
+    def test_container_action_many_with_bay_failure(
+            self, mock_docker_for_container, mock_get_by_uuid):
+        mock_get_by_uuid.return_value = mock.MagicMock(
+            uuid='uuid1', bay_uuid='bay1', status=obj_container.STOPPED)
+        mock_docker_for_container.side_effect = exception.BayNotFound(
+            bay='bay1')
+
+        results = self.conductor.container_action_many(
+            mock.sentinel.context, ['uuid1'], 'start')
+
+        self.assertEqual([{'uuid': 'uuid1', 'status': obj_container.STOPPED,
+                           'error': 'Bay bay1 could not be found.'}],
+                         results)
+
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_logs_stream(self, mock_get_docker_client,
+                                   mock_find_container):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.logs_stream.return_value = (
+            frame for frame in [b'line1\n', b'line2\n'])
+        mock_container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        mock_find_container.return_value = '2703ef2b705d'
+        conductor = docker_conductor.Handler(conductor_id='conductor-id')
+
+        stream = conductor.container_logs_stream(
+            None, mock_container_uuid, tail=10, since=100, follow=True)
+
+        mock_docker.logs_stream.assert_called_once_with(
+            '2703ef2b705d', tail=10, since=100, follow=True)
+        self.assertEqual('conductor-id', stream['conductor'])
+        self.assertEqual({'output': u'line1\nline2\n', 'eof': True},
+                         conductor.container_stream_read(
+                             None, stream['stream_id']))
+
+    @mock.patch.object(docker_conductor.Handler._docker_clients, 'release')
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_logs_stream_releases_client(self,
+                                                   mock_get_docker_client,
+                                                   mock_find_container,
+                                                   mock_release):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.logs_stream.return_value = (
+            frame for frame in [b'line1\n'])
+        mock_find_container.return_value = '2703ef2b705d'
+
+        stream = self.conductor.container_logs_stream(
+            None, 'd545a92d-609a-428f-8edb-16b02ad20ca1')
+
+        # The stream is still reading from the client.
+        self.assertFalse(mock_release.called)
+        self.conductor.container_stream_read(None, stream['stream_id'])
+        mock_release.assert_called_once_with(mock_docker)
+
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_logs_stream_with_failure(self, mock_get_docker_client,
+                                                mock_find_container):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        mock_docker.logs_stream.side_effect = errors.APIError('Error', '', '')
+        self.assertRaises(exception.ContainerException,
+                          self.conductor.container_logs_stream,
+                          None, 'd545a92d-609a-428f-8edb-16b02ad20ca1')
+
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_execute_stream(self, mock_get_docker_client,
+                                      mock_find_container):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        docker.version = '1.2.2'
+        mock_docker.exec_create.return_value = {'Id': 'exec-id'}
+        mock_docker.exec_start_stream.return_value = (
+            frame for frame in [b'total 0\n'])
+        mock_docker.exec_inspect.return_value = {'ExitCode': 2}
+        mock_container_uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        mock_find_container.return_value = '2703ef2b705d'
+
+        stream = self.conductor.container_execute_stream(
+            None, mock_container_uuid, 'ls')
+
+        mock_docker.exec_create.assert_called_once_with(
+            '2703ef2b705d', 'ls', True, True, False)
+        mock_docker.exec_start_stream.assert_called_once_with(
+            {'Id': 'exec-id'})
+        self.assertEqual(
+            {'output': u'total 0\n', 'eof': True, 'exit_code': 2},
+            self.conductor.container_stream_read(None,
+                                                 stream['stream_id']))
+        mock_docker.exec_inspect.assert_called_once_with({'Id': 'exec-id'})
+
+    @patch.object(docker_conductor.Handler, '_find_container_by_name')
+    @mock.patch.object(docker_conductor.Handler, 'get_docker_client')
+    def test_container_execute_stream_with_failure(self,
+                                                   mock_get_docker_client,
+                                                   mock_find_container):
+        mock_docker = mock.MagicMock()
+        mock_get_docker_client.return_value = mock_docker
+        docker.version = '1.2.2'
+        mock_docker.exec_create.side_effect = errors.APIError('Error', '', '')
+        self.assertRaises(exception.ContainerException,
+                          self.conductor.container_execute_stream,
+                          None, 'd545a92d-609a-428f-8edb-16b02ad20ca1', 'ls')
+
+    def _read_stream(self, stream):
+        output = u''
+        while True:
+            chunk = self.conductor.container_stream_read(None,
+                                                         stream['stream_id'])
+            output += chunk['output']
+            if chunk['eof']:
+                return output
+
+    @mock.patch.object(docker_conductor.Handler._docker_clients, 'get')
+    @mock.patch.object(objects.BayModel, 'get_by_uuid')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    def test_bay_prewarm_images(self, mock_bay_get_by_uuid,
+                                mock_baymodel_get_by_uuid,
+                                mock_get_docker):
+        mock_bay = mock.MagicMock()
+        mock_bay.uuid = 'bay-uuid'
+        mock_bay.node_addresses = ['10.0.0.3', '10.0.0.4']
+        mock_bay_get_by_uuid.return_value = mock_bay
+        mock_baymodel_get_by_uuid.return_value.coe = 'swarm'
+        mock_baymodel_get_by_uuid.return_value.prewarm_images = [
+            'ubuntu:14.04', 'redis']
+        mock_docker = mock.MagicMock()
+        mock_get_docker.return_value = mock_docker
+        mock_docker.pull.side_effect = [None, None, None,
+                                        errors.DockerException('No space')]
+        self.conductor._images['bay-uuid'] = (0, set())
+
+        stream = self.conductor.bay_prewarm_images(None, 'bay-uuid')
+        results = [json.loads(line)
+                   for line in self._read_stream(stream).splitlines()]
+
+        self.assertEqual([1, 2, 3, 4], [r['done'] for r in results])
+        self.assertEqual(set([4]), set(r['total'] for r in results))
+        self.assertEqual(
+            sorted([('10.0.0.3', 'ubuntu:14.04'), ('10.0.0.3', 'redis'),
+                    ('10.0.0.4', 'ubuntu:14.04'), ('10.0.0.4', 'redis')]),
+            sorted((r['node'], r['image']) for r in results))
+        self.assertEqual([None, None, None, 'No space'],
+                         [r['error'] for r in results])
+        mock_get_docker.assert_any_call('tcp://10.0.0.3:2375',
+                                        CONF.docker.docker_remote_api_version,
+                                        CONF.docker.prewarm_pull_timeout)
+        mock_get_docker.assert_any_call('tcp://10.0.0.4:2375',
+                                        CONF.docker.docker_remote_api_version,
+                                        CONF.docker.prewarm_pull_timeout)
+        mock_docker.pull.assert_any_call('ubuntu', tag='14.04')
+        mock_docker.pull.assert_any_call('redis', tag=None)
+        self.assertNotIn('bay-uuid', self.conductor._images)
+
+    @mock.patch.object(docker_conductor.Handler._docker_clients, 'get')
+    @mock.patch.object(objects.BayModel, 'get_by_uuid')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    def test_bay_prewarm_images_given(self, mock_bay_get_by_uuid,
+                                      mock_baymodel_get_by_uuid,
+                                      mock_get_docker):
+        mock_bay = mock.MagicMock()
+        mock_bay.node_addresses = ['10.0.0.3']
+        mock_bay_get_by_uuid.return_value = mock_bay
+        mock_baymodel_get_by_uuid.return_value.coe = 'swarm'
+        mock_baymodel_get_by_uuid.return_value.prewarm_images = ['redis']
+
+        stream = self.conductor.bay_prewarm_images(None, 'bay-uuid',
+                                                   ['nginx'])
+        result = json.loads(self._read_stream(stream))
+
+        self.assertEqual({'node': '10.0.0.3', 'image': 'nginx',
+                          'error': None, 'done': 1, 'total': 1}, result)
+        mock_get_docker.return_value.pull.assert_called_once_with(
+            'nginx', tag=None)
+
+    @mock.patch.object(docker_conductor.Handler._docker_clients, 'get')
+    @mock.patch.object(objects.BayModel, 'get_by_uuid')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    def test_bay_prewarm_images_not_swarm(self, mock_bay_get_by_uuid,
+                                          mock_baymodel_get_by_uuid,
+                                          mock_get_docker):
+        mock_bay_get_by_uuid.return_value.node_addresses = ['10.0.0.3']
+        mock_baymodel_get_by_uuid.return_value.coe = 'kubernetes'
+
+        self.assertRaises(exception.PrewarmImagesNotSupported,
+                          self.conductor.bay_prewarm_images,
+                          None, 'bay-uuid', ['nginx'])
+        self.assertFalse(mock_get_docker.called)
+
     def test_container_common_exception(self):
         for action in ('container_execute', 'container_logs', 'container_show',
                        'container_delete', 'container_create',
@@ -741,3 +1578,261 @@ class TestDockerConductor(base.BaseTestCase):
                 mock_docker.side_effect = Exception("So bad")
                 self.assertRaises(exception.ContainerException,
                                   func, None, None)
+
+
+class TestContainerEventWatcher(base.BaseTestCase):
+    def setUp(self):
+        super(TestContainerEventWatcher, self).setUp()
+        self.watcher = docker_conductor.ContainerEventWatcher()
+        self.bay = mock.MagicMock()
+        self.bay.uuid = 'bay-uuid'
+        self.bay.api_address = '1.1.1.1'
+
+    @mock.patch.object(docker_conductor.eventlet, 'spawn_n')
+    def test_watch(self, mock_spawn_n):
+        self.watcher.watch(mock.sentinel.context, self.bay)
+        self.watcher.watch(mock.sentinel.context, self.bay)
+
+        mock_spawn_n.assert_called_once_with(self.watcher._watch,
+                                             mock.sentinel.context, self.bay)
+        self.assertFalse(self.watcher.is_watching(self.bay.uuid))
+
+    @mock.patch.object(docker_conductor.eventlet, 'spawn_n')
+    def test_watch_limits_streams(self, mock_spawn_n):
+        CONF.set_override('max_event_streams', 0, group='docker')
+        self.addCleanup(CONF.clear_override, 'max_event_streams',
+                        group='docker')
+        self.watcher.watch(mock.sentinel.context, self.bay)
+        self.assertFalse(mock_spawn_n.called)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    def test_handle_event(self, mock_update_status):
+        mock_docker = mock.MagicMock()
+        uuid = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+        mock_docker.inspect_container.return_value = {
+            'Config': {'Hostname': uuid}}
+
+        self.watcher._handle_event(mock.sentinel.context, mock_docker,
+                                   {'status': 'start', 'id': 'id1'})
+        self.watcher._handle_event(mock.sentinel.context, mock_docker,
+                                   {'status': 'die', 'id': 'id1'})
+        self.watcher._handle_event(mock.sentinel.context, mock_docker,
+                                   {'status': 'attach', 'id': 'id1'})
+
+        mock_docker.inspect_container.assert_called_once_with('id1')
+        self.assertEqual(
+            [mock.call(mock.sentinel.context, {uuid: obj_container.RUNNING}),
+             mock.call(mock.sentinel.context, {uuid: obj_container.STOPPED})],
+            mock_update_status.call_args_list)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    def test_handle_event_not_magnum_container(self, mock_update_status):
+        mock_docker = mock.MagicMock()
+        mock_docker.inspect_container.return_value = {
+            'Config': {'Hostname': 'some-host'}}
+
+        self.watcher._handle_event(mock.sentinel.context, mock_docker,
+                                   {'status': 'start', 'id': 'id1'})
+
+        self.assertFalse(mock_update_status.called)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_watch_reconnects_until_bay_deleted(self, mock_docker_client,
+                                                mock_bay_get_by_uuid,
+                                                mock_sleep):
+        mock_docker = mock_docker_client.DockerHTTPClient.return_value
+        events = ['{"status": "start", "id": "id1", "time": 100}']
+        mock_docker.events.side_effect = [iter(events),
+                                          errors.DockerException('down'),
+                                          iter([])]
+        mock_bay_get_by_uuid.side_effect = [
+            self.bay, self.bay, exception.BayNotFound(bay=self.bay.uuid)]
+        self.watcher._watched[self.bay.uuid] = False
+
+        with mock.patch.object(self.watcher, '_handle_event') as mock_handle:
+            with mock.patch.object(self.watcher,
+                                   '_reconcile') as mock_reconcile:
+                self.watcher._watch(mock.sentinel.context, self.bay)
+            mock_handle.assert_called_once_with(
+                mock.sentinel.context, mock_docker,
+                {'status': 'start', 'id': 'id1', 'time': 100})
+
+        self.assertEqual(100, mock_docker.events.call_args[1]['since'])
+        self.assertEqual(2, mock_reconcile.call_count)
+        self.assertEqual(3, mock_docker.close.call_count)
+        mock_sleep.assert_called_once_with(1)
+        self.assertNotIn(self.bay.uuid, self.watcher._watched)
+
+    @mock.patch('time.sleep')
+    @mock.patch.object(objects.Bay, 'get_by_uuid')
+    @mock.patch.object(docker_conductor, 'docker_client')
+    def test_watch_reconciles_before_watching(self, mock_docker_client,
+                                              mock_bay_get_by_uuid,
+                                              mock_sleep):
+        mock_docker = mock_docker_client.DockerHTTPClient.return_value
+        mock_docker.events.return_value = iter([])
+        mock_bay_get_by_uuid.side_effect = exception.BayNotFound(
+            bay=self.bay.uuid)
+        self.watcher._watched[self.bay.uuid] = False
+
+        def reconcile(context, bay, docker):
+            self.assertFalse(self.watcher.is_watching(self.bay.uuid))
+        with mock.patch.object(self.watcher, '_reconcile',
+                               side_effect=reconcile) as mock_reconcile:
+            self.watcher._watch(mock.sentinel.context, self.bay)
+
+        mock_reconcile.assert_called_once_with(mock.sentinel.context,
+                                               self.bay, mock_docker)
+        mock_docker.close.assert_called_once_with()
+
+    @mock.patch.object(objects.Container, 'update_status')
+    @mock.patch.object(objects.Container, 'list_by_bay_uuid')
+    def test_reconcile(self, mock_list_by_bay_uuid, mock_update_status):
+        containers = []
+        for name, status in [('running', obj_container.STOPPED),
+                             ('paused', obj_container.PAUSED),
+                             ('gone', obj_container.RUNNING),
+                             ('pulling', obj_container.PULLING),
+                             ('new', None)]:
+            container = mock.MagicMock()
+            container.name = name
+            container.uuid = name + '-uuid'
+            container.status = status
+            containers.append(container)
+        mock_list_by_bay_uuid.return_value = containers
+        mock_docker = mock.MagicMock()
+        mock_docker.containers.return_value = [
+            {'Id': 'id1', 'Names': ['/running'], 'Status': 'Up 2 seconds'},
+            {'Id': 'id2', 'Names': ['/node1/paused'],
+             'Status': 'Up 2 minutes (Paused)'}]
+
+        self.watcher._reconcile(mock.sentinel.context, self.bay, mock_docker)
+
+        mock_docker.containers.assert_called_once_with(all=True)
+        mock_list_by_bay_uuid.assert_called_once_with(mock.sentinel.context,
+                                                      self.bay.uuid)
+        mock_update_status.assert_called_once_with(
+            mock.sentinel.context,
+            {'running-uuid': obj_container.RUNNING,
+             'gone-uuid': obj_container.ERROR})
+        self.assertEqual({'id1': 'running-uuid', 'id2': 'paused-uuid'},
+                         self.watcher._uuids)
+
+    @mock.patch.object(objects.Container, 'update_status')
+    def test_handle_destroy_event(self, mock_update_status):
+        mock_docker = mock.MagicMock()
+        self.watcher._uuids['id1'] = 'd545a92d-609a-428f-8edb-16b02ad20ca1'
+
+        self.watcher._handle_event(mock.sentinel.context, mock_docker,
+                                   {'status': 'destroy', 'id': 'id1'})
+
+        self.assertEqual({}, self.watcher._uuids)
+        self.assertFalse(mock_docker.inspect_container.called)
+        self.assertFalse(mock_update_status.called)
+
+    def test_summaries_by_name(self):
+        db = {'Id': 'id1', 'Names': ['/db', '/web/db']}
+        web = {'Id': 'id2', 'Names': ['/web']}
+        swarm = {'Id': 'id3', 'Names': ['/node1/app']}
+
+        self.assertEqual({'db': db, 'web': web, 'app': swarm},
+                         docker_conductor._summaries_by_name([db, web, swarm]))
+
+
+class TestContainerStreams(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestContainerStreams, self).setUp()
+        self.streams = docker_conductor.ContainerStreams()
+
+    def test_read_in_chunks(self):
+        CONF.set_override('stream_chunk_size', 10, group='docker')
+        self.addCleanup(CONF.clear_override, 'stream_chunk_size',
+                        group='docker')
+        frames = (frame for frame in [b'12345', b'67890', b'abc'])
+
+        stream_id = self.streams.open(frames)
+
+        self.assertEqual({'output': u'1234567890', 'eof': False},
+                         self.streams.read(stream_id))
+        self.assertEqual({'output': u'abc', 'eof': True},
+                         self.streams.read(stream_id))
+        self.assertEqual({'output': u'', 'eof': True},
+                         self.streams.read(stream_id))
+
+    def test_large_frames_are_split(self):
+        CONF.set_override('stream_chunk_size', 4, group='docker')
+        self.addCleanup(CONF.clear_override, 'stream_chunk_size',
+                        group='docker')
+        frames = (frame for frame in [b'0123456789'])
+
+        stream_id = self.streams.open(frames, queue_size=1)
+
+        self.assertEqual(u'0123', self.streams.read(stream_id)['output'])
+        self.assertEqual(u'4567', self.streams.read(stream_id)['output'])
+        self.assertEqual(u'89', self.streams.read(stream_id)['output'])
+        self.assertEqual({'output': u'', 'eof': True},
+                         self.streams.read(stream_id))
+
+    def test_characters_split_across_reads(self):
+        CONF.set_override('stream_chunk_size', 1, group='docker')
+        self.addCleanup(CONF.clear_override, 'stream_chunk_size',
+                        group='docker')
+        frames = (frame for frame in [u'\xe9'.encode('utf-8')])
+
+        stream_id = self.streams.open(frames)
+
+        self.assertEqual(u'', self.streams.read(stream_id)['output'])
+        self.assertEqual(u'\xe9', self.streams.read(stream_id)['output'])
+
+    def test_finish_fields_are_added_to_last_read(self):
+        frames = (frame for frame in [b'output'])
+
+        stream_id = self.streams.open(frames,
+                                      finish=lambda: {'exit_code': 0})
+
+        self.assertEqual({'output': u'output', 'eof': True, 'exit_code': 0},
+                         self.streams.read(stream_id))
+
+    def test_read_times_out(self):
+        CONF.set_override('stream_read_timeout', 0, group='docker')
+        self.addCleanup(CONF.clear_override, 'stream_read_timeout',
+                        group='docker')
+        frames = (eventlet.sleep(60) for i in range(1))
+
+        stream_id = self.streams.open(frames)
+
+        self.assertEqual({'output': u'', 'eof': False},
+                         self.streams.read(stream_id))
+        self.streams.close(stream_id)
+        self.assertEqual({'output': u'', 'eof': True},
+                         self.streams.read(stream_id))
+
+    def test_reading_stops_while_queue_is_full(self):
+        CONF.set_override('stream_queue_size', 2, group='docker')
+        self.addCleanup(CONF.clear_override, 'stream_queue_size',
+                        group='docker')
+        read = []
+
+        def frames():
+            for i in range(10):
+                read.append(i)
+                yield b'x'
+        stream_id = self.streams.open(frames())
+        eventlet.sleep(0)
+
+        # Two frames are queued and the third waits for room.
+        self.assertEqual(3, len(read))
+        self.streams.close(stream_id)
+
+    @mock.patch('time.time')
+    def test_idle_streams_are_closed(self, mock_time):
+        mock_time.return_value = 1000
+        stream_id = self.streams.open(frame for frame in [])
+        mock_time.return_value = 1000 + CONF.docker.stream_idle_timeout + 1
+
+        self.streams.open(frame for frame in [])
+
+        self.assertNotIn(stream_id, self.streams._streams)
@@ -12,7 +12,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import contextlib
+import json
+
 from oslo_config import cfg
+import requests
 
 from magnum.common import exception
 from magnum.conductor.handlers import kube
@@ -50,6 +54,11 @@ class TestKube(base.TestCase):
     def mock_baymodel(self):
         return objects.BayModel({})
 
+    @contextlib.contextmanager
+    def mock_k8s_api(self):
+        with patch.object(self.kube_handler._k8s_apis, 'get') as mock_get:
+            yield mock_get.return_value
+
     @patch('magnum.objects.Bay.get_by_uuid')
     def test_retrieve_bay_from_pod(self,
                                    mock_bay_get_by_uuid):
@@ -131,13 +140,15 @@ class TestKube(base.TestCase):
         expected_pod.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             mock_kube_api.createPod.return_value = {'status':
                                                     {'phase': 'Pending'}}
 
             self.kube_handler.pod_create(self.context, expected_pod)
             self.assertEqual('Pending', expected_pod.status)
             expected_pod.create.assert_called_once_with(self.context)
+            self.kube_handler._k8s_apis.get.assert_called_once_with(
+                expected_master_url)
 
     @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
     @patch('ast.literal_eval')
@@ -149,7 +160,7 @@ class TestKube(base.TestCase):
         expected_pod.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=500)
             mock_kube_api.createPod.side_effect = err
@@ -171,7 +182,7 @@ class TestKube(base.TestCase):
         expected_pod.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=409)
             mock_kube_api.createPod.side_effect = err
@@ -197,7 +208,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.pod_delete(self.context, mock_pod.uuid)
 
@@ -222,7 +233,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=500)
             mock_kube_api.deletePod.side_effect = err
@@ -253,7 +264,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.deletePod.side_effect = err
@@ -275,7 +286,7 @@ class TestKube(base.TestCase):
         expected_service.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.service_create(self.context, expected_service)
             mock_kube_api.createService.assert_called_once_with(
@@ -293,7 +304,7 @@ class TestKube(base.TestCase):
         expected_service.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.createService.side_effect = err
@@ -322,7 +333,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.service_delete(self.context, mock_service.uuid)
 
@@ -347,7 +358,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=500)
             mock_kube_api.deleteService.side_effect = err
@@ -378,7 +389,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.deleteService.side_effect = err
@@ -400,7 +411,7 @@ class TestKube(base.TestCase):
         expected_rc.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.rc_create({}, expected_rc)
             mock_kube_api.createReplicationController.assert_called_once_with(
@@ -417,7 +428,7 @@ class TestKube(base.TestCase):
         expected_rc.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=500)
             mock_kube_api.createReplicationController.side_effect = err
@@ -445,7 +456,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.rc_delete(self.context, mock_rc.uuid)
 
@@ -469,7 +480,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=500)
             mock_kube_api.deleteReplicationController.side_effect = err
@@ -500,7 +511,7 @@ class TestKube(base.TestCase):
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
         mock_object_has_stack.return_value = True
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.deleteReplicationController.side_effect = err
@@ -525,7 +536,7 @@ class TestKube(base.TestCase):
         expected_rc.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.rc_update(self.context, expected_rc)
             mock_kube_api.replaceReplicationController.assert_called_once_with(
@@ -546,7 +557,7 @@ class TestKube(base.TestCase):
         expected_rc.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.replaceReplicationController.side_effect = err
@@ -573,7 +584,7 @@ class TestKube(base.TestCase):
         expected_service.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.service_update(self.context, expected_service)
             mock_kube_api.replaceService.assert_called_once_with(
@@ -594,7 +605,7 @@ class TestKube(base.TestCase):
         manifest = {"key": "value"}
         expected_service.manifest = '{"key": "value"}'
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.replaceService.side_effect = err
@@ -621,7 +632,7 @@ class TestKube(base.TestCase):
         expected_pod.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
 
             self.kube_handler.pod_update(self.context, expected_pod)
             mock_kube_api.replacePod.assert_called_once_with(
@@ -630,6 +641,299 @@ class TestKube(base.TestCase):
             expected_pod.refresh.assert_called_once_with(self.context)
             expected_pod.save.assert_called_once_with()
 
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    def test_pod_update_with_patch(self, mock_retrieve_k8s_master_url):
+        pod = self.mock_pod()
+        pod.uuid = 'test-uuid'
+        pod.name = 'test-name'
+        pod.refresh = mock.MagicMock()
+        pod.save = mock.MagicMock()
+        pod.applied_manifest = '{"metadata": {"name": "test-name"}}'
+        pod.manifest = ('{"metadata": {"name": "test-name", '
+                        '"labels": {"app": "web"}}}')
+
+        with self.mock_k8s_api() as mock_kube_api:
+            self.kube_handler.pod_update(self.context, pod)
+            mock_kube_api.patchPod.assert_called_once_with(
+                body={'metadata': {'labels': {'app': 'web'}}},
+                name='test-name', namespaces='default')
+            self.assertFalse(mock_kube_api.replacePod.called)
+        self.assertEqual({'metadata': {'name': 'test-name',
+                                       'labels': {'app': 'web'}}},
+                         json.loads(pod.applied_manifest))
+        pod.save.assert_called_once_with()
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    def test_rc_update_unchanged(self, mock_retrieve_k8s_master_url):
+        rc = self.mock_rc()
+        rc.uuid = 'test-uuid'
+        rc.name = 'test-name'
+        rc.refresh = mock.MagicMock()
+        rc.save = mock.MagicMock()
+        rc.applied_manifest = '{"spec": {"replicas": 2}}'
+        rc.manifest = 'spec:\n  replicas: 2\n'
+
+        with self.mock_k8s_api() as mock_kube_api:
+            self.kube_handler.rc_update(self.context, rc)
+            self.assertFalse(mock_kube_api.patchReplicationController.called)
+            self.assertFalse(
+                mock_kube_api.replaceReplicationController.called)
+        rc.save.assert_called_once_with()
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.ReplicationController.get_by_uuid')
+    def test_rc_scale(self, mock_rc_get_by_uuid,
+                      mock_retrieve_k8s_master_url):
+        rc = self.mock_rc()
+        rc.uuid = 'test-uuid'
+        rc.name = 'test-name'
+        rc.replicas = 2
+        rc.save = mock.MagicMock()
+        rc.applied_manifest = ('{"spec": {"replicas": 2, '
+                               '"selector": {"name": "foo"}}}')
+        mock_rc_get_by_uuid.return_value = rc
+
+        with self.mock_k8s_api() as mock_kube_api:
+            self.kube_handler.rc_scale(self.context, 'test-uuid', 5)
+            mock_kube_api.patchReplicationController.assert_called_once_with(
+                name='test-name', body={'spec': {'replicas': 5}},
+                namespaces='default')
+            self.assertFalse(
+                mock_kube_api.replaceReplicationController.called)
+        self.assertEqual(5, rc.replicas)
+        self.assertEqual({'spec': {'replicas': 2,
+                                   'selector': {'name': 'foo'}}},
+                         json.loads(rc.applied_manifest))
+        rc.save.assert_called_once_with()
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.ReplicationController.get_by_uuid')
+    def test_rc_scale_then_update(self, mock_rc_get_by_uuid,
+                                  mock_retrieve_k8s_master_url):
+        rc = self.mock_rc()
+        rc.uuid = 'test-uuid'
+        rc.name = 'test-name'
+        rc.replicas = 2
+        rc.refresh = mock.MagicMock()
+        rc.save = mock.MagicMock()
+        rc.applied_manifest = ('{"spec": {"replicas": 2, '
+                               '"selector": {"name": "foo"}}}')
+        mock_rc_get_by_uuid.return_value = rc
+
+        with self.mock_k8s_api() as mock_kube_api:
+            self.kube_handler.rc_scale(self.context, 'test-uuid', 5)
+            mock_kube_api.patchReplicationController.reset_mock()
+
+            rc.manifest = ('{"spec": {"replicas": 2, '
+                           '"selector": {"name": "bar"}}}')
+            self.kube_handler.rc_update(self.context, rc)
+            mock_kube_api.patchReplicationController.assert_called_once_with(
+                name='test-name', body={'spec': {'selector': {'name': 'bar'}}},
+                namespaces='default')
+            self.assertFalse(
+                mock_kube_api.replaceReplicationController.called)
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.ReplicationController.get_by_uuid')
+    @patch('ast.literal_eval')
+    def test_rc_scale_with_failure(self, mock_literal_eval,
+                                   mock_rc_get_by_uuid,
+                                   mock_retrieve_k8s_master_url):
+        rc = self.mock_rc()
+        rc.uuid = 'test-uuid'
+        rc.name = 'test-name'
+        rc.save = mock.MagicMock()
+        mock_rc_get_by_uuid.return_value = rc
+
+        with self.mock_k8s_api() as mock_kube_api:
+            err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
+                                  fp=mock.MagicMock(), code=404)
+            mock_kube_api.patchReplicationController.side_effect = err
+            mock_literal_eval.return_value = {'message': 'error'}
+
+            self.assertRaises(exception.KubernetesAPIFailed,
+                              self.kube_handler.rc_scale,
+                              self.context, 'test-uuid', 5)
+        self.assertFalse(rc.save.called)
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.Bay.create_k8s_resources')
+    @patch('magnum.objects.Bay.get_by_uuid')
+    def test_bay_apply_manifest(self, mock_bay_get_by_uuid,
+                                mock_create_k8s_resources,
+                                mock_retrieve_k8s_master_url):
+        service = self.mock_service()
+        service.manifest = '{"kind": "Service"}'
+        pod = self.mock_pod()
+        pod.manifest = '{"kind": "Pod"}'
+        rc = self.mock_rc()
+        rc.manifest = '{"kind": "ReplicationController"}'
+
+        calls = []
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.createService.side_effect = (
+                lambda **kwargs: calls.append('Service'))
+            mock_kube_api.createPod.side_effect = (
+                lambda **kwargs: calls.append('Pod') or
+                {'status': {'phase': 'Pending'}})
+            mock_kube_api.createReplicationController.side_effect = (
+                lambda **kwargs: calls.append('ReplicationController'))
+
+            created = self.kube_handler.bay_apply_manifest(
+                self.context, 'bay-uuid', [service], [pod], [rc])
+
+            mock_kube_api.createPod.assert_called_once_with(
+                body={'kind': 'Pod'}, namespaces='default')
+        self.assertEqual('Service', calls[0])
+        self.assertEqual({'services': [service], 'pods': [pod], 'rcs': [rc]},
+                         created)
+        self.assertEqual('Pending', pod.status)
+        self.assertEqual({'kind': 'ReplicationController'},
+                         json.loads(rc.applied_manifest))
+        mock_bay_get_by_uuid.assert_called_once_with(self.context,
+                                                     'bay-uuid')
+        mock_create_k8s_resources.assert_called_once_with(
+            self.context, {'service': [service], 'pod': [pod], 'rc': [rc]})
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.Bay.create_k8s_resources')
+    @patch('magnum.objects.Bay.get_by_uuid')
+    @patch('ast.literal_eval')
+    def test_bay_apply_manifest_with_failure(self, mock_literal_eval,
+                                             mock_bay_get_by_uuid,
+                                             mock_create_k8s_resources,
+                                             mock_retrieve_k8s_master_url):
+        service1 = self.mock_service()
+        service1.manifest = '{"metadata": {"name": "service1"}}'
+        service2 = self.mock_service()
+        service2.manifest = '{"metadata": {"name": "service2"}}'
+        pod = self.mock_pod()
+        pod.manifest = '{"kind": "Pod"}'
+
+        def create_service(body, namespaces):
+            if body['metadata']['name'] == 'service2':
+                raise error.HTTPError(url='fake', msg='fake', hdrs='fake',
+                                      fp=mock.MagicMock(), code=409)
+
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.createService.side_effect = create_service
+            mock_literal_eval.return_value = {'message': 'error'}
+
+            self.assertRaises(exception.KubernetesAPIFailed,
+                              self.kube_handler.bay_apply_manifest,
+                              self.context, 'bay-uuid',
+                              [service1, service2], [pod], [])
+
+            self.assertFalse(mock_kube_api.createPod.called)
+        mock_create_k8s_resources.assert_called_once_with(
+            self.context, {'service': [service1], 'pod': [], 'rc': []})
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.Bay.create_k8s_resources')
+    @patch('magnum.objects.Bay.get_by_uuid')
+    def test_bay_apply_manifest_with_connection_error(
+            self, mock_bay_get_by_uuid, mock_create_k8s_resources,
+            mock_retrieve_k8s_master_url):
+        service = self.mock_service()
+        service.manifest = '{"kind": "Service"}'
+        pod1 = self.mock_pod()
+        pod1.manifest = '{"metadata": {"name": "pod1"}}'
+        pod2 = self.mock_pod()
+        pod2.manifest = '{"metadata": {"name": "pod2"}}'
+
+        def create_pod(body, namespaces):
+            if body['metadata']['name'] == 'pod2':
+                raise requests.ConnectionError('Connection refused')
+            # A response without the phase of the pod is a failure too.
+            return {}
+
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.createPod.side_effect = create_pod
+
+            exc = self.assertRaises(exception.KubernetesAPIFailed,
+                                    self.kube_handler.bay_apply_manifest,
+                                    self.context, 'bay-uuid',
+                                    [service], [pod1, pod2], [])
+
+        self.assertEqual(500, exc.code)
+        mock_create_k8s_resources.assert_called_once_with(
+            self.context, {'service': [service], 'pod': [], 'rc': []})
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.Bay.create_k8s_resources')
+    @patch('magnum.objects.Bay.get_by_uuid')
+    def test_bay_apply_manifest_with_unreadable_failure(
+            self, mock_bay_get_by_uuid, mock_create_k8s_resources,
+            mock_retrieve_k8s_master_url):
+        service = self.mock_service()
+        service.manifest = '{"kind": "Service"}'
+        fp = mock.MagicMock()
+        fp.read.return_value = '<html>Bad Gateway</html>'
+
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.createService.side_effect = error.HTTPError(
+                url='fake', msg='Bad Gateway', hdrs='fake', fp=fp, code=502)
+
+            exc = self.assertRaises(exception.KubernetesAPIFailed,
+                                    self.kube_handler.bay_apply_manifest,
+                                    self.context, 'bay-uuid',
+                                    [service], [], [])
+
+        self.assertEqual(502, exc.code)
+        mock_create_k8s_resources.assert_called_once_with(
+            self.context, {'service': [], 'pod': [], 'rc': []})
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch('magnum.objects.Bay.create_k8s_resources')
+    @patch('magnum.objects.Bay.get_by_uuid')
+    def test_bay_apply_manifest_with_db_failure(self, mock_bay_get_by_uuid,
+                                                mock_create_k8s_resources,
+                                                mock_retrieve_k8s_master_url):
+        service = self.mock_service()
+        service.name = 'service1'
+        service.manifest = '{"kind": "Service"}'
+        rc = self.mock_rc()
+        rc.name = 'rc1'
+        rc.manifest = '{"kind": "ReplicationController"}'
+        mock_create_k8s_resources.side_effect = (
+            exception.ReplicationControllerAlreadyExists(uuid='rc-uuid'))
+
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.deleteService.side_effect = error.HTTPError(
+                url='fake', msg='fake', hdrs='fake', fp=mock.MagicMock(),
+                code=500)
+
+            self.assertRaises(exception.ReplicationControllerAlreadyExists,
+                              self.kube_handler.bay_apply_manifest,
+                              self.context, 'bay-uuid', [service], [], [rc])
+
+            mock_kube_api.deleteReplicationController.assert_called_once_with(
+                name='rc1', namespaces='default')
+            mock_kube_api.deleteService.assert_called_once_with(
+                name='service1', namespaces='default')
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    def test_service_update_replaces_without_merge_patch(
+            self, mock_retrieve_k8s_master_url):
+        service = self.mock_service()
+        service.uuid = 'test-uuid'
+        service.name = 'test-name'
+        service.refresh = mock.MagicMock()
+        service.save = mock.MagicMock()
+        service.applied_manifest = '{"spec": {"ports": [{"port": 80}]}}'
+        service.manifest = '{"spec": {"ports": [{"port": 8080}]}}'
+
+        with self.mock_k8s_api() as mock_kube_api:
+            mock_kube_api.patchService.side_effect = error.HTTPError(
+                None, 415, 'Unsupported Media Type', None, None)
+            self.kube_handler.service_update(self.context, service)
+            mock_kube_api.patchService.assert_called_once_with(
+                body={'spec': {'ports': [{'port': 8080}]}},
+                name='test-name', namespaces='default')
+            mock_kube_api.replaceService.assert_called_once_with(
+                body={'spec': {'ports': [{'port': 8080}]}},
+                name='test-name', namespaces='default')
+
     @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
     @patch('ast.literal_eval')
     def test_pod_update_with_failure(self, mock_literal_eval,
@@ -643,7 +947,7 @@ class TestKube(base.TestCase):
         expected_pod.manifest = '{"key": "value"}'
 
         mock_retrieve_k8s_master_url.return_value = expected_master_url
-        with patch.object(self.kube_handler, '_k8s_api') as mock_kube_api:
+        with self.mock_k8s_api() as mock_kube_api:
             err = error.HTTPError(url='fake', msg='fake', hdrs='fake',
                                   fp=mock.MagicMock(), code=404)
             mock_kube_api.replacePod.side_effect = err
@@ -656,3 +960,350 @@ class TestKube(base.TestCase):
                 body=manifest, name=expected_pod.name,
                 namespaces='default')
             self.assertFalse(expected_pod.refresh.called)
+
+
+class TestK8sApiCache(base.TestCase):
+    def setUp(self):
+        super(TestK8sApiCache, self).setUp()
+        self.cache = kube.K8sApiCache()
+        self.addCleanup(self.cache.clear)
+
+    def test_get_routes_by_master_url(self):
+        api1 = self.cache.get('http://10.0.0.1:8080')
+        api2 = self.cache.get('http://10.0.0.2:8080')
+
+        self.assertIsNot(api1, api2)
+        self.assertIs(api1, self.cache.get('http://10.0.0.1:8080'))
+        self.assertEqual('http://10.0.0.1:8080', api1.apiClient.host)
+        self.assertEqual('http://10.0.0.2:8080', api2.apiClient.host)
+
+    def test_get_configures_transport(self):
+        cfg.CONF.set_override('api_connect_timeout', 5, group='kubernetes')
+        cfg.CONF.set_override('api_read_timeout', 30, group='kubernetes')
+        cfg.CONF.set_override('api_retries', 2, group='kubernetes')
+        transport = self.cache.get('http://10.0.0.1:8080').apiClient.transport
+
+        self.assertEqual((5, 30), transport.timeout)
+        self.assertEqual(2, transport.retries)
+
+    def test_get_evicts_least_recently_used(self):
+        cfg.CONF.set_override('api_cache_size', 2, group='kubernetes')
+        api1 = self.cache.get('http://10.0.0.1:8080')
+        api2 = self.cache.get('http://10.0.0.2:8080')
+        self.cache.get('http://10.0.0.1:8080')
+        with patch.object(api2.apiClient.transport, 'close') as mock_close:
+            self.cache.get('http://10.0.0.3:8080')
+            mock_close.assert_called_once_with()
+
+        self.assertIs(api1, self.cache.get('http://10.0.0.1:8080'))
+        self.assertIsNot(api2, self.cache.get('http://10.0.0.2:8080'))
+
+    def test_patch_sends_merge_patch(self):
+        k8s_api = self.cache.get('http://10.0.0.1:8080')
+        with patch.object(k8s_api.apiClient.transport,
+                          'request') as mock_request:
+            mock_request.return_value = ({}, None)
+            k8s_api.patchPod(name='pod1', namespaces='default',
+                             body={'metadata': {'labels': None}})
+
+        method, url, headers, data = mock_request.call_args[0]
+        self.assertEqual('PATCH', method)
+        self.assertEqual('application/merge-patch+json',
+                         headers['Content-type'])
+        self.assertNotIn('Content-Type', headers)
+        self.assertEqual({'metadata': {'labels': None}}, json.loads(data))
+
+    @patch('time.time')
+    def test_get_evicts_idle(self, mock_time):
+        cfg.CONF.set_override('api_idle_timeout', 60, group='kubernetes')
+        mock_time.return_value = 1000
+        api1 = self.cache.get('http://10.0.0.1:8080')
+        mock_time.return_value = 1030
+        api2 = self.cache.get('http://10.0.0.2:8080')
+        mock_time.return_value = 1070
+        with patch.object(api1.apiClient.transport, 'close') as mock_close:
+            self.assertIs(api2, self.cache.get('http://10.0.0.2:8080'))
+            mock_close.assert_called_once_with()
+
+        self.assertIsNot(api1, self.cache.get('http://10.0.0.1:8080'))
+
+
+class TestK8sResourceWatcher(base.TestCase):
+    def setUp(self):
+        super(TestK8sResourceWatcher, self).setUp()
+        self.watcher = kube.K8sResourceWatcher()
+        self.bay = mock.MagicMock()
+        self.bay.uuid = 'bay-uuid'
+
+    def _pod(self, **kw):
+        pod = objects.Pod(self.context)
+        pod.uuid = kw.get('uuid', 'pod-uuid')
+        pod.name = kw.get('name', 'pod1')
+        pod.labels = kw.get('labels', {})
+        pod.images = kw.get('images', ['nginx'])
+        pod.status = kw.get('status', 'Pending')
+        pod.obj_reset_changes()
+        return pod
+
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    @patch.object(kube.eventlet, 'spawn_n')
+    def test_watch(self, mock_spawn_n, mock_retrieve_k8s_master_url):
+        mock_retrieve_k8s_master_url.return_value = 'http://10.0.0.1:8080'
+        self.watcher.watch(self.context, self.bay)
+        self.watcher.watch(self.context, self.bay)
+
+        self.assertEqual(
+            sorted(mock.call(self.watcher._watch, self.context, self.bay,
+                             'http://10.0.0.1:8080', kind)
+                   for kind in ('pod', 'service', 'rc')),
+            sorted(mock_spawn_n.call_args_list))
+        self.assertFalse(self.watcher.is_watching(self.bay.uuid))
+
+    @patch.object(kube.eventlet, 'spawn_n')
+    def test_watch_limits_streams(self, mock_spawn_n):
+        cfg.CONF.set_override('max_watch_streams', 2, group='kubernetes')
+        self.watcher.watch(self.context, self.bay)
+        self.assertFalse(mock_spawn_n.called)
+
+    @patch.object(objects.Pod, 'save')
+    @patch.object(objects.Pod, 'list_by_bay_uuid')
+    def test_handle_modified_event(self, mock_list_by_bay_uuid, mock_save):
+        pod = self._pod()
+        mock_list_by_bay_uuid.return_value = [self._pod(name='pod2'), pod]
+        event = {'type': 'MODIFIED',
+                 'object': {'metadata': {'name': 'pod1',
+                                         'resourceVersion': '12',
+                                         'labels': {'app': 'web'}},
+                            'spec': {'containers': [{'image': 'nginx'}]},
+                            'status': {'phase': 'Running'}}}
+
+        resource_version = self.watcher._handle_event(
+            self.context, self.bay, 'pod', event, '10')
+
+        self.assertEqual('12', resource_version)
+        self.assertEqual('Running', pod.status)
+        self.assertEqual({'app': 'web'}, pod.labels)
+        mock_save.assert_called_once_with()
+        mock_list_by_bay_uuid.assert_called_once_with(self.context,
+                                                      'bay-uuid')
+
+    @patch.object(objects.Pod, 'save')
+    @patch.object(objects.Pod, 'list_by_bay_uuid')
+    def test_handle_unchanged_event(self, mock_list_by_bay_uuid, mock_save):
+        mock_list_by_bay_uuid.return_value = [self._pod(status='Running')]
+        event = {'type': 'MODIFIED',
+                 'object': {'metadata': {'name': 'pod1',
+                                         'resourceVersion': '12'},
+                            'spec': {'containers': [{'image': 'nginx'}]},
+                            'status': {'phase': 'Running'}}}
+
+        self.watcher._handle_event(self.context, self.bay, 'pod', event, '10')
+
+        self.assertFalse(mock_save.called)
+
+    @patch.object(objects.ReplicationController, 'destroy')
+    @patch.object(objects.ReplicationController, 'list_by_bay_uuid')
+    def test_handle_deleted_event(self, mock_list_by_bay_uuid,
+                                  mock_destroy):
+        rc = objects.ReplicationController(self.context)
+        rc.name = 'rc1'
+        rc.uuid = 'rc-uuid'
+        mock_list_by_bay_uuid.return_value = [rc]
+        event = {'type': 'DELETED',
+                 'object': {'metadata': {'name': 'rc1',
+                                         'resourceVersion': '13'}}}
+
+        resource_version = self.watcher._handle_event(
+            self.context, self.bay, 'rc', event, '10')
+
+        self.assertEqual('13', resource_version)
+        mock_destroy.assert_called_once_with()
+
+    @patch.object(objects.Service, 'list_by_bay_uuid')
+    def test_handle_event_of_other_namespace(self, mock_list_by_bay_uuid):
+        event = {'type': 'DELETED',
+                 'object': {'metadata': {'name': 'kube-dns',
+                                         'namespace': 'kube-system',
+                                         'resourceVersion': '14'}}}
+
+        resource_version = self.watcher._handle_event(
+            self.context, self.bay, 'service', event, '10')
+
+        self.assertEqual('14', resource_version)
+        self.assertFalse(mock_list_by_bay_uuid.called)
+
+    def test_handle_error_event(self):
+        event = {'type': 'ERROR',
+                 'object': {'code': 410, 'message': 'too old'}}
+        self.assertIsNone(self.watcher._handle_event(
+            self.context, self.bay, 'service', event, '10'))
+
+    def test_create_api_streams_watch_calls(self):
+        k8s_api = self.watcher._create_api('http://10.0.0.1:8080')
+        with patch.object(k8s_api.apiClient.transport,
+                          'stream') as mock_stream:
+            events = k8s_api.listPod(watch=True, resourceVersion='10')
+
+        self.assertEqual(mock_stream.return_value, events)
+        method, url = mock_stream.call_args[0][:2]
+        self.assertEqual('GET', method)
+        self.assertIn('watch=True', url)
+        self.assertIn('resourceVersion=10', url)
+
+    @patch('time.sleep')
+    @patch.object(objects.Bay, 'get_by_uuid')
+    def test_watch_resumes_until_bay_deleted(self, mock_bay_get_by_uuid,
+                                             mock_sleep):
+        mock_api = mock.MagicMock()
+        event = {'type': 'MODIFIED',
+                 'object': {'metadata': {'name': 'svc1',
+                                         'resourceVersion': '12'}}}
+        mock_api.listService.side_effect = [
+            {'items': [], 'metadata': {'resourceVersion': '10'}},
+            iter([event]),
+            error.URLError('down'),
+            iter([])]
+        mock_bay_get_by_uuid.side_effect = [
+            self.bay, self.bay, exception.BayNotFound(bay=self.bay.uuid)]
+        self.watcher._watched[(self.bay.uuid, 'service')] = False
+
+        with contextlib.nested(
+                patch.object(self.watcher, '_create_api',
+                             return_value=mock_api),
+                patch.object(self.watcher, '_update')) as (_, mock_update):
+            self.watcher._watch(self.context, self.bay,
+                                'http://10.0.0.1:8080', 'service')
+            mock_update.assert_called_once_with(
+                self.context, self.bay, 'service', event['object'])
+
+        self.assertEqual(
+            [mock.call(),
+             mock.call(watch=True, resourceVersion='10'),
+             mock.call(watch=True, resourceVersion='12'),
+             mock.call(watch=True, resourceVersion='12')],
+            mock_api.listService.call_args_list)
+        mock_sleep.assert_called_once_with(1)
+        mock_api.apiClient.transport.close.assert_called_once_with()
+        self.assertNotIn((self.bay.uuid, 'service'), self.watcher._watched)
+
+
+class TestK8sResourceSync(base.TestCase):
+    def setUp(self):
+        super(TestK8sResourceSync, self).setUp()
+        self.sync = kube.K8sResourceSync()
+        self.bay = mock.MagicMock()
+        self.bay.uuid = 'bay-uuid'
+        cfg.CONF.set_override('sync_interval', 60, group='kubernetes')
+
+    def _pod(self, uuid, name, status='Running'):
+        pod = objects.Pod(self.context)
+        pod.uuid = uuid
+        pod.name = name
+        pod.labels = {}
+        pod.images = ['nginx']
+        pod.status = status
+        return pod
+
+    def _k8s_pod(self, name, namespace='default', phase='Running'):
+        return {'metadata': {'name': name, 'namespace': namespace},
+                'spec': {'containers': [{'image': 'nginx'}]},
+                'status': {'phase': phase}}
+
+    @patch.object(kube.loopingcall, 'DynamicLoopingCall')
+    @patch('time.time')
+    def test_add(self, mock_time, mock_looping_call):
+        mock_time.return_value = 1000
+        self.sync.add(self.context, 'bay-uuid')
+        self.sync.add(self.context, 'bay-uuid')
+        self.sync.add(self.context, 'bay2-uuid')
+
+        context, next_sync = self.sync._bays['bay-uuid']
+        self.assertEqual(self.context, context)
+        self.assertTrue(1000 <= next_sync <= 1060)
+        self.assertEqual(2, len(self.sync._bays))
+        mock_looping_call.assert_called_once_with(
+            self.sync.run_periodic_tasks, None)
+        mock_looping_call.return_value.start.assert_called_once_with(
+            periodic_interval_max=kube._SYNC_TICK)
+
+    @patch.object(objects.Bay, 'get_by_uuid')
+    @patch('time.time')
+    def test_sync_bays(self, mock_time, mock_get_by_uuid):
+        mock_time.return_value = 1000
+        mock_get_by_uuid.return_value = self.bay
+        self.sync._bays = {'bay-uuid': (self.context, 990),
+                           'bay2-uuid': (self.context, 1010)}
+
+        with patch.object(self.sync, 'sync_bay') as mock_sync_bay:
+            self.sync.sync_bays(None)
+            mock_sync_bay.assert_called_once_with(self.context, self.bay)
+
+        mock_get_by_uuid.assert_called_once_with(self.context, 'bay-uuid')
+        self.assertEqual({'bay-uuid': (self.context, 1050),
+                          'bay2-uuid': (self.context, 1010)},
+                         self.sync._bays)
+
+    @patch.object(objects.Bay, 'get_by_uuid')
+    def test_sync_bays_forgets_deleted_bay(self, mock_get_by_uuid):
+        mock_get_by_uuid.side_effect = exception.BayNotFound(bay='bay-uuid')
+        self.sync._bays = {'bay-uuid': (self.context, 0)}
+
+        self.sync.sync_bays(None)
+
+        self.assertEqual({}, self.sync._bays)
+
+    @patch.object(objects.Bay, 'sync_k8s_resources')
+    @patch.object(objects.ReplicationController, 'list_by_bay_uuid')
+    @patch.object(objects.Service, 'list_by_bay_uuid')
+    @patch.object(objects.Pod, 'list_by_bay_uuid')
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    def test_sync_bay(self, mock_retrieve_k8s_master_url,
+                      mock_pod_list, mock_service_list, mock_rc_list,
+                      mock_sync_k8s_resources):
+        mock_pod_list.return_value = [
+            self._pod('uuid1', 'pod1', status='Pending'),
+            self._pod('uuid2', 'pod2'),
+            self._pod('uuid3', 'pod3', status='failed'),
+            self._pod('uuid4', 'pod4')]
+        mock_service_list.return_value = []
+        mock_rc_list.return_value = []
+        with patch.object(self.sync._k8s_apis, 'get') as mock_get:
+            mock_k8s_api = mock_get.return_value
+            mock_k8s_api.listPod.return_value = {'items': [
+                self._k8s_pod('pod1'),
+                self._k8s_pod('pod2', namespace='kube-system'),
+                self._k8s_pod('pod4')]}
+            mock_k8s_api.listService.return_value = {'items': []}
+            mock_k8s_api.listReplicationController.return_value = {}
+
+            self.sync.sync_bay(self.context, self.bay)
+
+        mock_get.assert_called_once_with(
+            mock_retrieve_k8s_master_url.return_value)
+        mock_k8s_api.listPod.assert_called_once_with()
+        mock_sync_k8s_resources.assert_called_once_with(
+            self.context, {'pod': {'uuid1': {'status': 'Running'}}},
+            {'pod': ['uuid2']})
+
+    @patch.object(objects.Bay, 'sync_k8s_resources')
+    @patch.object(objects.ReplicationController, 'list_by_bay_uuid')
+    @patch.object(objects.Service, 'list_by_bay_uuid')
+    @patch.object(objects.Pod, 'list_by_bay_uuid')
+    @patch('magnum.conductor.handlers.kube._retrieve_k8s_master_url')
+    def test_sync_bay_with_selector(self, mock_retrieve_k8s_master_url,
+                                    mock_pod_list, mock_service_list,
+                                    mock_rc_list, mock_sync_k8s_resources):
+        cfg.CONF.set_override('sync_label_selector', 'managed=magnum',
+                              group='kubernetes')
+        mock_pod_list.return_value = [self._pod('uuid1', 'pod1')]
+        mock_service_list.return_value = []
+        mock_rc_list.return_value = []
+        with patch.object(self.sync._k8s_apis, 'get') as mock_get:
+            mock_k8s_api = mock_get.return_value
+            mock_k8s_api.listPod.return_value = {'items': []}
+
+            self.sync.sync_bay(self.context, self.bay)
+
+        mock_k8s_api.listPod.assert_called_once_with(
+            labelSelector='managed=magnum')
+        self.assertFalse(mock_sync_k8s_resources.called)
@@ -16,6 +16,7 @@ Unit Tests for :py:class:`magnum.conductor.rpcapi.API`.
 import copy
 
 import mock
+from oslo_config import cfg
 
 from magnum.conductor import api as conductor_rpcapi
 from magnum.tests.unit.db import base
@@ -26,6 +27,8 @@ class RPCAPITestCase(base.DbTestCase):
 
     def setUp(self):
         super(RPCAPITestCase, self).setUp()
+        cfg.CONF.import_opt('bay_topic', 'magnum.conductor.config',
+                            group='conductor')
         self.fake_bay = dbutils.get_test_bay(driver='fake-driver')
         self.fake_pod = dbutils.get_test_pod(driver='fake-driver')
         self.fake_rc = dbutils.get_test_rc(driver='fake-driver')
@@ -37,7 +40,7 @@ class RPCAPITestCase(base.DbTestCase):
 
         expected_retval = 'hello world' if rpc_method == 'call' else None
 
-        expected_topic = 'fake-topic'
+        expected_topic = kwargs.pop('topic', 'fake-topic')
         if 'host' in kwargs:
             expected_topic += ".%s" % kwargs['host']
 
@@ -75,6 +78,7 @@ class RPCAPITestCase(base.DbTestCase):
     def test_bay_create(self):
         self._test_rpcapi('bay_create',
                           'call',
+                          topic=cfg.CONF.conductor.bay_topic,
                           version='1.0',
                           bay=self.fake_bay,
                           bay_create_timeout=15)
@@ -82,17 +86,20 @@ class RPCAPITestCase(base.DbTestCase):
     def test_bay_delete(self):
         self._test_rpcapi('bay_delete',
                           'call',
+                          topic=cfg.CONF.conductor.bay_topic,
                           version='1.0',
                           uuid=self.fake_bay['uuid'])
 
         self._test_rpcapi('bay_delete',
                           'call',
+                          topic=cfg.CONF.conductor.bay_topic,
                           version='1.1',
                           uuid=self.fake_bay['name'])
 
     def test_bay_update(self):
         self._test_rpcapi('bay_update',
                           'call',
+                          topic=cfg.CONF.conductor.bay_topic,
                           version='1.1',
                           bay=self.fake_bay['name'])
 
@@ -153,6 +160,13 @@ class RPCAPITestCase(base.DbTestCase):
                           version='1.0',
                           rc=self.fake_rc)
 
+    def test_rc_scale(self):
+        self._test_rpcapi('rc_scale',
+                          'call',
+                          version='1.0',
+                          uuid=self.fake_rc['uuid'],
+                          replicas=5)
+
     def test_rc_delete(self):
         self._test_rpcapi('rc_delete',
                           'call',
@@ -164,8 +178,23 @@ class RPCAPITestCase(base.DbTestCase):
                           version='1.1',
                           uuid=self.fake_rc['name'])
 
+    def test_bay_apply_manifest(self):
+        self._test_rpcapi('bay_apply_manifest',
+                          'call',
+                          version='1.0',
+                          bay_uuid=self.fake_bay['uuid'],
+                          services=[self.fake_service],
+                          pods=[self.fake_pod],
+                          rcs=[self.fake_rc])
+
     def test_ping_conductor(self):
         self._test_rpcapi('ping_conductor',
                           'call',
                           rpcapi_cls=conductor_rpcapi.ListenerAPI,
                           version='1.0')
+
+    def test_conductor_stats(self):
+        self._test_rpcapi('conductor_stats',
+                          'call',
+                          rpcapi_cls=conductor_rpcapi.ListenerAPI,
+                          version='1.0')
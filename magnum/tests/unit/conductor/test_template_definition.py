@@ -12,6 +12,11 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import os
+import shutil
+import tempfile
+
+from heatclient.common import template_utils
 import mock
 from oslo_config import cfg
 
@@ -155,3 +160,64 @@ class TemplateDefinitionTestCase(base.TestCase):
         actual_url = swarm_def.get_discovery_url(mock_bay)
 
         self.assertEqual(mock_bay.discovery_url, actual_url)
+
+
+class TemplateContentsCacheTestCase(base.TestCase):
+
+    def setUp(self):
+        super(TemplateContentsCacheTestCase, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.template_path = self._write_file(
+            'cluster.yaml',
+            'heat_template_version: 2013-05-23\n'
+            'resources:\n'
+            '  config:\n'
+            '    type: OS::Heat::SoftwareConfig\n'
+            '    properties:\n'
+            '      config: {get_file: fragment.sh}\n')
+        self.fragment_path = self._write_file('fragment.sh', 'echo one\n')
+        self.addCleanup(tdef.TemplateDefinition._template_cache.clear)
+
+    def _write_file(self, name, contents):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    @mock.patch.object(template_utils, 'get_template_contents',
+                       wraps=template_utils.get_template_contents)
+    def test_get_template_contents_cached(self, mock_get_contents):
+        tpl_files, template = tdef.TemplateDefinition.get_template_contents(
+            self.template_path)
+        tpl_files['extra'] = 'changed by caller'
+        cached_files, cached_template = (
+            tdef.TemplateDefinition.get_template_contents(self.template_path))
+
+        mock_get_contents.assert_called_once_with(self.template_path)
+        self.assertEqual(template, cached_template)
+        self.assertNotIn('extra', cached_files)
+        self.assertIn('echo one\n', cached_files.values())
+
+    @mock.patch.object(template_utils, 'get_template_contents',
+                       wraps=template_utils.get_template_contents)
+    def test_get_template_contents_reloads_changed_file(
+            self, mock_get_contents):
+        tdef.TemplateDefinition.get_template_contents(self.template_path)
+        self._write_file('fragment.sh', 'echo changed\n')
+        tpl_files, template = tdef.TemplateDefinition.get_template_contents(
+            self.template_path)
+
+        self.assertEqual(2, mock_get_contents.call_count)
+        self.assertIn('echo changed\n', tpl_files.values())
+
+    @mock.patch.object(template_utils, 'get_template_contents')
+    def test_get_template_contents_missing_file_not_cached(
+            self, mock_get_contents):
+        mock_get_contents.return_value = ({}, {})
+        path = os.path.join(self.tmpdir, 'missing.yaml')
+        tdef.TemplateDefinition.get_template_contents(path)
+        tdef.TemplateDefinition.get_template_contents(path)
+
+        self.assertEqual(2, mock_get_contents.call_count)
+        self.assertNotIn(path, tdef.TemplateDefinition._template_cache)
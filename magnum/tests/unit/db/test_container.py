@@ -91,6 +91,18 @@ class DbContainerTestCase(base.DbTestCase):
                                             filters={'name': 'bad-container'})
         self.assertEqual([], [r.id for r in res])
 
+    def test_get_containers_by_bay_uuid(self):
+        container1 = utils.create_test_container(
+            uuid=magnum_utils.generate_uuid(), bay_uuid='bay-one')
+        utils.create_test_container(
+            uuid=magnum_utils.generate_uuid(), bay_uuid='bay-two')
+
+        res = self.dbapi.get_containers_by_bay_uuid('bay-one')
+        self.assertEqual([container1.id], [r.id for r in res])
+
+        res = self.dbapi.get_containers_by_bay_uuid('bad-bay')
+        self.assertEqual([], res)
+
     def test_destroy_container(self):
         container = utils.create_test_container()
         self.dbapi.destroy_container(container.id)
@@ -120,6 +132,24 @@ class DbContainerTestCase(base.DbTestCase):
                                           {'image_id': new_image})
         self.assertEqual(new_image, res.image_id)
 
+    def test_update_container_status(self):
+        container1 = utils.create_test_container(
+            uuid=magnum_utils.generate_uuid(), state='Stopped')
+        container2 = utils.create_test_container(
+            uuid=magnum_utils.generate_uuid(), state='Stopped')
+        container3 = utils.create_test_container(
+            uuid=magnum_utils.generate_uuid(), state='Stopped')
+
+        self.dbapi.update_container_status({container1.uuid: 'Running',
+                                            container2.uuid: 'Paused'})
+
+        self.assertEqual('Running', self.dbapi.get_container_by_uuid(
+            self.context, container1.uuid).status)
+        self.assertEqual('Paused', self.dbapi.get_container_by_uuid(
+            self.context, container2.uuid).status)
+        self.assertEqual('Stopped', self.dbapi.get_container_by_uuid(
+            self.context, container3.uuid).status)
+
     def test_update_container_not_found(self):
         container_uuid = magnum_utils.generate_uuid()
         new_image = 'new-image'
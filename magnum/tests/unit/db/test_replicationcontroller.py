@@ -134,3 +134,52 @@ class DbRCTestCase(base.DbTestCase):
         self.assertRaises(exception.InvalidParameterValue,
                           self.dbapi.update_rc, self.rc.id,
                           {'uuid': ''})
+
+    def test_sync_k8s_resources(self):
+        rc2 = utils.create_test_rc(bay_uuid=self.bay.uuid,
+                                   uuid=magnum_utils.generate_uuid())
+        pod = utils.create_test_pod(bay_uuid=self.bay.uuid)
+
+        self.dbapi.sync_k8s_resources(
+            {'rc': {self.rc.uuid: {'replicas': 5,
+                                   'labels': {'app': 'web'}}},
+             'pod': {pod.uuid: {'status': 'Running'}}},
+            {'rc': [rc2.uuid], 'pod': []})
+
+        rc = self.dbapi.get_rc_by_uuid(self.context, self.rc.uuid)
+        self.assertEqual(5, rc.replicas)
+        self.assertEqual({'app': 'web'}, rc.labels)
+        self.assertEqual('Running',
+                         self.dbapi.get_pod_by_uuid(self.context,
+                                                    pod.uuid).status)
+        self.assertRaises(exception.ReplicationControllerNotFound,
+                          self.dbapi.get_rc_by_uuid, self.context, rc2.uuid)
+
+    def test_create_k8s_resources(self):
+        service = utils.get_test_service(bay_uuid=self.bay.uuid)
+        del service['id']
+        rc = utils.get_test_rc(bay_uuid=self.bay.uuid,
+                               uuid=magnum_utils.generate_uuid())
+        del rc['id']
+
+        created = self.dbapi.create_k8s_resources({'service': [service],
+                                                   'rc': [rc]})
+
+        self.assertEqual([service['uuid']],
+                         [ref.uuid for ref in created['service']])
+        self.assertEqual([rc['uuid']], [ref.uuid for ref in created['rc']])
+        self.dbapi.get_service_by_uuid(self.context, service['uuid'])
+        self.dbapi.get_rc_by_uuid(self.context, rc['uuid'])
+
+    def test_create_k8s_resources_rolls_back_on_duplicate(self):
+        service = utils.get_test_service(bay_uuid=self.bay.uuid)
+        del service['id']
+        rc = utils.get_test_rc(bay_uuid=self.bay.uuid, uuid=self.rc.uuid)
+        del rc['id']
+
+        self.assertRaises(exception.ReplicationControllerAlreadyExists,
+                          self.dbapi.create_k8s_resources,
+                          {'service': [service], 'rc': [rc]})
+        self.assertRaises(exception.ServiceNotFound,
+                          self.dbapi.get_service_by_uuid, self.context,
+                          service['uuid'])
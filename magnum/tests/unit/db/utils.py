@@ -35,6 +35,7 @@ def get_test_baymodel(**kw):
         'dns_nameserver': kw.get('dns_nameserver', '8.8.1.1'),
         'apiserver_port': kw.get('apiserver_port', 8080),
         'docker_volume_size': kw.get('docker_volume_size', 20),
+        'prewarm_images': kw.get('prewarm_images'),
         'cluster_distro': kw.get('cluster_distro', 'fedora-atomic'),
         'ssh_authorized_key': kw.get('ssh_authorized_key',
                                      'ssh-rsa AAAAB3NzaC1ycEAAAADA'
@@ -97,6 +98,7 @@ def get_test_pod(**kw):
         'images': kw.get('images', ['MyImage']),
         'labels': kw.get('labels', {'name': 'foo'}),
         'status': kw.get('status', 'Running'),
+        'applied_manifest': kw.get('applied_manifest'),
         'created_at': kw.get('created_at'),
         'updated_at': kw.get('updated_at'),
     }
@@ -128,6 +130,7 @@ def get_test_service(**kw):
         'selector': kw.get('selector', {'name': 'foo'}),
         'ip': kw.get('ip', '172.17.2.2'),
         'ports': kw.get('ports', [{'port': 80}]),
+        'applied_manifest': kw.get('applied_manifest'),
         'created_at': kw.get('created_at'),
         'updated_at': kw.get('updated_at'),
     }
@@ -217,6 +220,7 @@ def get_test_rc(**kw):
         'labels': kw.get('labels', {'name': 'foo'}),
         'replicas': kw.get('replicas', 3),
         'manifest_url': kw.get('file:///tmp/rc.yaml'),
+        'applied_manifest': kw.get('applied_manifest'),
         'created_at': kw.get('created_at'),
         'updated_at': kw.get('updated_at'),
     }
@@ -67,6 +67,18 @@ class TestContainerObject(base.DbTestCase):
             self.assertIsInstance(containers[0], objects.Container)
             self.assertEqual(self.context, containers[0]._context)
 
+    def test_list_by_bay_uuid(self):
+        bay_uuid = self.fake_container['bay_uuid']
+        with mock.patch.object(self.dbapi, 'get_containers_by_bay_uuid',
+                               autospec=True) as mock_get_list:
+            mock_get_list.return_value = [self.fake_container]
+            containers = objects.Container.list_by_bay_uuid(self.context,
+                                                            bay_uuid)
+            mock_get_list.assert_called_once_with(bay_uuid)
+            self.assertThat(containers, HasLength(1))
+            self.assertIsInstance(containers[0], objects.Container)
+            self.assertEqual(self.context, containers[0]._context)
+
     def test_create(self):
         with mock.patch.object(self.dbapi, 'create_container',
                                autospec=True) as mock_create_container:
@@ -105,6 +117,13 @@ class TestContainerObject(base.DbTestCase):
                     uuid, {'image_id': 'container.img'})
                 self.assertEqual(self.context, container._context)
 
+    def test_update_status(self):
+        statuses = {self.fake_container['uuid']: 'Running'}
+        with mock.patch.object(self.dbapi, 'update_container_status',
+                               autospec=True) as mock_update_status:
+            objects.Container.update_status(self.context, statuses)
+            mock_update_status.assert_called_once_with(statuses)
+
     def test_refresh(self):
         uuid = self.fake_container['uuid']
         new_uuid = magnum_utils.generate_uuid()